@@ -0,0 +1,4 @@
+"""
+Benchmarks Package - Đo latency / throughput của các đường giao tiếp SFIS, PLC, Laser
+Chạy từ thư mục gốc: python -m benchmarks.<tên_module>
+"""
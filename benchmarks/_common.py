@@ -0,0 +1,186 @@
+"""
+Tiện ích dùng chung cho các benchmark: môi trường chạy, pty pair, thống kê latency
+"""
+import json
+import logging
+import os
+import select
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setupEnvironment():
+    """
+    Chuẩn bị sys.path và APPDATA tạm để import được các module của ứng dụng.
+    settings.json được tạo từ default_setting.json, log ghi vào thư mục tạm (không đụng máy thật).
+    """
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    appdata = tempfile.mkdtemp(prefix="regilaser_bench_")
+    os.environ["APPDATA"] = appdata
+    app_folder = os.path.join(appdata, "Regilaser")
+    os.makedirs(app_folder, exist_ok=True)
+    with open(os.path.join(ROOT_DIR, "default_setting.json"), "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    settings.setdefault("advanced", {})["path_app"] = appdata
+    with open(os.path.join(app_folder, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+    return appdata
+
+
+def quietLogger():
+    """Giảm log của ứng dụng xuống WARNING để không ảnh hưởng kết quả đo."""
+    from utils.Logging import getLogger
+    logger = getLogger()
+    logger.setLevel(logging.WARNING)
+    return logger
+
+
+class _SilencedThreadStdout:
+    """Bỏ output print() của 1 thread (simulator), giữ nguyên output của các thread khác."""
+
+    def __init__(self, original, thread):
+        self._original = original
+        self._thread = thread
+
+    def write(self, text):
+        if threading.current_thread() is self._thread:
+            return len(text)
+        return self._original.write(text)
+
+    def flush(self):
+        self._original.flush()
+
+
+class PtyResponder:
+    """
+    Giả lập thiết bị serial trên pty pair (chỉ Linux/macOS).
+    process_buffer(buffer, send_func, peer_name) -> buffer còn dư (giống các simulation_*.py)
+    """
+
+    def __init__(self, process_buffer, peer_name="pty"):
+        import tty
+        self.process_buffer = process_buffer
+        self.peer_name = peer_name
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port_name = os.ttyname(self.slave_fd)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"PtyResponder-{peer_name}", daemon=True)
+
+    def start(self):
+        # Simulator in ra console rất nhiều, chặn lại để không làm nhiễu kết quả
+        self._original_stdout = sys.stdout
+        sys.stdout = _SilencedThreadStdout(sys.stdout, self._thread)
+        self._thread.start()
+        return self
+
+    def _send(self, data: bytes):
+        os.write(self.master_fd, data)
+
+    def _run(self):
+        buffer = b""
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self.master_fd], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                data = os.read(self.master_fd, 4096)
+            except OSError:
+                break
+            if not data:
+                break
+            buffer = self.process_buffer(buffer + data, self._send, self.peer_name)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        sys.stdout = self._original_stdout
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def summarize(samples_ms):
+    """Trả về dict thống kê (ms) cho danh sách latency."""
+    ordered = sorted(samples_ms)
+    def pct(p):
+        idx = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": pct(50),
+        "p95": pct(95),
+        "max": ordered[-1],
+    }
+
+
+def printTable(title, rows, unit="ms"):
+    """In bảng kết quả: rows = [(label, summary_dict)]"""
+    print(f"\n{title}")
+    print(f"{'variant':<28}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+    for label, s in rows:
+        print(f"{label:<28}{s['n']:>6}{s['mean']:>10.2f}{s['p50']:>10.2f}{s['p95']:>10.2f}{s['max']:>10.2f}")
+    print(f"(đơn vị: {unit})")
+
+
+class LineDriver:
+    """
+    Vai trò line sản xuất: Ready -> chờ OK / NG từ ứng dụng -> Ready panel kế tiếp (chạy trong thread PLC giả lập)
+    transfer_ms: thời gian line đưa panel kế tiếp vào vị trí trước khi báo Ready
+    """
+
+    def __init__(self, plc, panels, transfer_ms=0.0):
+        self.plc = plc
+        self.panels = panels
+        self.transfer_ms = transfer_ms
+        self.results = []  # (OK / NG, ms từ Ready tới kết quả)
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+        self._ready_at = None
+        plc.on_command = self.onCommand
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._sendReady()
+
+    def _sendReady(self):
+        self._ready_at = time.perf_counter()
+        if not self.plc.sendReady():
+            self.done.set()
+
+    def onCommand(self, text):
+        if text not in ("OK", "NG") or self._ready_at is None:
+            return
+        now = time.perf_counter()
+        self.results.append((text, (now - self._ready_at) * 1000.0))
+        if len(self.results) >= self.panels:
+            self.finished_at = now
+            self.done.set()
+        elif self.transfer_ms:
+            threading.Timer(self.transfer_ms / 1000.0, self._sendReady).start()
+        else:
+            self._sendReady()
+
+
+def readStatus(port):
+    """1 dòng JSON từ StatusServer"""
+    with socket.create_connection(("127.0.0.1", port), timeout=2.0) as sock:
+        return json.loads(sock.makefile("r", encoding="utf-8").readline())
+
+
+def timed(func, *args, **kwargs):
+    """Gọi func và trả về (kết quả, thời gian ms)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
@@ -0,0 +1,103 @@
+"""
+Benchmark: auto-connect SFIS / PLC / Laser lúc khởi động
+So sánh cách cũ (3 lần kết nối blocking nối tiếp trong GUI thread) với ConnectionOrchestrator
+(probe song song trong thread pool, deadline riêng từng thiết bị).
+
+Probe giả lập thời gian mở thiết bị: SFIS / PLC mở COM nhanh, laser vắng mặt => chờ hết timeout socket.
+Đo tổng thời gian tới trạng thái sẵn sàng và khoảng dừng lớn nhất của event loop GUI (QTimer 10 ms).
+Chạy: python -m benchmarks.auto_connect [laser_timeout_ms]
+"""
+import sys
+import time
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from PySide6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+from workers.connection_orchestrator import ConnectionOrchestrator  # noqa: E402
+
+TICK_MS = 10
+
+
+def _devices(laser_timeout_ms):
+    def sleeper(seconds, result):
+        def probe():
+            time.sleep(seconds)
+            if not result:
+                raise OSError("timed out")
+            return True
+        return probe
+    return [
+        ("Laser", sleeper(laser_timeout_ms / 1000.0, False), laser_timeout_ms + 1000),
+        ("SFIS", sleeper(0.08, True), 3000),
+        ("PLC", sleeper(0.05, True), 3000),
+    ]
+
+
+def _runInLoop(app, start):
+    """Chạy event loop tới khi start(done) gọi done(); trả về (tổng ms, khoảng dừng lớn nhất ms)"""
+    ticks = []
+    ticker = QTimer()
+    ticker.setInterval(TICK_MS)
+    ticker.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    finished = []
+
+    def done(*_):
+        finished.append(time.perf_counter())
+        app.quit()
+
+    t0 = time.perf_counter()
+    ticks.append(t0)
+    ticker.start()
+    QTimer.singleShot(0, lambda: start(done))
+    app.exec()
+    ticker.stop()
+    gaps = [(b - a) * 1000.0 for a, b in zip(ticks, ticks[1:] + finished)]
+    return (finished[0] - t0) * 1000.0, max(gaps)
+
+
+def legacyStart(devices):
+    def start(done):
+        for _, probe, _ in devices:
+            try:
+                probe()
+            except OSError:
+                pass
+        done()
+    return start
+
+
+def orchestratedStart(devices, results):
+    def start(done):
+        orchestrator = ConnectionOrchestrator()
+        for name, probe, deadline_ms in devices:
+            orchestrator.addDevice(name, probe, deadline_ms)
+        orchestrator.allFinished.connect(lambda r: (results.update(r), done()))
+        results["_orchestrator"] = orchestrator
+        orchestrator.start()
+    return start
+
+
+def run(laser_timeout_ms=2000):
+    quietLogger()
+    app = QCoreApplication.instance() or QCoreApplication([])
+    devices = _devices(laser_timeout_ms)
+    legacy_total, legacy_gap = _runInLoop(app, legacyStart(devices))
+    results = {}
+    total, gap = _runInLoop(app, orchestratedStart(devices, results))
+    results.pop("_orchestrator")
+    printTable(f"Startup auto-connect (laser absent, timeout {laser_timeout_ms} ms)", [
+        ("sequential: time to ready", summarize([legacy_total])),
+        ("sequential: GUI stall", summarize([legacy_gap])),
+        ("orchestrator: time to ready", summarize([total])),
+        ("orchestrator: GUI stall", summarize([gap])),
+    ])
+    if results != {"Laser": False, "SFIS": True, "PLC": True}:
+        raise AssertionError(f"unexpected aggregated state: {results}")
+    print(f"Aggregated state: {results}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
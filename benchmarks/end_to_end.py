@@ -0,0 +1,151 @@
+"""
+Benchmark end-to-end: 1 trạm hoàn chỉnh (MainPresenter, cửa sổ offscreen) với SFIS / PLC / laser giả lập trong cùng process
+- SFIS, PLC: SfisSimulator / PlcSimulator trên pty pair (ứng dụng mở slave như cổng COM)
+- Laser: LaserSimulator trên TCP localhost port ngẫu nhiên, thời gian xử lý GA / C2 / NT nhân sim_scale
+PLC giả lập báo Ready, chờ OK / NG rồi báo Ready cho panel kế tiếp => đo panels/hour và latency từng stage
+(đọc từ file CSV của cycle_tracer, đúng số liệu mà trạm thật ghi ra).
+profile: preset latency / lỗi của SFIS và laser giả lập (simulation_device.PROFILES, mặc định ideal).
+headless: StationPresenter + QCoreApplication như main.py --headless (không MainWindow), kiểm tra thêm status socket.
+Nền để đo mọi cải tiến takt time mà không cần line thật.
+Chạy: python -m benchmarks.end_to_end [số_panel] [sim_scale] [profile] [headless]
+"""
+import csv
+import glob
+import json
+import os
+import sys
+import time
+
+from benchmarks._common import LineDriver, printTable, quietLogger, readStatus, setupEnvironment, summarize
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+appdata = setupEnvironment()
+
+from PySide6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+from presenter.station_presenter import StationPresenter  # noqa: E402
+from simulation_laser import LaserSimulator  # noqa: E402
+from simulation_plc import PlcSimulator  # noqa: E402
+from simulation_sfis import SfisSimulator  # noqa: E402
+from utils.cycle_trace import STAGES  # noqa: E402
+from utils.setting import settings_manager  # noqa: E402
+from workers.status_server import StatusServer  # noqa: E402
+
+CONNECT_TIMEOUT_S = 15.0
+CYCLE_TIMEOUT_S = 30.0  # 1 panel không xong trong thời gian này => dừng benchmark
+
+
+def _runUntil(app, condition, timeout_s):
+    """Chạy event loop tới khi condition() đúng hoặc hết timeout_s. True nếu condition đúng"""
+    deadline = time.monotonic() + timeout_s
+    poll = QTimer()
+    poll.setInterval(20)
+    poll.timeout.connect(lambda: (condition() or time.monotonic() > deadline) and app.quit())
+    poll.start()
+    app.exec()
+    poll.stop()
+    return condition()
+
+
+def stageSamples():
+    """Latency (ms) từng stage của các cycle OK trong file CSV ca hiện tại của cycle_tracer"""
+    samples = {stage: [] for stage in STAGES[1:] + ("total",)}
+    for path in glob.glob(os.path.join(appdata, "RegilaserLog", "cycle_times", "cycle_*.csv")):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row["result"] != "OK":
+                    continue
+                for stage, values in samples.items():
+                    if row.get(stage):
+                        values.append(float(row[stage]))
+    return samples
+
+
+def _guiPresenter(sfis, plc):
+    """MainPresenter + MainWindow offscreen (QApplication phải được tạo trước)"""
+    from gui.MainWindow import MainWindow
+    from presenter.main_presenter import MainPresenter
+    window = MainWindow()
+    # Nút SFIS / PLC kết nối lại theo cổng đang chọn trong combo (chỉ có COM1..COM12) => thêm pty slave vào combo
+    bottom_status = window.getBottomStatus()
+    for combo, port_name in ((bottom_status.combo_sfis_com, sfis.port_name), (bottom_status.combo_plc_com, plc.port_name)):
+        combo.addItem(port_name)
+        combo.setCurrentText(port_name)
+    return MainPresenter(window)
+
+
+def run(panels=10, scale=0.1, profile="ideal", headless=False):
+    if headless:
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    else:
+        from PySide6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv)
+    quietLogger()
+
+    sfis, plc, laser = SfisSimulator(profile=profile), PlcSimulator(), LaserSimulator(scale=scale, profile=profile)
+    sfis.attachPty()
+    plc.attachPty()
+    laser.attachTcp()
+    for simulator in (sfis, plc, laser):
+        simulator.start()
+
+    # Laser qua TCP tới simulator; SFIS / PLC mở pty slave thay cho cổng COM
+    settings_manager.set("connection.laser.use_com", False)
+    settings_manager.set("connection.laser.ip", "127.0.0.1")
+    settings_manager.set("connection.laser.port", laser.port)
+    settings_manager.set("connection.sfc.com_port", sfis.port_name)
+    settings_manager.set("connection.plc.com_port", plc.port_name)
+
+    presenter = StationPresenter() if headless else _guiPresenter(sfis, plc)
+    status_server = None
+    if headless:
+        status_server = StatusServer(presenter.statusSnapshot, port=0)
+        status_server.start()
+    presenter.sfis_presenter.currentPort = sfis.port_name
+    presenter.plc_presenter.current_port = plc.port_name
+    ready = {}
+    presenter.connect_orchestrator.allFinished.connect(ready.update)
+    driver = LineDriver(plc, panels)
+    try:
+        presenter.initialize()
+        if not _runUntil(app, lambda: bool(ready), CONNECT_TIMEOUT_S) or not all(ready.values()):
+            raise RuntimeError(f"devices not connected: {ready}")
+        driver.start()
+        _runUntil(app, driver.done.is_set, CYCLE_TIMEOUT_S * panels)
+        _runUntil(app, lambda: not presenter.isRunning, CYCLE_TIMEOUT_S)
+        status = readStatus(status_server.port) if status_server else None
+    finally:
+        if status_server:
+            status_server.stop()
+        presenter.cleanup()
+        for simulator in (sfis, plc, laser):
+            simulator.stop()
+
+    passed = [ms for result, ms in driver.results if result == "OK"]
+    if len(driver.results) < panels:
+        raise AssertionError(f"line stalled after {len(driver.results)}/{panels} panels")
+    if len(passed) < panels:
+        raise AssertionError(f"{panels - len(passed)} panel(s) failed: {driver.results}")
+    if status and status["cycles"] != {"OK": panels, "NG": 0}:
+        raise AssertionError(f"status socket reports {status['cycles']}, expected {panels} OK")
+
+    elapsed_s = driver.finished_at - driver.started_at
+    rows = [("PLC Ready -> OK", summarize(passed))]
+    rows += [(stage, summarize(values)) for stage, values in stageSamples().items() if values]
+    mode = "headless" if headless else "GUI"
+    printTable(f"End-to-end station, {mode} ({panels} panels, laser delay x{scale}, profile {profile})", rows)
+    print(f"Throughput: {panels / elapsed_s * 3600.0:.0f} panels/hour "
+          f"({elapsed_s * 1000.0 / panels:.1f} ms takt, {elapsed_s:.2f} s total)")
+    print(f"Simulator commands: SFIS {dict(sfis.counts)}, laser {dict(laser.counts)}, PLC {dict(plc.counts)}")
+    if status:
+        print(f"Status socket: {json.dumps(status)}")
+    return app
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1,
+        sys.argv[3] if len(sys.argv) > 3 else "ideal",
+        len(sys.argv) > 4 and sys.argv[4] == "headless",
+    )
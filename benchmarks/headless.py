@@ -0,0 +1,105 @@
+"""
+Benchmark: cold start và bộ nhớ của chế độ GUI so với main.py --headless (process Python mới cho mỗi lần đo)
+- gui: QApplication + MainWindow + MainPresenter, window.show() như runGui()
+- headless: QCoreApplication + StationPresenter + StatusServer như runHeadless()
+Cold start: từ lúc gọi process tới khi trạm dựng xong (trước auto-connect, không cần thiết bị).
+RSS: peak resident set của process con (resource.ru_maxrss, chỉ có trên Linux / macOS).
+Kiểm tra: headless không import QtWidgets / gui, cold start < 1 s, RSS thấp hơn GUI.
+Chạy: python -m benchmarks.headless [số_lần]
+"""
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks._common import ROOT_DIR, printTable, setupEnvironment, summarize
+
+appdata = setupEnvironment()
+
+COLD_START_LIMIT_MS = 1000.0
+
+_PRELUDE = """
+import sys
+try:
+    import resource
+except ImportError:
+    resource = None
+"""
+
+_GUI = _PRELUDE + """
+from PySide6.QtWidgets import QApplication
+from gui.MainWindow import MainWindow
+from presenter.main_presenter import MainPresenter
+app = QApplication(sys.argv)
+window = MainWindow()
+presenter = MainPresenter(window)
+window.show()
+app.processEvents()
+"""
+
+_HEADLESS = _PRELUDE + """
+from PySide6.QtCore import QCoreApplication
+from presenter.station_presenter import StationPresenter
+from workers.status_server import StatusServer
+app = QCoreApplication(sys.argv)
+station = StationPresenter()
+StatusServer(station.statusSnapshot, port=0).start()
+app.processEvents()
+"""
+
+_REPORT = """
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+if sys.platform == "darwin":
+    rss_kb //= 1024
+widgets = any(name == "PySide6.QtWidgets" or name == "gui" or name.startswith("gui.") for name in sys.modules)
+print("STATION", rss_kb, int(widgets), flush=True)
+import os
+os._exit(0)  # không cleanup: chỉ đo khởi động
+"""
+
+
+def _startOnce(script):
+    """(ms từ lúc gọi process tới khi trạm dựng xong, RSS MB, có import QtWidgets / gui không)"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", APPDATA=appdata)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", script + _REPORT], cwd=ROOT_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:  # bỏ qua output của Logging
+        if line.startswith("STATION "):
+            elapsed = (time.perf_counter() - start) * 1000.0
+            _, rss_kb, widgets = line.split()
+            proc.wait()
+            return elapsed, int(rss_kb) / 1024.0, widgets == "1"
+    proc.wait()
+    raise RuntimeError(f"station did not start (exit code {proc.returncode})")
+
+
+def run(repeats=5):
+    _startOnce(_GUI)  # làm nóng cache .pyc / đĩa
+    _startOnce(_HEADLESS)
+    samples = {"gui": ([], []), "headless": ([], [])}
+    headless_widgets = False
+    for _ in range(repeats):
+        for mode, script in (("gui", _GUI), ("headless", _HEADLESS)):
+            elapsed, rss_mb, widgets = _startOnce(script)
+            samples[mode][0].append(elapsed)
+            samples[mode][1].append(rss_mb)
+            headless_widgets |= mode == "headless" and widgets
+    printTable(f"Cold start to station constructed ({repeats} fresh processes)", [
+        (mode, summarize(start_ms)) for mode, (start_ms, _) in samples.items()
+    ])
+    printTable("Peak RSS", [(mode, summarize(rss)) for mode, (_, rss) in samples.items()], unit="MB")
+
+    if headless_widgets:
+        raise AssertionError("headless mode imported QtWidgets / gui")
+    headless_p50 = sorted(samples["headless"][0])[len(samples["headless"][0]) // 2]
+    if headless_p50 > COLD_START_LIMIT_MS:
+        raise AssertionError(f"headless cold start p50 {headless_p50:.0f} ms > {COLD_START_LIMIT_MS:.0f} ms")
+    gui_rss, headless_rss = min(samples["gui"][1]), max(samples["headless"][1])
+    if headless_rss and headless_rss >= gui_rss:
+        raise AssertionError(f"headless RSS {headless_rss:.1f} MB not below GUI {gui_rss:.1f} MB")
+    print("Headless check passed: no QtWidgets / gui imported")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,121 @@
+"""
+Benchmark: IOCore (advanced.async_io) so với các worker cũ
+- CPU tiêu thụ khi trạm idle: PLC receiver QTimer 10ms vs IOCore callback
+- Latency SFIS NEEDPSN round-trip và lệnh laser GA qua IOCore
+
+SFIS giả lập bằng simulation_sfis.process_buffer, PLC/laser bằng responder tối giản, trên pty pair.
+Chạy: python -m benchmarks.io_core [số_giây_idle]
+"""
+import sys
+import time
+
+from benchmarks._common import PtyResponder, printTable, quietLogger, setupEnvironment, summarize, timed
+
+setupEnvironment()
+
+from PySide6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+import simulation_sfis  # noqa: E402
+from model.sfis_model import SFISModel  # noqa: E402
+from utils.schema import LaserConnectMode  # noqa: E402
+from workers.io_core import io_core  # noqa: E402
+from workers.laser_worker import LaserWorker  # noqa: E402
+from workers.plc_worker import PLCWorker  # noqa: E402
+from workers.sfis_worker import SFISWorker  # noqa: E402
+
+
+def _silentDevice(buffer, send_func, peer_name):
+    """PLC idle: không gửi gì"""
+    return b""
+
+
+def _instantLaser(buffer, send_func, peer_name):
+    """Laser trả ack ngay (<lệnh>,0), không có delay xử lý như simulation_laser"""
+    while b"\n" in buffer:
+        line, buffer = buffer.split(b"\n", 1)
+        command = line.strip().split(b",", 1)[0]
+        if command:
+            send_func(command + b",0\r\n")
+    return buffer
+
+
+def idleCpu(app, use_async_io, seconds):
+    """CPU time (ms) của process trong `seconds` giây PLC receiver chạy mà không có dữ liệu"""
+    responder = PtyResponder(_silentDevice, "PLC").start()
+    worker = PLCWorker()
+    worker.use_async_io = use_async_io
+    try:
+        if not worker.connect(responder.port_name, 9600):
+            raise RuntimeError(f"Cannot open pty {responder.port_name}")
+        worker.startReceiver()
+        start = time.process_time()
+        QTimer.singleShot(int(seconds * 1000), app.quit)
+        app.exec()
+        return (time.process_time() - start) * 1000.0
+    finally:
+        worker.stopReceiver()
+        worker.disconnect()
+        responder.stop()
+
+
+def sfisRoundTrip(use_async_io, iterations, panel_num=24):
+    responder = PtyResponder(simulation_sfis.process_buffer, "SFIS").start()
+    worker = SFISWorker()
+    worker.use_async_io = use_async_io
+    request = SFISModel().createFormatNeedPSN("2790004600", panel_num)
+    try:
+        if not worker.connect(responder.port_name, 9600):
+            raise RuntimeError(f"Cannot open pty {responder.port_name}")
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            worker.sendData_SFIS(request)
+            response = worker.readData_SFIS(timeout_ms=10000)
+            samples.append((time.perf_counter() - start) * 1000.0)
+            if not response or "PASS" not in response:
+                raise RuntimeError(f"Unexpected response: {response!r}")
+        return summarize(samples)
+    finally:
+        worker.disconnect()
+        responder.stop()
+
+
+def laserRoundTrip(use_async_io, iterations):
+    responder = PtyResponder(_instantLaser, "Laser").start()
+    worker = LaserWorker(LaserConnectMode.RS232, "127.0.0.1", 0, com_port=responder.port_name,
+                         async_io=use_async_io)
+    try:
+        worker.connect()
+        samples = []
+        for _ in range(iterations):
+            _, elapsed = timed(worker.send_ga, "1")
+            samples.append(elapsed)
+        return summarize(samples)
+    finally:
+        worker.disconnect()
+        responder.stop()
+
+
+def run(idle_seconds=3.0, iterations=50):
+    quietLogger()
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    legacy_cpu = idleCpu(app, False, idle_seconds)
+    async_cpu = idleCpu(app, True, idle_seconds)
+    print(f"\nPLC receiver idle CPU over {idle_seconds:.1f}s")
+    print(f"{'QTimer 10ms poll':<28}{legacy_cpu:>10.1f} ms")
+    print(f"{'IOCore callback':<28}{async_cpu:>10.1f} ms")
+
+    printTable(f"SFIS NEEDPSN round-trip ({iterations} requests)", [
+        ("blocking reader", sfisRoundTrip(False, iterations)),
+        ("IOCore", sfisRoundTrip(True, iterations)),
+    ])
+    printTable(f"Laser GA round-trip over RS232 ({iterations} commands)", [
+        ("polling reader", laserRoundTrip(False, iterations)),
+        ("IOCore", laserRoundTrip(True, iterations)),
+    ])
+    io_core.stop()
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
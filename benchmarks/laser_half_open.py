@@ -0,0 +1,180 @@
+"""
+Benchmark: cycle đầu tiên sau khi link TCP tới laser chết trong lúc rảnh (laser reboot / switch reset)
+So sánh cách cũ (checkConnectionAlive chỉ getpeername() => link chết vẫn "sống", lỗi chỉ lộ ra khi GA/C2
+timeout + retry 0.5 s) với health probe (peek socket + keepalive) và kết nối lại ngay trước lệnh.
+
+Laser giả lập: TCP server local trả GA,0 / C2,0 / NT,0 ngay lập tức; dropAll() đóng kết nối phía server
+bằng FIN (đóng bình thường) hoặc RST (SO_LINGER 0).
+Half-open thật (mất cáp, không FIN/RST) do keepalive phát hiện, không giả lập được trên loopback:
+chỉ kiểm tra option keepalive đã được đặt trên socket.
+Chạy: python -m benchmarks.laser_half_open [command_timeout_ms]
+"""
+import socket
+import struct
+import sys
+import threading
+import time
+import types
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+
+from presenter.laser_presenter import LaserPresenter  # noqa: E402
+from utils.schema import LaserConnectMode  # noqa: E402
+from workers.laser_worker import LaserWorker  # noqa: E402
+
+CONTENT = "0,PX5BF03CL,2,2790004600,6,PT53QG0754670080,10,PT53QG0754670081"
+REPLIES = {b"GA": b"GA,0\r\n", b"C2": b"C2,0\r\n", b"NT": b"NT,0\r\n"}
+
+
+class FastLaserServer:
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(4)
+        self.port = self.server.getsockname()[1]
+        self.clients = []
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def _accept(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.clients.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _serve(conn):
+        buffer = b""
+        try:
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    return
+                buffer += data
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    conn.sendall(REPLIES.get(line[:2], b"ERROR,UNKNOWN_COMMAND\r\n"))
+        except OSError:
+            return
+
+    def dropAll(self, rst=False):
+        for conn in self.clients:
+            if rst:
+                # SHUT_RD đánh thức recv() của _serve (không gửi FIN), close() với linger 0 => RST
+                conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                conn.shutdown(socket.SHUT_RD)
+            else:
+                conn.shutdown(socket.SHUT_RDWR)
+            conn.close()
+        self.clients.clear()
+
+    def stop(self):
+        self._stop.set()
+        self.dropAll()
+        self.server.close()
+
+
+class LegacyLaserWorker(LaserWorker):
+    def checkConnectionAlive(self) -> bool:
+        """Bản sao checkConnectionAlive cũ (TCP)"""
+        if not self._socket:
+            return False
+        try:
+            self._socket.getpeername()
+            return True
+        except OSError:
+            return False
+
+
+def legacyEnsureConnection(self):
+    """Bản sao LaserPresenter._ensure_connection cũ"""
+    if self.is_connected:
+        if not self.worker.checkConnectionAlive():
+            self.worker.is_connected = False
+            self._handle_connection_lost()
+            return False
+        return True
+    return self.connect()
+
+
+def _presenter(legacy, worker_cls, port, timeout_ms):
+    # Gắn method vào instance thay vì subclass: subclass QObject của PySide che mất override connect()
+    presenter = LaserPresenter()
+    if legacy:
+        presenter._ensure_connection = types.MethodType(legacyEnsureConnection, presenter)
+    presenter.laser_mode = LaserConnectMode.TCP
+    presenter.laser_ip, presenter.laser_port = "127.0.0.1", port
+    presenter.command_timeout_ms = timeout_ms
+    presenter.delay_step = 0
+    presenter.ack_driven = False
+    presenter.worker = worker_cls(mode=LaserConnectMode.TCP, ip="127.0.0.1", port=port, timeout_ms=timeout_ms)
+    return presenter
+
+
+def runVariant(server, legacy, worker_cls, rst, timeout_ms):
+    presenter = _presenter(legacy, worker_cls, server.port, timeout_ms)
+    if not presenter.connect():
+        raise RuntimeError("cannot connect to local laser server")
+    if not presenter.startLaserMarkingProcess(script=1, content=CONTENT):
+        raise RuntimeError("warm-up cycle failed")
+    server.dropAll(rst=rst)
+    time.sleep(0.05)  # link chết trong lúc chờ panel kế tiếp
+    start = time.perf_counter()
+    ok = presenter.startLaserMarkingProcess(script=1, content=CONTENT)
+    elapsed = (time.perf_counter() - start) * 1000.0
+    presenter.worker.disconnect()
+    return ok, elapsed
+
+
+def keepaliveOptions(port):
+    worker = LaserWorker(mode=LaserConnectMode.TCP, ip="127.0.0.1", port=port, timeout_ms=1000)
+    worker.connect()
+    sock = worker._socket
+    options = {"SO_KEEPALIVE": sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)}
+    for name in ("TCP_KEEPIDLE", "TCP_KEEPINTVL", "TCP_KEEPCNT"):
+        if hasattr(socket, name):
+            options[name] = sock.getsockopt(socket.IPPROTO_TCP, getattr(socket, name))
+    worker.disconnect()
+    return options
+
+
+def run(timeout_ms=1000):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    quietLogger()
+    server = FastLaserServer().start()
+    rows, outcomes = [], {}
+    try:
+        for drop, rst in (("FIN", False), ("RST", True)):
+            for label, legacy, worker_cls in (
+                ("getpeername", True, LegacyLaserWorker),
+                ("health probe", False, LaserWorker),
+            ):
+                ok, elapsed = runVariant(server, legacy, worker_cls, rst, timeout_ms)
+                outcomes[f"{label} / {drop}"] = ok
+                rows.append((f"{label}: {drop} {'OK' if ok else 'FAIL'}", summarize([elapsed])))
+        options = keepaliveOptions(server.port)
+    finally:
+        server.stop()
+    printTable(f"First cycle after idle link drop (timeout {timeout_ms} ms)", rows)
+    print(f"Cycle result: {outcomes}")
+    print(f"Keepalive options on laser socket: {options}")
+    if not all(ok for name, ok in outcomes.items() if name.startswith("health probe")):
+        raise AssertionError("health probe did not recover the link before the cycle")
+    if options["SO_KEEPALIVE"] == 0:
+        raise AssertionError("SO_KEEPALIVE is not enabled on the laser socket")
+    return app
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,60 @@
+"""
+Benchmark: thời gian GA -> C2 -> NT của LaserPresenter.startLaserMarkingProcess
+So sánh flow cũ (sleep delay_step giữa các bước) với chế độ ack-driven.
+
+Laser giả lập bằng simulation_laser.process_buffer (RS232) chạy trên pty pair.
+Chạy: python -m benchmarks.laser_pipeline [số_chu_kỳ] [delay_step_s]
+"""
+import sys
+import time
+
+from benchmarks._common import PtyResponder, printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+import simulation_laser  # noqa: E402
+from presenter.laser_presenter import LaserPresenter  # noqa: E402
+from utils.schema import LaserConnectMode  # noqa: E402
+
+
+CONTENT = "0,PX5BF03CL,2,2790004600,6,PT53QG0754670080,10,PT53QG0754670081"
+
+
+def run(cycles=5, delay_step=0.1):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    quietLogger()
+    responder = PtyResponder(simulation_laser.process_buffer, "LASER").start()
+    presenter = LaserPresenter()
+    presenter.laser_mode = LaserConnectMode.RS232
+    presenter.worker.mode = LaserConnectMode.RS232
+    presenter.laser_com_port = responder.port_name
+    presenter.command_timeout_ms = 5000
+    presenter.delay_step = delay_step
+    try:
+        if not presenter.connect(com_port=responder.port_name, baudrate=9600):
+            raise RuntimeError(f"Cannot open pty {responder.port_name}")
+        rows = []
+        for label, ack_driven in (("sleep-based (current)", False), ("ack-driven (new)", True)):
+            presenter.ack_driven = ack_driven
+            samples = []
+            for _ in range(cycles):
+                start = time.perf_counter()
+                if not presenter.startLaserMarkingProcess(script=1, content=CONTENT):
+                    raise RuntimeError(f"{label}: marking process failed")
+                samples.append((time.perf_counter() - start) * 1000.0)
+            rows.append((label, summarize(samples)))
+    finally:
+        presenter.auto_reconnect_enabled = False
+        presenter.worker.disconnect()
+        responder.stop()
+    printTable(f"GA/C2/NT cycle time ({cycles} cycles, delay_step={delay_step}s, simulator latency included)", rows)
+    print(f"Mean time saved per panel: {rows[0][1]['mean'] - rows[1][1]['mean']:.1f} ms")
+    return app
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1,
+    )
@@ -0,0 +1,169 @@
+"""
+Benchmark: gắn reply laser với đúng lệnh (model.laser_protocol) so với cách cũ (cả chunk cuối bằng \\n là reply)
+Laser giả lập: TCP server local, mỗi lệnh trả về theo kịch bản (reply trễ, mã lỗi).
+
+- late reply: NT trả lời trễ hơn timeout của client, reply muộn "NT,0" tới trong lúc client chờ GA
+  => cách cũ coi NT không có reply là xong và gán "NT,0" cho GA (lỗi); cách mới báo NT timeout,
+  bỏ reply không cùng tên lệnh và GA nhận đúng "GA,0"
+- error code: C2 trả "C2,1,S001" => cách cũ retry sau 0.5 s (LaserPresenter.setContent), cách mới dừng ngay
+Chạy: python -m benchmarks.laser_protocol
+"""
+import socket
+import threading
+import time
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from model.laser_protocol import LaserReplyError  # noqa: E402
+from utils.schema import LaserConnectMode  # noqa: E402
+from workers.laser_worker import LaserWorker  # noqa: E402
+
+CONTENT = "0,PX5BF03CL,2,2790004600,6,PT53QG0754670080,10,PT53QG0754670081"
+
+
+class ScriptedLaserServer:
+    """TCP server 1 client: script(name) -> list các (delay_s, bytes) gửi lại sau mỗi lệnh"""
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+        self.script = lambda name: [(0, f"{name},0\r\n".encode("ascii"))]
+
+    def start(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            buffer = b""
+            try:
+                while True:
+                    data = conn.recv(4096)
+                    if not data:
+                        break
+                    buffer += data
+                    while b"\n" in buffer:
+                        line, buffer = buffer.split(b"\n", 1)
+                        name = line.split(b",", 1)[0].strip().decode("ascii")
+                        for delay, chunk in self.script(name):
+                            threading.Timer(delay, self._sendQuietly, (conn, chunk)).start()
+            except OSError:
+                pass
+            conn.close()
+
+    @staticmethod
+    def _sendQuietly(conn, chunk):
+        try:
+            conn.sendall(chunk)
+        except OSError:
+            pass
+
+    def stop(self):
+        self.server.close()
+
+
+class LegacyLaserWorker(LaserWorker):
+    """Bản sao sendRawCommand / readResponseTCP cũ: chunk đầu tiên kết thúc bằng newline là reply"""
+
+    def sendRawCommand(self, command, expect_keyword=None, timeout_ms=None):
+        self._socket.sendall(f"{command}\r\n".encode("ascii"))
+        deadline = time.monotonic() + (timeout_ms or self.timeout_ms) / 1000
+        data = b""
+        while time.monotonic() < deadline:
+            if not self._selector.select(deadline - time.monotonic()):
+                break
+            data += self._socket.recv(1024)
+            if data.endswith(b"\n"):
+                break
+        response = data.decode("ascii", errors="ignore").strip()
+        if expect_keyword and response and expect_keyword not in response:
+            raise RuntimeError(f"Unexpected response for '{command}': '{response}' (expect '{expect_keyword}')")
+        return response
+
+    def send_ga(self, script, timeout_ms=None):
+        return self.sendRawCommand(f"GA,{script}", expect_keyword="GA,0", timeout_ms=timeout_ms)
+
+    def send_c2(self, script, content, timeout_ms=None):
+        return self.sendRawCommand(f"C2,{script},{content}", expect_keyword="C2,0", timeout_ms=timeout_ms)
+
+    def send_nt(self, timeout_ms=None):
+        return self.sendRawCommand("NT", expect_keyword="NT,0", timeout_ms=timeout_ms)
+
+
+def _outcome(call):
+    try:
+        call()
+        return "OK"
+    except LaserReplyError:
+        return "REJECTED"
+    except (RuntimeError, TimeoutError) as exc:
+        return type(exc).__name__
+
+
+def lateReply(worker):
+    """NT timeout 50 ms, reply NT tới sau 80 ms (trong lúc chờ GA), rồi GA -> C2 bình thường"""
+    results = [_outcome(lambda: worker.send_nt(timeout_ms=50))]
+    results.append(_outcome(lambda: worker.send_ga("1", timeout_ms=500)))
+    results.append(_outcome(lambda: worker.send_c2("1", CONTENT, timeout_ms=500)))
+    return results
+
+
+def setContent(worker, content):
+    """Bản sao luồng LaserPresenter.setContent: lỗi kết nối / timeout => chờ 0.5 s rồi gửi lại 1 lần"""
+    try:
+        worker.send_c2("1", content, timeout_ms=500)
+        return True
+    except LaserReplyError:
+        return False
+    except (RuntimeError, TimeoutError, OSError):
+        try:
+            time.sleep(0.5)
+            worker.send_c2("1", content, timeout_ms=500)
+            return True
+        except (RuntimeError, TimeoutError, OSError):
+            return False
+
+
+def run():
+    quietLogger()
+    server = ScriptedLaserServer().start()
+    rows, outcomes = [], {}
+    try:
+        for label, worker_cls in (("legacy", LegacyLaserWorker), ("protocol", LaserWorker)):
+            worker = worker_cls(mode=LaserConnectMode.TCP, ip="127.0.0.1", port=server.port, timeout_ms=500)
+            worker.connect()
+
+            server.script = lambda name: (
+                [(0.08, b"NT,0\r\n")] if name == "NT" else
+                [(0.1, f"{name},0\r\n".encode("ascii"))] if name == "GA" else
+                [(0, f"{name},0\r\n".encode("ascii"))]
+            )
+            outcomes[f"{label} late reply"] = lateReply(worker)
+            time.sleep(0.2)  # để reply còn treo tới hết, không ảnh hưởng kịch bản sau
+
+            server.script = lambda name: [(0, b"C2,1,S001\r\n")] if name == "C2" else [(0, f"{name},0\r\n".encode())]
+            start = time.perf_counter()
+            ok = setContent(worker, CONTENT)
+            rows.append((f"{label}: C2 error code", summarize([(time.perf_counter() - start) * 1000.0])))
+            outcomes[f"{label} error code"] = "OK" if ok else "REJECTED"
+            worker.disconnect()
+    finally:
+        server.stop()
+    printTable("Time to give up on a C2 rejected by the controller", rows)
+    for name, result in outcomes.items():
+        print(f"{name:<28}{result}")
+    if outcomes["protocol late reply"] != ["TimeoutError", "OK", "OK"]:
+        raise AssertionError(f"late reply misattributed: {outcomes['protocol late reply']}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,114 @@
+"""
+Benchmark: latency GA / C2 / NT của LaserWorker qua TCP
+So sánh cách cũ (socket non-blocking, spin BlockingIOError + sleep 10 ms) với chờ bằng selector
+(thức dậy đúng lúc có byte, timeout = deadline còn lại).
+
+Laser giả lập: simulation_laser.LaserSimulator trên TCP localhost (port ngẫu nhiên), thời gian xử lý
+của simulator (GA 0.5 s, C2 1 s, NT 0.5 s) được nhân sim_scale để chạy nhanh và để phần chờ của
+client chiếm tỉ lệ đáng kể. Đo thêm CPU time của thread client trong lúc chờ response.
+Chạy: python -m benchmarks.laser_tcp_latency [số_chu_kỳ] [sim_scale]
+"""
+import sys
+import time
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from simulation_laser import LaserSimulator  # noqa: E402
+from utils.schema import LaserConnectMode  # noqa: E402
+from workers.laser_worker import LaserWorker  # noqa: E402
+
+CONTENT = "0,PX5BF03CL,2,2790004600,6,PT53QG0754670080,10,PT53QG0754670081"
+COMMANDS = (("GA", "GA,1", "GA,0"), ("C2", f"C2,1,{CONTENT}", "C2,0"), ("NT", "NT", "NT,0"))
+
+
+class PollingLaserWorker(LaserWorker):
+    """Bản sao sendRawCommand / sendTCPCommand / readResponseTCP cũ (spin + sleep 10 ms)"""
+
+    def sendRawCommand(self, command, expect_keyword=None, timeout_ms=None):
+        response = self.sendTCPCommand(f"{command}\r\n", timeout_ms or self.timeout_ms)
+        if expect_keyword and response and expect_keyword not in response:
+            raise RuntimeError(f"Unexpected response for '{command}': '{response}'")
+        return response
+
+    def sendTCPCommand(self, payload: str, timeout_ms: int) -> str:
+        data = payload.encode("ascii")
+        total_sent = 0
+        deadline = time.time() + (self.timeout_ms / 1000)
+        while total_sent < len(data):
+            try:
+                total_sent += self._socket.send(data[total_sent:])
+            except BlockingIOError:
+                if time.time() > deadline:
+                    raise TimeoutError("Timeout while sending data to laser")
+                time.sleep(0.01)
+        return self.readResponseTCP(timeout_ms)
+
+    def readResponseTCP(self, timeout_ms: int) -> str:
+        deadline = time.time() + (timeout_ms / 1000)
+        buffer = self._rx
+        buffer.clear()
+        while time.time() < deadline:
+            try:
+                received = buffer.readinto(self._socket.recv_into, 1024)
+                if received:
+                    if buffer.endswith(b"\n"):
+                        break
+                else:
+                    break
+            except BlockingIOError:
+                time.sleep(0.01)
+        if not buffer:
+            return ""
+        return str(buffer.take(), "ascii", errors="ignore").strip()
+
+
+def measure(worker_cls, port, cycles):
+    worker = worker_cls(mode=LaserConnectMode.TCP, ip="127.0.0.1", port=port, timeout_ms=5000)
+    worker.connect()
+    samples = {name: [] for name, _, _ in COMMANDS}
+    cpu = []
+    try:
+        for _ in range(cycles):
+            for name, command, expect in COMMANDS:
+                cpu_start = time.thread_time()
+                start = time.perf_counter()
+                response = worker.sendRawCommand(command, expect_keyword=expect)
+                samples[name].append((time.perf_counter() - start) * 1000.0)
+                cpu.append((time.thread_time() - cpu_start) * 1000.0)
+                if expect not in response:
+                    raise AssertionError(f"{name}: unexpected response {response!r}")
+    finally:
+        worker.disconnect()
+    return samples, cpu
+
+
+def run(cycles=10, scale=0.01):
+    quietLogger()
+    server = LaserSimulator(scale=scale)
+    server.attachTcp()
+    server.start()
+    try:
+        polling, polling_cpu = measure(PollingLaserWorker, server.port, cycles)
+        selector, selector_cpu = measure(LaserWorker, server.port, cycles)
+    finally:
+        server.stop()
+    rows = []
+    for name, _, _ in COMMANDS:
+        rows.append((f"polling {name}", summarize(polling[name])))
+        rows.append((f"selector {name}", summarize(selector[name])))
+    rows.append(("polling CPU / command", summarize(polling_cpu)))
+    rows.append(("selector CPU / command", summarize(selector_cpu)))
+    printTable(f"Laser TCP round-trip ({cycles} cycles, simulator delay x{scale})", rows)
+    polling_cycle = sum(sum(v) for v in polling.values()) / cycles
+    selector_cycle = sum(sum(v) for v in selector.values()) / cycles
+    print(f"Mean GA+C2+NT per panel: polling {polling_cycle:.1f} ms, selector {selector_cycle:.1f} ms "
+          f"(saved {polling_cycle - selector_cycle:.1f} ms)")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.01,
+    )
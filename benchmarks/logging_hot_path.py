@@ -0,0 +1,64 @@
+"""
+Benchmark: chi phí log.info() trên thread gọi (hot path serial I/O)
+So sánh handler đồng bộ (console màu + file) với QueueHandler -> QueueListener (policy drop / block).
+
+Mỗi "frame" log 6 dòng INFO liên tiếp (giống readData_SFIS), sau đó nghỉ 2ms như khi chờ frame kế tiếp.
+Console ghi vào os.devnull, file ghi vào thư mục tạm: chỉ đo phần thread gọi phải trả.
+Chạy: python -m benchmarks.logging_hot_path [số_frame]
+"""
+import logging
+import os
+import sys
+import time
+
+from benchmarks._common import printTable, setupEnvironment, summarize
+
+appdata = setupEnvironment()
+
+from utils.Logging import attachQueueListener, createHandlers  # noqa: E402
+
+LINES_PER_FRAME = 6
+FRAME_GAP_S = 0.002
+
+
+def _buildLogger(name, mode, devnull):
+    logger = logging.getLogger(f"bench.{name}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    console_handler, file_handler, _ = createHandlers(appdata, name)
+    console_handler.setStream(devnull)
+    listener = None
+    if mode == "sync":
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+    else:
+        listener = attachQueueListener(logger, (console_handler, file_handler), policy=mode)
+    return logger, listener, (console_handler, file_handler)
+
+
+def run(frames=2000):
+    rows = []
+    with open(os.devnull, "w") as devnull:
+        for label, mode in (("sync handlers", "sync"), ("queue (drop)", "drop"), ("queue (block)", "block")):
+            logger, listener, handlers = _buildLogger(mode, mode, devnull)
+            samples = []
+            for frame in range(frames):
+                start = time.perf_counter()
+                for i in range(LINES_PER_FRAME):
+                    logger.info(f"  Data (text): frame {frame} line {i} PT53QG0754670080")
+                samples.append((time.perf_counter() - start) * 1_000_000.0 / LINES_PER_FRAME)
+                time.sleep(FRAME_GAP_S)
+            dropped = 0
+            if listener is not None:
+                dropped = logger.handlers[0].dropped
+                listener.stop()
+            for handler in handlers:
+                handler.close()
+            rows.append((f"{label}" + (f" [{dropped} dropped]" if dropped else ""), summarize(samples)))
+
+    printTable(f"log.info() cost per call on caller thread ({frames} frames x {LINES_PER_FRAME} lines)",
+               rows, unit="µs / call")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,166 @@
+"""
+Benchmark multi-station: 1 process supervisor (main.py --headless + settings "stations") chạy N trạm song song
+- Mỗi trạm: SFIS / PLC giả lập trên pty pair riêng, laser giả lập TCP riêng (thời gian GA / C2 / NT nhân sim_scale)
+- scaling: N = 1, 2, 4 trạm, mỗi trạm chạy `panels` panel => panels/hour tổng và hiệu suất so với N x 1 trạm
+- isolation: 2 trạm, SFIS của LM1 không trả lời NEEDPSN (trạm treo chờ timeout) trong lúc LM2 chạy bình thường
+  => takt của LM2 không được chậm đi
+Trạng thái từng trạm đọc qua status port của process trạm (workers.status_server).
+Chạy: python -m benchmarks.multi_station [số_panel] [sim_scale]
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks._common import ROOT_DIR, LineDriver, printTable, readStatus, setupEnvironment, summarize
+
+appdata = setupEnvironment()
+
+from simulation_device import FaultProfile, Latency  # noqa: E402
+from simulation_laser import LaserSimulator  # noqa: E402
+from simulation_plc import PlcSimulator  # noqa: E402
+from simulation_sfis import SfisSimulator  # noqa: E402
+
+STATION_COUNTS = (1, 2, 4)
+READY_TIMEOUT_S = 30.0
+CYCLE_TIMEOUT_S = 30.0
+MIN_EFFICIENCY = 0.8  # panels/hour của N trạm >= 80% của N x 1 trạm
+STALLED_SFIS = FaultProfile(latency={"NEEDPSN": Latency(ms=60000.0)})  # lâu hơn timeout đọc SFIS (10 s)
+
+
+def _freePort():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SimulatedStation:
+    """SFIS / PLC / laser giả lập của 1 trạm"""
+
+    def __init__(self, name, scale, sfis_profile=None):
+        self.name = name
+        self.sfis = SfisSimulator(profile=sfis_profile)
+        self.plc = PlcSimulator()
+        self.laser = LaserSimulator(scale=scale)
+        self.sfis.attachPty()
+        self.plc.attachPty()
+        self.laser.attachTcp()
+        self.status_port = _freePort()
+        for simulator in (self.sfis, self.plc, self.laser):
+            simulator.start()
+
+    def settingsEntry(self):
+        return {
+            "name": self.name,
+            "connection": {
+                "sfc": {"com_port": self.sfis.port_name},
+                "plc": {"com_port": self.plc.port_name},
+                "laser": {"use_com": False, "ip": "127.0.0.1", "port": self.laser.port},
+            },
+            "advanced": {"status_port": self.status_port},
+        }
+
+    def status(self):
+        try:
+            return readStatus(self.status_port)
+        except (OSError, ValueError):
+            return None
+
+    def stop(self):
+        for simulator in (self.sfis, self.plc, self.laser):
+            simulator.stop()
+
+
+def _writeStations(stations):
+    path = os.path.join(appdata, "Regilaser", "settings.json")
+    with open(path, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    settings["stations"] = [station.settingsEntry() for station in stations]
+    settings["advanced"]["status_port"] = _freePort()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+
+
+def _waitReady(stations):
+    deadline = time.monotonic() + READY_TIMEOUT_S
+    pending = list(stations)
+    while pending and time.monotonic() < deadline:
+        pending = [s for s in pending if not ((st := s.status()) and st["ready"] and all(st["devices"].values()))]
+        time.sleep(0.2)
+    if pending:
+        raise RuntimeError(f"stations not ready: {[(s.name, s.status()) for s in pending]}")
+
+
+def runLine(stations, panels, drive):
+    """
+    Chạy supervisor với các trạm đã cho. drive: danh sách trạm được line cấp panel liên tục,
+    các trạm còn lại chỉ nhận 1 Ready. Trả về {tên trạm: LineDriver}
+    """
+    _writeStations(stations)
+    env = dict(os.environ, APPDATA=appdata)
+    supervisor = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, "main.py"), "--headless"], cwd=ROOT_DIR,
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    drivers = {}
+    try:
+        _waitReady(stations)
+        for station in stations:
+            drivers[station.name] = LineDriver(station.plc, panels if station in drive else 1)
+        for station in stations:
+            drivers[station.name].start()
+        deadline = time.monotonic() + CYCLE_TIMEOUT_S * panels
+        for station in drive:
+            drivers[station.name].done.wait(max(0.0, deadline - time.monotonic()))
+    finally:
+        supervisor.terminate()
+        supervisor.wait(30)
+        for station in stations:
+            station.stop()
+    for station in drive:
+        driver = drivers[station.name]
+        passed = [result for result, _ in driver.results if result == "OK"]
+        if len(passed) < panels:
+            raise AssertionError(f"{station.name}: {len(passed)}/{panels} panels OK ({driver.results})")
+    return drivers
+
+
+def run(panels=10, scale=0.1):
+    rows, throughput = [], {}
+    for count in STATION_COUNTS:
+        stations = [SimulatedStation(f"LM{i + 1}", scale) for i in range(count)]
+        drivers = runLine(stations, panels, stations)
+        started = min(driver.started_at for driver in drivers.values())
+        finished = max(driver.finished_at for driver in drivers.values())
+        throughput[count] = count * panels / (finished - started) * 3600.0
+        rows.append((f"{count} station(s): Ready -> OK",
+                     summarize([ms for driver in drivers.values() for _, ms in driver.results])))
+    printTable(f"Multi-station, {panels} panels per station (laser delay x{scale})", rows)
+    for count, value in throughput.items():
+        efficiency = value / (count * throughput[1])
+        print(f"{count} station(s): {value:8.0f} panels/hour  (x{value / throughput[1]:.2f}, efficiency {efficiency:.0%})")
+
+    # Isolation: SFIS của LM1 treo, LM2 vẫn phải giữ takt như khi chạy 1 mình
+    stalled = SimulatedStation("LM1", scale, sfis_profile=STALLED_SFIS)
+    healthy = SimulatedStation("LM2", scale)
+    drivers = runLine([stalled, healthy], panels, [healthy])
+    isolated = [ms for _, ms in drivers["LM2"].results]
+    baseline = rows[0][1]
+    printTable("Isolation: LM1 SFIS stalled", [("1 station alone", baseline), ("LM2 next to stalled LM1", summarize(isolated))])
+
+    problems = []
+    for count, value in throughput.items():
+        if value < MIN_EFFICIENCY * count * throughput[1]:
+            problems.append(f"{count} stations: {value:.0f} panels/hour < {MIN_EFFICIENCY:.0%} of linear")
+    if summarize(isolated)["p50"] > 1.25 * baseline["p50"]:
+        problems.append(f"LM2 slowed down by stalled LM1: p50 {summarize(isolated)['p50']:.0f} ms "
+                        f"vs {baseline['p50']:.0f} ms alone")
+    if problems:
+        raise AssertionError("; ".join(problems))
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1,
+    )
@@ -0,0 +1,124 @@
+"""
+Benchmark: ProjectCatalogue (model.project_catalogue) so với cách quét list cũ của TopTopPresenter / ProjectPresenter
+- model.json giả lập N entry (mặc định 50k) ghi vào thư mục tạm
+- Load: json.load + dựng project_names bằng `not in` list (O(n²)) so với catalogue.loadStore
+- Lookup getProjectInfo, tìm theo PSN_PRE, và sửa / thêm / xóa 1 project (cũ: dựng lại cả danh sách)
+
+Bản cũ O(n²) chỉ chạy 1 lần (50k entry mất vài chục giây).
+Chạy: python -m benchmarks.project_catalogue [số_entry]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize, timed
+
+appdata = setupEnvironment()
+
+from model.project_catalogue import ProjectCatalogue  # noqa: E402
+from workers.project_store import ProjectStore  # noqa: E402
+
+LOOKUPS = 2000
+
+
+# ------------------------------------------------------------------
+# Bản sao thuật toán cũ (chỉ dùng để so sánh)
+# ------------------------------------------------------------------
+def legacyLoad(path):
+    with open(path, "r", encoding="utf-8") as f:
+        project_data = json.load(f)
+    project_names = []
+    for item in project_data:
+        project_name = item.get("Project_Name", "")
+        if project_name and project_name not in project_names:
+            project_names.append(project_name)
+    return project_data, project_names
+
+
+def legacyGetProjectInfo(project_data, project_name):
+    for item in project_data:
+        if item.get("Project_Name") == project_name:
+            return item
+    return None
+
+
+def legacyFindByPsnPre(project_data, psn_pre):
+    return [item for item in project_data if item.get("PSN_PRE") == psn_pre]
+
+
+# ------------------------------------------------------------------
+# Dữ liệu
+# ------------------------------------------------------------------
+def _entry(rng, index):
+    return {
+        "Project_Name": f"95.{index:06d}T{rng.randint(0, 9):02d}",
+        "LM_Script_Name": rng.randint(1, 400),
+        "Panel_Num": rng.choice((1, 5, 10, 12, 24)),
+        "PSN_PRE": f"P{rng.randint(0, 2000):04d}R",
+        "SFIS_format": rng.choice((1, 2)),
+        "LM_mode": 1,
+    }
+
+
+def _writeModel(count, rng):
+    path = os.path.join(appdata, "Regilaser", "model.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([_entry(rng, i) for i in range(count)], f, indent=2, ensure_ascii=False)
+    return path
+
+
+def _perCall(func, items):
+    """Latency (µs) từng lần gọi"""
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        samples.append((time.perf_counter() - start) * 1_000_000.0)
+    return summarize(samples)
+
+
+def run(count=50000):
+    quietLogger()
+    rng = random.Random(20240601)
+    path = _writeModel(count, rng)
+    print(f"model.json: {count} entries, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+    (project_data, project_names), legacy_ms = timed(legacyLoad, path)
+    catalogue = ProjectCatalogue()
+    store = ProjectStore(path)
+    load_samples = [timed(catalogue.loadStore, store, True)[1] for _ in range(5)]
+    if catalogue.names() != project_names:
+        raise AssertionError("catalogue names differ from legacy project_names")
+    printTable(f"Load model.json ({count} entries)", [
+        ("legacy list + not in", summarize([legacy_ms])),
+        ("ProjectCatalogue.loadStore", summarize(load_samples)),
+        ("loadStore (unchanged)", summarize([timed(catalogue.loadStore, store)[1] for _ in range(5)])),
+    ])
+
+    names = [rng.choice(project_names) for _ in range(LOOKUPS)]
+    prefixes = [rng.choice(project_data)["PSN_PRE"] for _ in range(LOOKUPS // 10)]
+    for name in names[:50]:
+        if catalogue.get(name) != legacyGetProjectInfo(project_data, name):
+            raise AssertionError(f"lookup mismatch for {name}")
+    printTable(f"Lookup ({LOOKUPS} names, {len(prefixes)} PSN_PRE)", [
+        ("legacy getProjectInfo", _perCall(lambda n: legacyGetProjectInfo(project_data, n), names)),
+        ("catalogue.get", _perCall(catalogue.get, names)),
+        ("legacy scan by PSN_PRE", _perCall(lambda p: legacyFindByPsnPre(project_data, p), prefixes)),
+        ("catalogue.findByPsnPre", _perCall(catalogue.findByPsnPre, prefixes)),
+    ], unit="µs / call")
+
+    # Cũ: mỗi lần sửa / thêm / xóa -> dataLoaded(list) -> dựng lại project_names O(n²) (= chi phí load ở trên)
+    edits = [dict(catalogue.get(name), PSN_PRE="PXXXXR") for name in names[:200]]
+    added = [_entry(rng, count + i) for i in range(200)]
+    printTable("Incremental update (in memory, file write excluded)", [
+        ("catalogue.update", _perCall(catalogue.update, edits)),
+        ("catalogue.add", _perCall(catalogue.add, added)),
+        ("catalogue.remove", _perCall(catalogue.remove, [entry["Project_Name"] for entry in added])),
+    ], unit="µs / call")
+    print(f"Legacy rebuild after each edit: ~{legacy_ms:.0f} ms (full reload, see load table)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,105 @@
+"""
+Benchmark: chi phí 1 lần sửa project trên model.json lớn
+So sánh cách cũ của ProjectWorker.updateProject (đọc cả file, sửa 1 entry, ghi lại cả file indent=2,
+presenter load lại lần nữa) với ProjectStore (append 1 dòng journal + fsync, compact nền).
+
+Sau khi đo: kiểm tra store mở lại từ đĩa cho đúng dữ liệu, kể cả khi dòng journal cuối bị cắt (crash lúc ghi).
+Chạy: python -m benchmarks.project_store [số_entry]
+"""
+import json
+import os
+import random
+import sys
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize, timed
+
+appdata = setupEnvironment()
+
+from workers.project_store import ProjectStore  # noqa: E402
+
+LEGACY_EDITS = 5
+STORE_EDITS = 300
+
+
+def legacyUpdateProject(path, project_data):
+    """Bản sao ProjectWorker.updateProject cũ + lần load lại của presenter"""
+    with open(path, "r", encoding="utf-8") as f:
+        model_data = json.load(f)
+    for i, item in enumerate(model_data):
+        if item.get("Project_Name") == project_data["Project_Name"]:
+            model_data[i] = project_data
+            break
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model_data, f, indent=2, ensure_ascii=False)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _entries(count, rng):
+    return [{
+        "Project_Name": f"95.{i:06d}T00",
+        "LM_Script_Name": rng.randint(1, 400),
+        "Panel_Num": rng.choice((1, 5, 10, 12, 24)),
+        "PSN_PRE": f"P{rng.randint(0, 2000):04d}R",
+        "SFIS_format": 1,
+        "LM_mode": 1,
+    } for i in range(count)]
+
+
+def run(count=50000):
+    quietLogger()
+    rng = random.Random(20240601)
+    entries = _entries(count, rng)
+    path = os.path.join(appdata, "Regilaser", "model.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+
+    def edit(i):
+        return dict(entries[rng.randrange(count)], Panel_Num=i % 24 + 1)
+
+    legacy = [timed(legacyUpdateProject, path, edit(i))[1] for i in range(LEGACY_EDITS)]
+
+    store = ProjectStore(path, compact_every=STORE_EDITS * 2)  # compact đo riêng bên dưới
+    store.read()
+    expected = {entry["Project_Name"]: entry for entry in store.read()}
+    upserts, deletes = [], []
+    for i in range(STORE_EDITS):
+        entry = edit(i)
+        upserts.append(timed(store.upsert, entry)[1])
+        expected[entry["Project_Name"]] = entry
+        if i % 10 == 0:
+            name = next(iter(expected))
+            deletes.append(timed(store.delete, name)[1])
+            del expected[name]
+    _, compact_ms = timed(store.compact)
+    store.close()
+
+    printTable(f"Edit one project in a {count}-entry model.json", [
+        ("legacy rewrite + reload", summarize(legacy)),
+        ("ProjectStore.upsert", summarize(upserts)),
+        ("ProjectStore.delete", summarize(deletes)),
+        ("compact (background)", summarize([compact_ms])),
+    ])
+
+    # Mở lại từ đĩa: model.json đã compact + journal mới có 1 dòng bị cắt giữa chừng
+    store = ProjectStore(path)
+    entry = edit(0)
+    store.upsert(entry)
+    expected[entry["Project_Name"]] = entry
+    store.close()
+    with open(store.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "entry": {"Project_Na')
+    store = ProjectStore(path)
+    store.read()
+    name = next(iter(expected))
+    store.delete(name)  # bản ghi sau dòng bị cắt vẫn phải đọc lại được
+    del expected[name]
+    store.close()
+    reopened = {item["Project_Name"]: item for item in ProjectStore(path).read()}
+    if reopened != expected or list(reopened) != list(expected):
+        raise AssertionError("store contents differ after reopen")
+    print(f"Reopen check passed: {len(reopened)} entries, torn journal line ignored")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,148 @@
+"""
+Benchmark: tự động kết nối lại khi thiết bị vắng mặt lâu (VD rút cáp laser)
+So sánh cách cũ (QTimer cố định 5 s, mở kết nối trong GUI thread) với ReconnectScheduler
+(exponential backoff có jitter 1 s -> 60 s, thử lại trong thread pool, hint => thử lại ngay).
+
+Thời gian được thu nhỏ SCALE lần để chạy nhanh (5 s -> 250 ms, 60 s -> 3 s).
+Đo: số lần mở kết nối trong thời gian vắng, thời gian GUI thread bị chặn, độ trễ kết nối lại
+khi thiết bị quay lại và độ trễ kết nối lại sau hint (link rớt trong lúc đang chạy).
+Chạy: python -m benchmarks.reconnect_backoff [giây_vắng_mặt]
+"""
+import sys
+import time
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from PySide6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+import workers.reconnect_scheduler as scheduler_module  # noqa: E402
+from workers.reconnect_scheduler import ReconnectScheduler  # noqa: E402
+
+SCALE = 20
+LEGACY_INTERVAL_MS = 5000 // SCALE
+OPEN_COST_S = 0.01  # mở port không tồn tại / connect bị từ chối
+
+
+class FakeDevice:
+    def __init__(self):
+        self.present = False
+        self.connected = False
+        self.opens = 0
+        self.blocked_s = 0.0
+
+    def isAlive(self):
+        return self.connected
+
+    def open(self):
+        self.opens += 1
+        time.sleep(OPEN_COST_S)
+        if not self.present:
+            raise OSError("device not found")
+        self.connected = True
+        return True
+
+
+def _wait(app, seconds):
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+
+
+def _until(app, predicate, timeout_s):
+    """Chạy event loop tới khi predicate() đúng, trả về thời gian chờ (ms)"""
+    start = time.perf_counter()
+    poll = QTimer()
+    poll.setInterval(5)
+    poll.timeout.connect(lambda: predicate() and app.quit())
+    poll.start()
+    deadline = QTimer()  # không dùng singleShot: deadline còn treo sẽ quit nhầm vòng đo sau
+    deadline.setSingleShot(True)
+    deadline.timeout.connect(app.quit)
+    deadline.start(int(timeout_s * 1000))
+    app.exec()
+    poll.stop()
+    deadline.stop()
+    if not predicate():
+        raise AssertionError("device did not reconnect in time")
+    return (time.perf_counter() - start) * 1000.0
+
+
+def runLegacy(app, absent_s):
+    """Bản sao _checkAndReconnect cũ: timer cố định, connect chặn GUI thread"""
+    device = FakeDevice()
+
+    def check():
+        if device.isAlive():
+            return
+        start = time.perf_counter()
+        try:
+            device.open()
+        except OSError:
+            pass
+        device.blocked_s += time.perf_counter() - start
+
+    timer = QTimer()
+    timer.timeout.connect(check)
+    timer.start(LEGACY_INTERVAL_MS)
+    _wait(app, absent_s)
+    opens = device.opens
+    device.present = True
+    back_ms = _until(app, device.isAlive, absent_s)
+    device.connected = False  # link rớt, không có hint
+    drop_ms = _until(app, device.isAlive, absent_s)
+    timer.stop()
+    return opens, device.blocked_s * 1000.0, back_ms, drop_ms
+
+
+def runScheduler(app, absent_s):
+    scheduler_module.TICK_MS = 500 // SCALE
+    scheduler = ReconnectScheduler()
+    scheduler.base_s = 1.0 / SCALE
+    scheduler.max_s = 60.0 / SCALE
+    device = FakeDevice()
+    scheduler.register("Device", device.isAlive, device.open, lambda connected: None)
+    blocked = []
+
+    def timedEnable():
+        start = time.perf_counter()
+        scheduler.enable("Device")
+        blocked.append(time.perf_counter() - start)
+
+    QTimer.singleShot(0, timedEnable)
+    _wait(app, absent_s)
+    opens = device.opens
+    device.present = True
+    back_ms = _until(app, device.isAlive, absent_s)
+    device.connected = False
+    scheduler.hint("Device")
+    drop_ms = _until(app, device.isAlive, absent_s)
+    metrics = scheduler.metrics()["Device"]
+    scheduler.stop()
+    return opens, sum(blocked) * 1000.0, back_ms, drop_ms, metrics
+
+
+def run(absent_s=6.0):
+    quietLogger()
+    app = QCoreApplication.instance() or QCoreApplication([])
+    legacy_opens, legacy_blocked, legacy_back, legacy_drop = runLegacy(app, absent_s)
+    opens, blocked, back, drop, metrics = runScheduler(app, absent_s)
+    scaled = absent_s * SCALE
+    printTable(f"Device absent {scaled:.0f} s (scaled x{SCALE})", [
+        ("fixed 5 s: GUI blocked", summarize([legacy_blocked])),
+        ("fixed 5 s: reconnect after", summarize([legacy_back])),
+        ("fixed 5 s: link drop", summarize([legacy_drop])),
+        ("backoff: GUI blocked", summarize([blocked])),
+        ("backoff: reconnect after", summarize([back])),
+        ("backoff: link drop + hint", summarize([drop])),
+    ])
+    print(f"Open attempts while absent: fixed 5 s = {legacy_opens}, backoff = {opens}")
+    print(f"Scheduler metrics: {metrics}")
+    if metrics["reconnects"] != 2 or metrics["disconnects"] != 1:
+        raise AssertionError(f"unexpected scheduler metrics: {metrics}")
+    if opens >= legacy_opens:
+        raise AssertionError("backoff did not reduce open attempts")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 6.0)
@@ -0,0 +1,107 @@
+"""
+Benchmark: đọc setting trên hot path marking (mỗi panel)
+So sánh các lần SettingsManager.get theo key của MarkingWorker / SFISPresenter trước đây
+(split key + duyệt dict mỗi lần gọi) với 1 lần snapshot() rồi đọc attribute của SettingsSnapshot.
+
+Sau khi đo: set() + save_settings() phải cho snapshot mới đúng giá trị, snapshot cũ không đổi.
+Chạy: python -m benchmarks.settings_snapshot [số_panel]
+"""
+import sys
+import time
+
+from benchmarks._common import printTable, setupEnvironment, summarize
+
+appdata = setupEnvironment()
+
+from utils.setting import SettingsManager  # noqa: E402
+
+
+def legacyGet(settings, key, default=None):
+    """Bản sao SettingsManager.get cũ"""
+    keys = key.split('.')
+    value = settings
+    for k in keys:
+        if isinstance(value, dict):
+            value = value.get(k)
+        else:
+            return default
+    return value if value is not None else default
+
+
+def legacyPanel(manager):
+    """Các get() của 1 panel: _panelKey (x2), _lookaheadEnabled, startMarking, getDataFromSFIS(_MODE1)"""
+    tree = manager._settings
+    for _ in range(2):
+        legacyGet(tree, "general.mo", "")
+        legacyGet(tree, "project.panel_num", "")
+        legacyGet(tree, "project.sfis_format", 1)
+    legacyGet(tree, "general.sfis_lookahead", False)
+    legacyGet(tree, "general.post_result_sfc", True)
+    legacyGet(tree, "project.script", None)
+    legacyGet(tree, "project.sfis_format", 1)
+    legacyGet(tree, "general.mo", '')
+    legacyGet(tree, "project.panel_num", '')
+
+
+def getPanel(manager):
+    """Cùng các lần đọc qua SettingsManager.get (lock + key path đã cache)"""
+    for _ in range(2):
+        manager.get("general.mo", "")
+        manager.get("project.panel_num", "")
+        manager.get("project.sfis_format", 1)
+    manager.get("general.sfis_lookahead", False)
+    manager.get("general.post_result_sfc", True)
+    manager.get("project.script", None)
+    manager.get("project.sfis_format", 1)
+    manager.get("general.mo", '')
+    manager.get("project.panel_num", '')
+
+
+def snapshotPanel(manager):
+    """Cùng các giá trị qua snapshot (mỗi hàm gọi snapshot() 1 lần)"""
+    for _ in range(2):
+        s = manager.snapshot()
+        s.mo, s.panel_num, s.sfis_format
+    s = manager.snapshot()
+    s.sfis_lookahead, s.sfis_format
+    s = manager.snapshot()
+    s.post_result_sfc, s.script
+    s = manager.snapshot()
+    s.sfis_format
+    s = manager.snapshot()
+    s.mo, s.panel_num
+
+
+def _perPanel(func, manager, panels):
+    samples = []
+    for _ in range(panels):
+        start = time.perf_counter()
+        func(manager)
+        samples.append((time.perf_counter() - start) * 1_000_000.0)
+    return summarize(samples)
+
+
+def run(panels=20000):
+    manager = SettingsManager()
+    manager.write_behind = False
+    printTable(f"Settings reads per panel ({panels} panels)", [
+        ("legacy split + walk", _perPanel(legacyPanel, manager, panels)),
+        ("SettingsManager.get", _perPanel(getPanel, manager, panels)),
+        ("snapshot() attributes", _perPanel(snapshotPanel, manager, panels)),
+    ], unit="µs / panel")
+
+    before = manager.snapshot()
+    received = []
+    manager.settingsChanged.connect(received.append)
+    manager.update({"general.mo": "MO-BENCH", "project.panel_num": 24})
+    after = manager.snapshot()
+    if received != [after] or after.mo != "MO-BENCH" or after.panel_num != 24 or before.mo == "MO-BENCH":
+        raise AssertionError("snapshot not rebuilt correctly after update")
+    manager.set("general.op_num", "OP-BENCH")
+    if len(received) != 2 or received[-1].op_num != "OP-BENCH":
+        raise AssertionError("settingsChanged not emitted after set")
+    print("Snapshot check passed: rebuilt once per update / set, previous snapshot unchanged")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,89 @@
+"""
+Benchmark: chi phí lưu settings khi đổi project (TopTopPresenter.change_model: update() 6 key)
+So sánh cách cũ (6 lần set + json.dump cả cây settings ngay trong thread gọi) với SettingsManager write-behind
+(update chỉ đánh dấu dirty, thread nền gộp các lần ghi trong cửa sổ debounce, ghi tmp + os.replace).
+
+Sau khi đo: flush() rồi đọc lại settings.json để kiểm tra nội dung và số lần ghi thật.
+Chạy: python -m benchmarks.settings_write [số_lần_đổi_project]
+"""
+import json
+import sys
+import time
+
+from benchmarks._common import printTable, setupEnvironment, summarize, timed
+
+appdata = setupEnvironment()
+
+from utils.setting import SettingsManager  # noqa: E402
+
+
+class CountingSettingsManager(SettingsManager):
+    """Đếm số lần ghi file thật"""
+    writes = 0
+
+    def _writeAtomic(self, text):
+        CountingSettingsManager.writes += 1
+        super()._writeAtomic(text)
+
+
+def legacySave(manager):
+    """Bản sao save_settings cũ: ghi thẳng cả cây settings, không tmp / fsync"""
+    with open(manager.config_path, "w", encoding="utf-8") as f:
+        json.dump(manager._settings, f, indent=2, ensure_ascii=False)
+    return True
+
+
+def projectValues(index):
+    return {
+        "project.current_project": f"95.{index:06d}T00",
+        "project.psn_pre": f"P{index % 2000:04d}R",
+        "project.script": index % 400,
+        "project.panel_num": index % 24 + 1,
+        "project.sfis_format": 1,
+        "project.lm_mode": 1,
+    }
+
+
+def legacyChangeModel(manager, index):
+    """Bản sao change_model cũ: 6 lần set (không phát settingsChanged) rồi legacySave"""
+    with manager._lock:
+        for key, value in projectValues(index).items():
+            manager._assign(key, value)
+    return legacySave(manager)
+
+
+def run(changes=50):
+    manager = CountingSettingsManager()
+    manager.write_behind = False
+    legacy = [timed(legacyChangeModel, manager, i)[1] for i in range(changes)]
+    sync = [timed(manager.update, projectValues(i))[1] for i in range(changes)]
+
+    manager.write_behind = True
+    CountingSettingsManager.writes = 0
+    start = time.perf_counter()
+    behind = [timed(manager.update, projectValues(i))[1] for i in range(changes)]
+    burst_ms = (time.perf_counter() - start) * 1000.0
+    time.sleep(manager.debounce_s * 2)  # để thread nền ghi xong
+    background_writes = CountingSettingsManager.writes
+
+    manager.set("project.current_project", "final")
+    _, flush_ms = timed(manager.flush)
+
+    printTable(f"change_model settings save ({changes} changes)", [
+        ("legacy json.dump", summarize(legacy)),
+        ("atomic write (sync)", summarize(sync)),
+        ("write-behind (caller)", summarize(behind)),
+        ("flush() on shutdown", summarize([flush_ms])),
+    ])
+    print(f"Write-behind burst: {burst_ms:.1f} ms for {changes} changes -> "
+          f"{background_writes} background write(s), debounce {manager.debounce_s * 1000:.0f} ms")
+
+    with open(manager.config_path, "r", encoding="utf-8") as f:
+        on_disk = json.load(f)
+    if on_disk != manager.get_settings() or on_disk["project"]["current_project"] != "final":
+        raise AssertionError("settings.json differs from in-memory settings after flush")
+    print("Flush check passed: settings.json matches in-memory settings")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,150 @@
+"""
+Benchmark: parse / tạo frame SFIS bằng codec layout (model.sfis_codec) so với cách cắt chuỗi cũ
+- Kiểm tra trước: kết quả codec phải giống hệt bản sao các hàm cũ (byte-exact)
+- Sau đó đo thời gian parse N frame PSN response và tạo N frame NEEDPSN
+Phần parse đo codecParse (đúng các bước của SFISModel.parseResponsePsn, không emit signal Qt)
+để 2 bên chỉ khác nhau ở cách tách field.
+
+Chạy: python -m benchmarks.sfis_codec [số_frame] [số_psn]
+"""
+import random
+import string
+import sys
+import time
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from model.sfis_codec import needPsnLayout, psnResponseLayout  # noqa: E402
+from model.sfis_model import SFISModel  # noqa: E402
+
+BATCH = 100  # số frame mỗi mẫu đo
+
+
+# ------------------------------------------------------------------
+# Bản sao thuật toán cũ (chỉ dùng để so sánh, bỏ phần log)
+# ------------------------------------------------------------------
+def legacyParseResponsePsn(response, psn_count):
+    expected_length = 20 + 20 + (20 * psn_count) + 4
+    if len(response) < expected_length:
+        return None
+    pos = 0
+    mo = response[pos:pos + 20].strip()
+    pos += 20
+    panel_no = response[pos:pos + 20].strip()
+    pos += 20
+    psn_list = []
+    for _ in range(psn_count):
+        psn_list.append(response[pos:pos + 20].strip())
+        pos += 20
+    pass_keyword = response[pos:pos + 4]
+    if pass_keyword != "PASS":
+        return None
+    return mo, panel_no, psn_list, pass_keyword
+
+
+def codecParse(response, psn_count):
+    """Các bước parse của SFISModel.parseResponsePsn (bỏ log / signal / current_data)"""
+    layout = psnResponseLayout(psn_count)
+    if len(response) < layout.size:
+        return None
+    fields = layout.decode(response)
+    if fields["keyword"] != "PASS":
+        return None
+    return fields["mo"], fields["panel_no"], fields["psn_list"], fields["keyword"]
+
+
+def legacyNeedPSN(mo, panel_num):
+    return f"{str(mo).ljust(20)[:20]}{''.ljust(20)}NEEDPSN{panel_num}\r\n"
+
+
+def legacyBOMVER(mo, pcb_product_name):
+    return f"{str(mo).ljust(15)[:15]}{str(pcb_product_name).ljust(20)[:20]}NEEDBOMVER\r\n"
+
+
+def legacyBOMVERNeedSN(mo, pcb_number, psn_count):
+    return f"{str(mo).ljust(15)[:15]}{str(pcb_number).ljust(50)[:50]}NEEDSN{psn_count}\r\n"
+
+
+# ------------------------------------------------------------------
+# Dữ liệu
+# ------------------------------------------------------------------
+def _text(rng, max_len):
+    alphabet = string.ascii_uppercase + string.digits + " -_"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len)))
+
+
+def _responseFrame(rng, psn_count):
+    fields = [_text(rng, 20).ljust(20), _text(rng, 20).ljust(20)]
+    fields += [_text(rng, 20).ljust(20) for _ in range(psn_count)]
+    keyword = "PASS" if rng.random() < 0.95 else rng.choice(("FAIL", "PAS ", ""))
+    return "".join(fields) + keyword + rng.choice(("", "\r\n", "\r\nXX"))
+
+
+def verify(model, rng, frames, psn_count):
+    """So sánh từng frame / từng request với hàm cũ, raise nếu khác nhau"""
+    for frame in frames:
+        legacy = legacyParseResponsePsn(frame, psn_count)
+        current = codecParse(frame, psn_count)
+        if current != legacy:
+            raise AssertionError(f"parseResponsePsn mismatch for {frame!r}: {current!r} != {legacy!r}")
+    # Frame thiếu byte
+    short = frames[0][:psn_count * 20]
+    if codecParse(short, psn_count) is not None or legacyParseResponsePsn(short, psn_count) is not None:
+        raise AssertionError("short frame must be rejected")
+
+    for _ in range(len(frames)):
+        mo, name, pcb = _text(rng, 30), _text(rng, 30), _text(rng, 60)
+        panel_num = rng.choice((1, 5, 24, ""))
+        pairs = (
+            (model.createFormatNeedPSN(mo, panel_num), legacyNeedPSN(mo, panel_num)),
+            (model.createFormatBOMVER(mo, name), legacyBOMVER(mo, name)),
+            (model.createFormatBOMVERNeedSN(mo, pcb), legacyBOMVERNeedSN(mo, pcb, model.PSN_COUNT)),
+        )
+        for current, legacy in pairs:
+            if current.encode("ascii") != legacy.encode("ascii"):
+                raise AssertionError(f"encode mismatch: {current!r} != {legacy!r}")
+
+
+def _measure(func, items):
+    samples = []
+    for start in range(0, len(items), BATCH):
+        batch = items[start:start + BATCH]
+        begin = time.perf_counter()
+        for item in batch:
+            func(item)
+        samples.append((time.perf_counter() - begin) * 1_000_000.0 / len(batch))
+    return summarize(samples)
+
+
+def run(count=10000, psn_count=24):
+    quietLogger()
+    rng = random.Random(20240601)
+    model = SFISModel()
+    model.PSN_COUNT = psn_count
+    frames = [_responseFrame(rng, psn_count) for _ in range(count)]
+
+    verify(model, rng, frames, psn_count)
+    print(f"Byte-exact check passed: {count} response frames, {count * 3} request frames")
+
+    frames_bytes = [frame.encode("ascii") for frame in frames]
+    printTable(f"Parse PSN response ({count} frames, {psn_count} PSN)", [
+        ("legacy slicing (str)", _measure(lambda f: legacyParseResponsePsn(f, psn_count), frames)),
+        ("codec (str)", _measure(lambda f: codecParse(f, psn_count), frames)),
+        ("codec (bytes)", _measure(lambda f: codecParse(f, psn_count), frames_bytes)),
+    ], unit="µs / frame")
+
+    requests = [(_text(rng, 20), psn_count) for _ in range(count)]
+    printTable(f"Create NEEDPSN request ({count} frames)", [
+        ("legacy ljust", _measure(lambda r: legacyNeedPSN(*r), requests)),
+        ("codec format", _measure(lambda r: needPsnLayout(f"NEEDPSN{r[1]}").format(mo=r[0]), requests)),
+        ("model.createFormatNeedPSN", _measure(lambda r: model.createFormatNeedPSN(*r), requests)),
+    ], unit="µs / frame")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 24,
+    )
@@ -0,0 +1,173 @@
+"""
+Benchmark SFIS outbox (general.sfis_outbox): END gửi đồng bộ trong cycle so với ghi vào outbox rồi gửi nền
+- slow_end: SFIS trả lời END chậm (SLOW_END_MS), line cần TRANSFER_MS để đưa panel kế tiếp vào
+  => đồng bộ: Ready -> OK gồm cả thời gian chờ END; outbox: END chạy song song lúc line chuyển panel
+- outage: SFIS không trả lời END của panel đầu tiên (timeout đọc 10 s)
+  => đồng bộ: panel đó NG dù đã mark đúng; outbox: mọi panel OK, END được gửi lại và outbox rỗng khi kết thúc
+- restart: outbox có message chưa gửi được lúc tắt => lần chạy sau gửi lại đủ, đúng thứ tự
+Mỗi lần chạy trạm là 1 process con (StationPresenter headless + SFIS / PLC / laser giả lập như end_to_end).
+Chạy: python -m benchmarks.sfis_outbox [số_panel] [sim_scale]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks._common import ROOT_DIR, printTable, summarize
+
+SLOW_END_MS = 1500.0
+TRANSFER_MS = 2000.0
+CONNECT_TIMEOUT_S = 15.0
+CYCLE_TIMEOUT_S = 30.0
+
+
+def _runStation(outbox, panels, scale, sfis_profile=None, dropped_ends=0):
+    """Chạy trạm headless trong process này, trả về dict kết quả (gọi trong process con)"""
+    from benchmarks import end_to_end
+    from benchmarks._common import LineDriver, quietLogger
+    from PySide6.QtCore import QCoreApplication
+    from presenter.station_presenter import StationPresenter
+    from simulation_laser import LaserSimulator
+    from simulation_plc import PlcSimulator
+    from simulation_sfis import SfisSimulator
+    from utils.setting import settings_manager
+
+    class _EndOutage(SfisSimulator):
+        """SFIS giả lập không trả lời drop_ends lệnh END kế tiếp"""
+        drop_ends = 0
+
+        def reply(self, command, data, send_func):
+            if command == "END" and self.drop_ends:
+                self.drop_ends -= 1
+                self.faults["drop"] += 1
+                return
+            super().reply(command, data, send_func)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    quietLogger()
+    sfis, plc, laser = _EndOutage(), PlcSimulator(), LaserSimulator(scale=scale)
+    sfis.attachPty()
+    plc.attachPty()
+    laser.attachTcp()
+    for simulator in (sfis, plc, laser):
+        simulator.start()
+    settings_manager.set("general.sfis_outbox", outbox)
+    settings_manager.set("connection.laser.use_com", False)
+    settings_manager.set("connection.laser.ip", "127.0.0.1")
+    settings_manager.set("connection.laser.port", laser.port)
+    settings_manager.set("connection.sfc.com_port", sfis.port_name)
+    settings_manager.set("connection.plc.com_port", plc.port_name)
+
+    station = StationPresenter()
+    station.useConfiguredPorts()
+    ready = {}
+    station.connect_orchestrator.allFinished.connect(ready.update)
+    driver = LineDriver(plc, panels, transfer_ms=TRANSFER_MS)
+    # Trạm không báo NG cho PLC khi cycle lỗi: line giả lập coi như NG rồi đưa panel kế tiếp vào
+    station.cycleFinished.connect(lambda success, _: success or driver.onCommand("NG"))
+    try:
+        station.initialize()
+        if not end_to_end._runUntil(app, lambda: bool(ready), CONNECT_TIMEOUT_S) or not all(ready.values()):
+            raise RuntimeError(f"devices not connected: {ready}")
+        # Lỗi chỉ áp dụng cho END của panel: chờ SFIS giả lập trả lời xong END của ACTIVATE lúc kết nối
+        end_to_end._runUntil(app, lambda: sfis.counts["END"] > 0, CONNECT_TIMEOUT_S)
+        if sfis_profile is not None:
+            sfis.profile = sfis_profile
+        sfis.drop_ends = dropped_ends
+        driver.start()
+        end_to_end._runUntil(app, driver.done.is_set, CYCLE_TIMEOUT_S * panels)
+        end_to_end._runUntil(app, lambda: not station.isRunning, CYCLE_TIMEOUT_S)
+        # Outbox gửi nốt END của panel cuối
+        end_to_end._runUntil(app, lambda: not station.sfis_presenter.outbox.pending(), CYCLE_TIMEOUT_S)
+        pending = station.sfis_presenter.outbox.pending()
+    finally:
+        station.cleanup()
+        for simulator in (sfis, plc, laser):
+            simulator.stop()
+    return {"results": driver.results, "pending": pending, "dropped": sfis.faults["drop"]}
+
+
+def _restartCheck(count=5):
+    """Message enqueue khi SFIS không xác nhận, tắt outbox, mở lại: gửi đủ và đúng thứ tự (gọi trong process con)"""
+    from workers.sfis_outbox import SfisOutbox
+    db_path = os.path.join(tempfile.mkdtemp(prefix="regilaser_outbox_"), "sfis_outbox.db")
+    messages = [f"{'2790004600':<20}{f'PANEL{i:02d}':<20}END" for i in range(count)]
+    outbox = SfisOutbox(lambda message: False, db_path)
+    for message in messages:
+        outbox.enqueue(message)
+    outbox.stop()
+    received = []
+    outbox = SfisOutbox(lambda message: received.append(message) or True, db_path)
+    outbox.hint()
+    drained = outbox.waitDrained(5.0)
+    outbox.stop()
+    return {"drained": drained, "in_order": received == messages, "received": len(received), "sent": count}
+
+
+def _child(scenario, *args):
+    if scenario == "restart":
+        from benchmarks._common import setupEnvironment
+        setupEnvironment()
+        result = _restartCheck()
+    else:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        outbox, panels, scale = args[0] == "1", int(args[1]), float(args[2])
+        if scenario == "slow_end":
+            from simulation_device import FaultProfile, Latency
+            result = _runStation(outbox, panels, scale, FaultProfile(latency={"END": Latency(ms=SLOW_END_MS)}))
+        else:
+            result = _runStation(outbox, panels, scale, dropped_ends=1)
+    print("RESULT " + json.dumps(result), flush=True)
+    os._exit(0)
+
+
+def _spawn(*args):
+    proc = subprocess.Popen([sys.executable, "-m", "benchmarks.sfis_outbox", "--child", *map(str, args)], cwd=ROOT_DIR,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:  # bỏ qua output của Logging / simulator
+        if line.startswith("RESULT "):
+            proc.wait()
+            return json.loads(line[len("RESULT "):])
+    proc.wait()
+    raise RuntimeError(f"{args[0]} run failed (exit code {proc.returncode})")
+
+
+def run(panels=6, scale=0.1):
+    runs = {(scenario, outbox): _spawn(scenario, int(outbox), panels, scale)
+            for scenario in ("slow_end", "outage") for outbox in (False, True)}
+    rows = []
+    for (scenario, outbox), result in runs.items():
+        passed = [ms for status, ms in result["results"] if status == "OK"]
+        label = f"{scenario}, {'outbox' if outbox else 'sync END'}: {len(passed)}/{panels} OK"
+        rows.append((label, summarize([ms for _, ms in result["results"]])))
+    printTable(f"SFIS END: sync vs outbox ({panels} panels, END {SLOW_END_MS:.0f} ms / 1 END dropped, "
+               f"transfer {TRANSFER_MS:.0f} ms)", rows)
+    restart = _spawn("restart")
+    print(f"Restart: {restart['received']}/{restart['sent']} queued END delivered after restart, "
+          f"in order: {restart['in_order']}")
+
+    problems = []
+    sync_ms = summarize([ms for _, ms in runs["slow_end", False]["results"]])["p50"]
+    outbox_ms = summarize([ms for _, ms in runs["slow_end", True]["results"]])["p50"]
+    if outbox_ms > sync_ms - 0.5 * SLOW_END_MS:
+        problems.append(f"slow END still on the critical path: p50 {outbox_ms:.0f} ms vs {sync_ms:.0f} ms sync")
+    for scenario in ("slow_end", "outage"):
+        result = runs[scenario, True]
+        if [status for status, _ in result["results"]] != ["OK"] * panels or result["pending"]:
+            problems.append(f"{scenario} with outbox: {result['results']}, {result['pending']} END pending")
+    if all(status == "OK" for status, _ in runs["outage", False]["results"]):
+        problems.append("outage scenario did not fail any cycle without outbox (END was not dropped?)")
+    if not (restart["drained"] and restart["in_order"]):
+        problems.append(f"restart: {restart}")
+    if problems:
+        raise AssertionError("; ".join(problems))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _child(*sys.argv[2:])
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 6,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1,
+    )
@@ -0,0 +1,74 @@
+"""
+Benchmark: latency mỗi request NEEDPSN -> PSN response của SFISWorker.readData_SFIS
+So sánh reader polling cũ (10ms sleep, dừng sau 100ms im lặng) với reader frame-aware mới.
+
+SFIS giả lập bằng simulation_sfis.process_buffer chạy trên pty pair.
+Chạy: python -m benchmarks.sfis_reader [số_request]
+"""
+import sys
+import time
+
+from benchmarks._common import PtyResponder, printTable, quietLogger, setupEnvironment, summarize, timed
+
+setupEnvironment()
+
+import simulation_sfis  # noqa: E402
+from workers.sfis_worker import SFISWorker  # noqa: E402
+from model.sfis_model import SFISModel  # noqa: E402
+
+
+def legacyReadData(serial_port, timeout_ms=10000):
+    """Bản sao thuật toán polling cũ của readData_SFIS (chỉ dùng để so sánh)."""
+    start_time = time.time()
+    timeout_sec = timeout_ms / 1000.0
+    data_bytes = b''
+    no_data_count = 0
+    max_no_data_count = 10
+    while time.time() - start_time < timeout_sec:
+        if serial_port.in_waiting > 0:
+            chunk = serial_port.read(serial_port.in_waiting)
+            data_bytes += chunk
+            no_data_count = 0
+        else:
+            no_data_count += 1
+            if len(data_bytes) > 0 and no_data_count >= max_no_data_count:
+                break
+            time.sleep(0.01)
+    return data_bytes.decode('ascii', errors='ignore') if data_bytes else None
+
+
+def run(iterations=50, panel_num=24):
+    quietLogger()
+    responder = PtyResponder(simulation_sfis.process_buffer, "SFIS").start()
+    worker = SFISWorker()
+    model = SFISModel()
+    try:
+        if not worker.connect(responder.port_name, 9600):
+            raise RuntimeError(f"Cannot open pty {responder.port_name}")
+        request = model.createFormatNeedPSN("2790004600", panel_num)
+
+        variants = {
+            "legacy polling": lambda: legacyReadData(worker.serial_port),
+            "frame-aware (new)": lambda: worker.readData_SFIS(timeout_ms=10000),
+        }
+        rows = []
+        for label, read in variants.items():
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                worker.sendData_SFIS(request)
+                response, _ = timed(read)
+                samples.append((time.perf_counter() - start) * 1000.0)
+                if not response or "PASS" not in response:
+                    raise RuntimeError(f"Unexpected response: {response!r}")
+            rows.append((label, summarize(samples)))
+        printTable(f"SFIS NEEDPSN round-trip ({iterations} requests, {panel_num} PSN)", rows)
+        saved = rows[0][1]["mean"] - rows[1][1]["mean"]
+        print(f"Mean latency saved per request: {saved:.2f} ms")
+    finally:
+        worker.disconnect()
+        responder.stop()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,145 @@
+"""
+Benchmark: reader SFIS / laser dưới các profile lỗi của simulator (simulation_device.PROFILES)
+- ideal: trả lời ngay, nguyên 1 chunk
+- line: latency phân bố normal, RS232 9600bps, reply chia mảnh 16 byte
+- noisy: latency đuôi dài, mảnh 8 byte, mất / hỏng reply, laser TCP thỉnh thoảng đóng kết nối
+Mỗi cycle: SFIS NEEDPSN + END (SFISWorker.readData_SFIS trên pty), laser GA / C2 / NT qua RS232 (pty) và TCP.
+TCP: trước mỗi cycle gọi ensureConnected() như LaserPresenter => đo khả năng tự kết nối lại sau khi laser đóng link.
+Kiểm tra: ideal / line không có lỗi nào; noisy không có lỗi nào ngoài các lỗi simulator đã cố ý tạo.
+Chạy: python -m benchmarks.sim_profiles [số_cycle] [sim_scale]
+"""
+import sys
+import time
+from collections import Counter
+
+from benchmarks._common import printTable, quietLogger, setupEnvironment, summarize
+
+setupEnvironment()
+
+from model.laser_protocol import LaserReplyError  # noqa: E402
+from model.sfis_model import SFISModel  # noqa: E402
+from simulation_laser import LaserSimulator  # noqa: E402
+from simulation_sfis import SfisSimulator  # noqa: E402
+from utils.schema import LaserConnectMode  # noqa: E402
+from workers.laser_worker import LaserWorker  # noqa: E402
+from workers.sfis_worker import SFISWorker  # noqa: E402
+
+PROFILE_NAMES = ("ideal", "line", "noisy")
+MO = "2790004600"
+PANEL_NUM = 10
+CONTENT = "0,PX5BF03CL,2,2790004600,6,PT53QG0754670080,10,PT53QG0754670081"
+
+
+def sfisCycles(profile, cycles, scale):
+    """(latency NEEDPSN OK, Counter kết quả, simulator)"""
+    simulator = SfisSimulator(profile=profile, scale=scale)
+    simulator.attachPty()
+    simulator.start()
+    worker, model = SFISWorker(), SFISModel()
+    samples, outcomes = [], Counter()
+    try:
+        if not worker.connect(simulator.port_name, 9600):
+            raise RuntimeError(f"Cannot open pty {simulator.port_name}")
+        needpsn = model.createFormatNeedPSN(MO, PANEL_NUM)
+        complete = model.createTestComplete(MO, "PX5BF03CL")
+        for _ in range(cycles):
+            start = time.perf_counter()
+            worker.sendData_SFIS(needpsn)
+            response = worker.readData_SFIS(timeout_ms=1000)
+            elapsed = (time.perf_counter() - start) * 1000.0
+            if not response:
+                outcomes["NEEDPSN timeout"] += 1
+            elif not model.parseResponsePsn(response):
+                outcomes["NEEDPSN bad frame"] += 1
+            else:
+                outcomes["NEEDPSN OK"] += 1
+                samples.append(elapsed)
+            worker.sendData_SFIS(complete)
+            response = worker.readData_SFIS(timeout_ms=1000)
+            outcomes["END OK" if response and "ENDPASS" in response else "END failed"] += 1
+    finally:
+        worker.disconnect()
+        simulator.stop()
+    return samples, outcomes, simulator
+
+
+def laserCycles(profile, cycles, scale, mode):
+    """(latency GA+C2+NT của cycle OK, Counter kết quả từng lệnh, simulator)"""
+    simulator = LaserSimulator(profile=profile, scale=scale)
+    if mode == LaserConnectMode.TCP:
+        simulator.attachTcp()
+        worker = LaserWorker(mode=mode, ip="127.0.0.1", port=simulator.port, timeout_ms=500)
+    else:
+        simulator.attachPty()
+        worker = LaserWorker(mode=mode, ip="", port=0, timeout_ms=500, com_port=simulator.port_name)
+    simulator.start()
+    samples, outcomes = [], Counter()
+    try:
+        worker.connect()
+        for _ in range(cycles):
+            was_connected = worker.is_connected
+            if not worker.ensureConnected():
+                outcomes["reconnect failed"] += 1
+                continue
+            if not was_connected:
+                outcomes["reconnect OK"] += 1
+            start = time.perf_counter()
+            ok = True
+            for name, send in (
+                ("GA", lambda: worker.send_ga("1")),
+                ("C2", lambda: worker.send_c2("1", CONTENT)),
+                ("NT", lambda: worker.send_nt()),
+            ):
+                try:
+                    send()
+                    outcomes[f"{name} OK"] += 1
+                except LaserReplyError:
+                    outcomes[f"{name} rejected"] += 1
+                    ok = False
+                    break
+                except (TimeoutError, RuntimeError) as exc:
+                    outcomes[f"{name} {type(exc).__name__}"] += 1
+                    ok = False
+                    break
+            if ok:
+                samples.append((time.perf_counter() - start) * 1000.0)
+    finally:
+        worker.disconnect()
+        simulator.stop()
+    return samples, outcomes, simulator
+
+
+def _failures(outcomes):
+    return sum(count for key, count in outcomes.items() if not key.endswith(" OK"))
+
+
+def run(cycles=40, scale=0.05):
+    quietLogger()
+    rows, report, problems = [], [], []
+    for name in PROFILE_NAMES:
+        for label, measure in (
+            ("SFIS NEEDPSN", lambda: sfisCycles(name, cycles, scale)),
+            ("laser RS232", lambda: laserCycles(name, cycles, scale, LaserConnectMode.RS232)),
+            ("laser TCP", lambda: laserCycles(name, cycles, scale, LaserConnectMode.TCP)),
+        ):
+            samples, outcomes, simulator = measure()
+            if samples:
+                rows.append((f"{name}: {label}", summarize(samples)))
+            failures, injected = _failures(outcomes), sum(simulator.faults.values())
+            report.append(f"{name + ': ' + label:<28}{dict(outcomes)} faults={dict(simulator.faults)}")
+            # Mỗi lỗi chỉ được phép đến từ 1 fault do simulator tạo (không timeout / gán nhầm reply do reader)
+            if failures > injected:
+                problems.append(f"{name} {label}: {failures} failures for {injected} injected faults")
+    printTable(f"Reader latency under simulator profiles ({cycles} cycles, latency x{scale})", rows)
+    print("\nOutcomes:")
+    for line in report:
+        print(line)
+    if problems:
+        raise AssertionError("; ".join(problems))
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 40,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.05,
+    )
@@ -0,0 +1,57 @@
+"""
+Benchmark: thời gian import lúc khởi động (process Python mới cho mỗi lần đo)
+- lazy: các module main.py import hiện tại (MainWindow, MainPresenter, Logging...)
+- eager: như trên + các cửa sổ trước đây import sẵn (settings, project, About, PathSetupDialog)
+Sau khi đo: kiểm tra các cửa sổ đó không còn bị import khi khởi động.
+Chạy: python -m benchmarks.startup [số_lần]
+"""
+import os
+import subprocess
+import sys
+
+from benchmarks._common import ROOT_DIR, printTable, setupEnvironment, summarize
+
+appdata = setupEnvironment()
+
+STARTUP_MODULES = ["utils.startup_profile", "PySide6.QtWidgets", "gui.MainWindow", "presenter.main_presenter",
+                   "utils.Logging", "utils.SingleInstance"]
+DEFERRED_MODULES = ["gui.settingWindow", "gui.projectWindow", "gui.AboutWindow", "gui.PathSetupDialog"]
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - start) * 1000.0
+print("STARTUP", elapsed, ",".join(m for m in {deferred!r} if m in sys.modules))
+"""
+
+
+def _importOnce(modules):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", APPDATA=appdata)
+    out = subprocess.run([sys.executable, "-c", _SCRIPT.format(modules=modules, deferred=DEFERRED_MODULES)],
+                         cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    result = [line for line in out.splitlines() if line.startswith("STARTUP ")][-1].split()  # bỏ output của Logging
+    return float(result[1]), result[2] if len(result) > 2 else ""
+
+
+def run(repeats=7):
+    _importOnce(STARTUP_MODULES)  # làm nóng cache .pyc / đĩa
+    lazy, loaded = [], set()
+    eager = []
+    for _ in range(repeats):
+        ms, deferred_loaded = _importOnce(STARTUP_MODULES)
+        lazy.append(ms)
+        loaded.update(filter(None, deferred_loaded.split(",")))
+        eager.append(_importOnce(STARTUP_MODULES + DEFERRED_MODULES)[0])
+    printTable(f"Startup imports ({repeats} fresh processes)", [
+        ("eager windows (before)", summarize(eager)),
+        ("lazy windows", summarize(lazy)),
+    ])
+    if loaded:
+        raise AssertionError(f"deferred modules imported at startup: {sorted(loaded)}")
+    print("Lazy check passed: settings / project / about windows not imported at startup")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
@@ -1,10 +1,16 @@
 """
 Log Display - Hiển thị log dạng text có thể copy và cuộn
+Log được gom vào buffer và đẩy lên widget theo chu kỳ (20 Hz) thay vì từng dòng
 """
+from collections import deque
+
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPlainTextEdit, QHBoxLayout
-from PySide6.QtCore import Qt, QDateTime
+from PySide6.QtCore import Qt, QDateTime, QTimer
 from PySide6.QtGui import QFont
 
+MAX_BLOCKS = 3000  # số dòng giữ lại trong widget (ring buffer)
+FLUSH_INTERVAL_MS = 50  # 20 Hz
+
 
 class LogDisplay(QWidget):
     """Widget hiển thị log dạng text"""
@@ -18,7 +24,15 @@ class LogDisplay(QWidget):
     
     def __init__(self):
         super().__init__()
+        # Dòng chưa hiển thị; nhiều hơn MAX_BLOCKS thì dòng cũ cũng sẽ bị widget cắt bỏ
+        self._pending = deque(maxlen=MAX_BLOCKS)
         self._init_ui()
+
+        # Timer chỉ chạy khi có log chờ hiển thị (idle không wake UI thread)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush)
     
     def _init_ui(self):
         layout = QVBoxLayout(self)
@@ -112,7 +126,7 @@ class LogDisplay(QWidget):
         self.log_view = QPlainTextEdit()
         self.log_view.setReadOnly(True)
         self.log_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
-        self.log_view.setMaximumBlockCount(3000)  # Giữ lại 2000 dòng gần nhất
+        self.log_view.setMaximumBlockCount(MAX_BLOCKS)  # Giữ lại MAX_BLOCKS dòng gần nhất
 
         # Giữ Consolas cho log (monospace font tốt cho log)
         font = QFont("Consolas", 10)
@@ -126,10 +140,23 @@ class LogDisplay(QWidget):
         return f"[{timestamp}] [{level:>7}]  {message}"
 
     def addLog(self, message, level=INFO):
-        """Thêm một dòng log vào text area"""
-        entry = self.formatEntry(message, level)
-        self.log_view.appendPlainText(entry)
-        self.log_view.verticalScrollBar().setValue(self.log_view.verticalScrollBar().maximum())
+        """Thêm một dòng log (hiển thị ở lần flush kế tiếp)"""
+        self._pending.append(self.formatEntry(message, level))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        """Đẩy toàn bộ log đang chờ lên widget trong 1 lần append"""
+        if not self._pending:
+            return
+        scrollbar = self.log_view.verticalScrollBar()
+        # Người dùng đang cuộn lên xem log cũ -> không kéo về cuối
+        follow = scrollbar.value() >= scrollbar.maximum() - 1
+        entries = "\n".join(self._pending)
+        self._pending.clear()
+        self.log_view.appendPlainText(entries)
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
     
     def addInfo(self, message):
         """Thêm log INFO"""
@@ -153,6 +180,7 @@ class LogDisplay(QWidget):
     
     def clearLogs(self):
         """Xóa tất cả logs"""
+        self._pending.clear()
         self.log_view.clear()
     
     def setHeaderText(self, text):
@@ -14,7 +14,6 @@ from gui import (
     LogDisplay,
     BottomStatusBar,
 )
-from gui.projectWindow import ProjectTable
 
 class MainWindow(QMainWindow):
     """Main window của Sprite Auto Laser Marking Program"""
@@ -243,6 +242,7 @@ class MainWindow(QMainWindow):
         try:
             # Create dialog if not exists
             if self.project_table_dialog is None:
+                from gui.projectWindow import ProjectTable  # import khi mở lần đầu (giảm thời gian khởi động)
                 self.project_table_dialog = ProjectTable(self)
                 self.project_table_dialog.setWindowTitle("Project Management")
                 self.project_table_dialog.resize(800, 600)
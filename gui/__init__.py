@@ -4,9 +4,23 @@ from gui.LeftControlPanel import LeftControlPanel
 from gui.CenterPanel import CenterPanel
 from gui.BottomStatusBar import BottomStatusBar
 from gui.LogDisplay import LogDisplay
-from gui.AboutWindow import AboutWindow
-from gui.settingWindow import MainSettingWindow
-from gui.PathSetupDialog import PathSetupDialog
+
+# Cửa sổ / dialog chỉ mở khi người dùng chọn menu: import khi truy cập lần đầu (giảm thời gian khởi động)
+_LAZY_IMPORTS = {
+    'AboutWindow': 'gui.AboutWindow',
+    'MainSettingWindow': 'gui.settingWindow',
+    'PathSetupDialog': 'gui.PathSetupDialog',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'gui' has no attribute '{name}'")
+    import importlib
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
 
 
 __all__ = [
@@ -20,4 +34,3 @@ __all__ = [
     'MainSettingWindow',
     'PathSetupDialog',
 ]
-
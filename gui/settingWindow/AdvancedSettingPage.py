@@ -44,6 +44,10 @@ class AdvancedSettingPage(QWidget):
         path_app_layout.addWidget(self.select_folder_btn)
         form.addRow("Folder Application:", path_app_layout)
 
+        # Async IO core (SFIS / PLC / Laser dùng chung 1 event loop), cần restart
+        self.async_io = QCheckBox("Use async I/O core for SFIS / PLC / Laser (restart required)")
+        form.addRow("", self.async_io)
+
         layout.addLayout(form)
         layout.addStretch()
 
@@ -57,6 +61,7 @@ class AdvancedSettingPage(QWidget):
         return {
             "language": self.language_select.currentData(),
             "path_app": self.path_app.text().strip(),
+            "async_io": self.async_io.isChecked(),
         }
 
     def set_settings(self, settings):
@@ -67,4 +72,5 @@ class AdvancedSettingPage(QWidget):
             self.language_select.setCurrentIndex(idx)
         # Path App
         self.path_app.setText(settings.get("path_app", ""))
+        self.async_io.setChecked(settings.get("async_io", False))
 
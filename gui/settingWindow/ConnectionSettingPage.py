@@ -304,6 +304,8 @@ class ConnectionSettingPage(QWidget):
         self.laser_timeout_form.addRow("Time out (ms):", self.laser_timeout_ms)
         laser_settings_layout.addLayout(self.laser_timeout_form)
         self.laser_timeout_ms.setFixedWidth(150)
+        self.laser_ack_driven = QCheckBox("Ack-driven (send GA/C2/NT without Delay Step)")
+        laser_settings_layout.addWidget(self.laser_ack_driven)
         parent_layout.addLayout(laser_settings_layout)
 
     def get_settings(self):
@@ -330,6 +332,7 @@ class ConnectionSettingPage(QWidget):
                 "ip": self.laser_ip.text().strip(),
                 "port": int(self.laser_port.text()) if self.laser_port.text() else 50002,
                 "timeout_ms": int(self.laser_timeout_ms.text()) if self.laser_timeout_ms.text() else 5000,
+                "ack_driven": self.laser_ack_driven.isChecked(),
             }
         }
 
@@ -362,3 +365,4 @@ class ConnectionSettingPage(QWidget):
         self.laser_ip.setText(laser.get("ip", ""))
         self.laser_port.setText(str(laser.get("port", 50002)))
         self.laser_timeout_ms.setText(str(laser.get("timeout_ms", 5000)))
+        self.laser_ack_driven.setChecked(laser.get("ack_driven", False))
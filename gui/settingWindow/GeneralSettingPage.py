@@ -31,12 +31,16 @@ class GeneralSettingPage(QWidget):
         self.op_num = QLineEdit()
         # self.panel_num = QLineEdit()
         self.post_result_sfc = QCheckBox("Enable POST_RESULT_SFC")
+        self.sfis_lookahead = QCheckBox("Prefetch next panel from SFIS (format 1 only)")
+        self.sfis_outbox = QCheckBox("Queue test complete (END) to SFIS in background")
         
         form.addRow("Station Name:", self.station_name)
         form.addRow("MO:", self.mo)
         form.addRow("OP Number:", self.op_num)
         # form.addRow("Panel Number:", self.panel_num)
         form.addRow("", self.post_result_sfc)
+        form.addRow("", self.sfis_lookahead)
+        form.addRow("", self.sfis_outbox)
         
         layout.addLayout(form)
         self.add_line(layout)
@@ -58,6 +62,8 @@ class GeneralSettingPage(QWidget):
             "op_num": self.op_num.text().strip(),
             # "panel_num": self.panel_num.text().strip(),
             "post_result_sfc": self.post_result_sfc.isChecked(),
+            "sfis_lookahead": self.sfis_lookahead.isChecked(),
+            "sfis_outbox": self.sfis_outbox.isChecked(),
             "pcb_product_name": self.pcb_product_name.text().strip(),
             "pcb_number": self.pcb_number.text().strip(),
         }
@@ -78,5 +84,7 @@ class GeneralSettingPage(QWidget):
         self.op_num.setText(_to_text(settings.get("op_num", "")))
         # self.panel_num.setText(_to_text(settings.get("panel_num", "")))
         self.post_result_sfc.setChecked(settings.get("post_result_sfc", False))
+        self.sfis_lookahead.setChecked(settings.get("sfis_lookahead", False))
+        self.sfis_outbox.setChecked(settings.get("sfis_outbox", True))
         self.pcb_product_name.setText(_to_text(settings.get("pcb_product_name", "")))
         self.pcb_number.setText(_to_text(settings.get("pcb_number", "")))
\ No newline at end of file
@@ -112,18 +112,32 @@ class MainSettingWindow(QDialog):
 
     
     def _save_settings(self):
-        all_settings = {
+        page_settings = {
             "general": self.general_page.get_settings(),
             "project": self.project_page.get_settings(),
             "connection": self.connection_page.get_settings(),
             "advanced": self.advanced_page.get_settings()
         }
+        # Merge vào settings hiện tại để giữ các key không có trên UI (retry, backoff...)
+        all_settings = self._merge_settings(settings_manager.get_settings(), page_settings)
         
-        success = settings_manager.save_settings(all_settings)
+        # Ghi ngay (không chờ write-behind) để báo đúng kết quả cho người dùng
+        success = settings_manager.save_settings(all_settings) and settings_manager.flush()
         if success:
             pass
         return success
 
+    @staticmethod
+    def _merge_settings(base, updates):
+        """Merge đệ quy updates vào bản sao của base"""
+        merged = dict(base)
+        for key, value in updates.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = MainSettingWindow._merge_settings(merged[key], value)
+            else:
+                merged[key] = value
+        return merged
+
     def _on_ok(self):
         """Handle save and close button click."""
         if self._save_settings():
@@ -1,15 +1,32 @@
 """
 Main Entry Point - Khởi tạo ứng dụng
+- Mặc định: GUI (QApplication + MainWindow + MainPresenter)
+- --headless: chỉ QCoreApplication + StationPresenter, không import QtWidgets / gui (PC trên line không ai xem màn hình);
+  log ra file như bình thường, trạng thái trạm qua socket local (workers.status_server, advanced.status_port)
+- --headless khi settings có "stations": multi-station, StationSupervisor chạy 1 process `--headless --station <name>`
+  cho mỗi trạm (utils.stations)
 """
+from utils.startup_profile import startup_profiler  # import đầu tiên: đo được thời gian import các module sau
 import sys
-from PySide6.QtWidgets import QApplication, QMessageBox
-from gui.MainWindow import MainWindow
-from gui.PathSetupDialog import PathSetupDialog
-from presenter.main_presenter import MainPresenter
+from utils.stations import applyStationArg, rejectedStationEntries, stationEntries
+# Áp cấu hình trạm (--station) trước khi Logging khởi tạo: thư mục log / cycle trace theo trạm
+station_error = None
+try:
+    station_name = applyStationArg(sys.argv)
+except ValueError as e:
+    station_name, station_error = None, e
 from utils.Logging import getLogger
 from utils.SingleInstance import get_single_instance
 import signal
 log = getLogger()   
+# Lỗi cấu hình trạm chỉ ghi log được sau khi Logging đã khởi tạo (bản build windowed không có stdout)
+for rejected_entry in rejectedStationEntries():
+    log.warning(f"Stations: ignoring invalid or duplicate station entry: {rejected_entry!r}")
+if station_error is not None:
+    log.error(f"{station_error}")
+    sys.exit(2)
+
+HEADLESS_FLAG = "--headless"
 
 # def check_and_setup_log_path():
 #     """
@@ -42,24 +59,112 @@ log = getLogger()
 #         return True  # Continue anyway với default path
 
 
+def runGui():
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from gui.MainWindow import MainWindow
+    from presenter.main_presenter import MainPresenter
+    startup_profiler.mark("imports")
+
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    startup_profiler.mark("main_window")
+    presenter = MainPresenter(window)
+    startup_profiler.mark("main_presenter")
+    window.show()
+    startup_profiler.mark("window_shown")
+    # Auto-connect SFIS / PLC / Laser sau khi cửa sổ đã vẽ xong (không chặn lần hiển thị đầu tiên)
+    QTimer.singleShot(0, presenter.initialize)
+    signal.signal(signal.SIGINT, signal.SIG_DFL) 
+    exit_code = app.exec()
+    log.info("Application closing...............!!!")
+    presenter.cleanup()
+    return exit_code
+
+
+def _quitOnSignal(app):
+    """
+    Ctrl+C / dịch vụ bị dừng / supervisor yêu cầu dừng => thoát event loop rồi cleanup như khi đóng cửa sổ.
+    Trả về timer rỗng giúp interpreter chạy định kỳ, handler Python mới được gọi trong lúc app.exec()
+    """
+    from PySide6.QtCore import QTimer
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):  # SIGBREAK: CTRL_BREAK_EVENT trên Windows
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), lambda *_: app.quit())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(500)
+    return signal_timer
+
+
+def runSupervisor():
+    from PySide6.QtCore import QCoreApplication
+    from utils.setting import settings_manager
+    from workers.io_core import io_core
+    from workers.station_supervisor import StationSupervisor
+    from workers.status_server import DEFAULT_STATUS_PORT, StatusServer
+
+    app = QCoreApplication(sys.argv)
+    supervisor = StationSupervisor()
+    status_server = StatusServer(supervisor.statusSnapshot, port=settings_manager.get("advanced.status_port", DEFAULT_STATUS_PORT))
+    status_server.start()
+    supervisor.start()
+    signal_timer = _quitOnSignal(app)
+
+    log.info(f"Running multi-station (headless): {', '.join(supervisor.stationNames)}")
+    exit_code = app.exec()
+    log.info("Application closing...............!!!")
+    signal_timer.stop()
+    supervisor.stop()
+    status_server.stop()
+    io_core.stop()
+    return exit_code
+
+
+def runHeadless():
+    from PySide6.QtCore import QCoreApplication, QMetaObject, Qt, QTimer
+    from presenter.station_presenter import StationPresenter
+    from utils.setting import settings_manager
+    from workers.status_server import DEFAULT_STATUS_PORT, StatusServer
+    startup_profiler.mark("imports")
+
+    app = QCoreApplication(sys.argv)
+    station = StationPresenter()
+    startup_profiler.mark("station_presenter")
+    # Lệnh "stop" qua status socket (StationSupervisor): thoát event loop từ thread IOCore
+    status_server = StatusServer(station.statusSnapshot, port=settings_manager.get("advanced.status_port", DEFAULT_STATUS_PORT),
+                                 on_stop=lambda: QMetaObject.invokeMethod(app, "quit", Qt.QueuedConnection))
+    status_server.start()
+    # Headless không có combo chọn cổng trên GUI: SFIS / PLC theo connection.sfc / connection.plc
+    station.useConfiguredPorts()
+    QTimer.singleShot(0, station.initialize)
+    signal_timer = _quitOnSignal(app)
+
+    log.info(f"Running headless (no GUI){f', station {station_name}' if station_name else ''}")
+    exit_code = app.exec()
+    log.info("Application closing...............!!!")
+    signal_timer.stop()
+    status_server.stop()
+    station.cleanup()
+    return exit_code
+
+
 def main():
     log.info("--------------------------------- Regilaser Laser Marking System started ---------------------------------")
-    single_instance = get_single_instance("Regilaser")
+    # Multi-station: mỗi process trạm giữ lock riêng, supervisor giữ lock chung như bản 1 trạm
+    single_instance = get_single_instance(f"Regilaser_{station_name}" if station_name else "Regilaser")
     
     if not single_instance.try_lock():
         log.warning("Another instance of Regilaser is already running")
         single_instance.show_already_running_message()
         sys.exit(1)
     try:        
-        app = QApplication(sys.argv)
-        window = MainWindow()
-        presenter = MainPresenter(window)
-        presenter.initialize()
-        window.show()
-        signal.signal(signal.SIGINT, signal.SIG_DFL) 
-        exit_code = app.exec()
-        log.info("Application closing...............!!!")
-        presenter.cleanup()
+        if HEADLESS_FLAG not in sys.argv:
+            exit_code = runGui()
+        elif station_name is None and stationEntries():
+            exit_code = runSupervisor()
+        else:
+            exit_code = runHeadless()
         log.info("--------------------------------- Application exited successfully ---------------------------------")
         
     finally:
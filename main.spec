@@ -26,7 +26,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # UPX: mỗi lần khởi động phải giải nén lại Qt DLL => cold start chậm hơn
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -0,0 +1,53 @@
+"""
+Laser Protocol - Tách reply của laser controller theo dòng và gắn reply với lệnh đã gửi
+- Reply dạng <LỆNH>,<mã>[,<chi tiết>...]: GA,0 / C2,0 / NT,0 = OK, mã khác 0 = lỗi (VD C2,1,S001)
+- Reply lỗi chung: ER,<LỆNH>,<mã> hoặc ERROR,<chi tiết> (không ghi tên lệnh => tính cho lệnh đang chờ)
+- Reply không cùng tên lệnh (reply muộn của lệnh trước đã timeout, dòng dính trong cùng 1 chunk) bị bỏ qua
+  => không gán nhầm reply, lệnh lỗi trả về ngay thay vì chờ hết timeout
+"""
+from dataclasses import dataclass
+
+GENERIC_ERRORS = ("ERROR", "ER")
+
+
+def commandName(command: str) -> str:
+    """'GA,1\\r\\n' -> 'GA'"""
+    return command.strip().split(",", 1)[0].strip().upper()
+
+
+@dataclass(frozen=True, slots=True)
+class LaserReply:
+    command: str  # tên lệnh mà reply thuộc về ('' nếu là lỗi chung không ghi tên lệnh)
+    code: str  # '0' = OK
+    details: tuple = ()
+    raw: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.code == "0"
+
+    def matches(self, name: str) -> bool:
+        """Reply này có phải của lệnh name không"""
+        return self.command == name or not self.command
+
+
+class LaserReplyError(RuntimeError):
+    """Controller trả mã lỗi cho lệnh (không phải mất kết nối / timeout => retry không có tác dụng)"""
+
+    def __init__(self, reply: LaserReply):
+        super().__init__(f"Laser rejected {reply.command or 'command'}: '{reply.raw}' (code {reply.code})")
+        self.reply = reply
+
+
+def parseReply(line) -> LaserReply | None:
+    """Parse 1 dòng reply (str / bytes / memoryview, có hoặc không \\r\\n). Dòng trống -> None"""
+    raw = (line if isinstance(line, str) else str(line, "ascii", errors="ignore")).strip()
+    if not raw:
+        return None
+    fields = [field.strip() for field in raw.split(",")]
+    head = fields[0].upper()
+    if head == "ER" and len(fields) >= 2:
+        return LaserReply(fields[1].upper(), fields[2] if len(fields) > 2 else head, tuple(fields[3:]), raw)
+    if head in GENERIC_ERRORS:
+        return LaserReply("", head, tuple(fields[1:]), raw)
+    return LaserReply(head, fields[1] if len(fields) > 1 else "", tuple(fields[2:]), raw)
@@ -0,0 +1,143 @@
+"""
+Project Catalogue - Danh mục project (model.json) dùng chung cho TopTopPresenter và ProjectPresenter
+- Index chính: Project_Name -> entry (dict, giữ thứ tự trong file) => lookup O(1)
+- Index phụ: LM_Script_Name, PSN_PRE -> các Project_Name
+- Thêm / sửa / xóa cập nhật index tại chỗ, không dựng lại cả danh sách
+"""
+import threading
+
+from utils.Logging import getLogger
+
+log = getLogger()
+
+
+class ProjectCatalogue:
+    """Catalogue project đã index. Entry trùng Project_Name: giữ entry đầu tiên (giống getProjectInfo cũ)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._projects = {}  # Project_Name -> entry
+        self._by_script = {}  # LM_Script_Name -> {Project_Name: None} (dict làm ordered set)
+        self._by_psn_pre = {}  # PSN_PRE -> {Project_Name: None}
+        self._source = None  # (store path, store version) đã load / đồng bộ
+
+    # ------------------------------------------------------------------
+    # Load
+    # ------------------------------------------------------------------
+    def load(self, data) -> int:
+        """Dựng lại toàn bộ index từ list entry (nội dung model.json). Trả về số project"""
+        projects, by_script, by_psn_pre = {}, {}, {}
+        duplicates = 0
+        for entry in data:
+            name = entry.get("Project_Name", "")
+            if not name:
+                continue
+            if name in projects:
+                duplicates += 1
+                continue
+            projects[name] = entry
+            by_script.setdefault(entry.get("LM_Script_Name"), {})[name] = None
+            by_psn_pre.setdefault(entry.get("PSN_PRE"), {})[name] = None
+        if duplicates:
+            log.warning(f"Project catalogue: {duplicates} duplicate Project_Name entries ignored")
+        with self._lock:
+            self._projects, self._by_script, self._by_psn_pre = projects, by_script, by_psn_pre
+            self._source = None
+        return len(projects)
+
+    def loadStore(self, store, force=False) -> bool:
+        """
+        Load từ ProjectStore (model.json + journal) nếu store đã thay đổi kể từ lần load / markSynced trước
+        (hoặc force). Trả về True nếu đã đọc lại. Lỗi đọc / JSON được raise cho presenter xử lý.
+        """
+        with self._lock:
+            if not force and self._source == (store.path, store.version) and not store.changedOnDisk():
+                return False
+        self.load(store.read())
+        self.markSynced(store)
+        return True
+
+    def markSynced(self, store):
+        """Ghi nhận catalogue đã khớp với store (sau khi load hoặc sau thao tác sửa / thêm / xóa qua store)"""
+        with self._lock:
+            self._source = (store.path, store.version)
+
+    # ------------------------------------------------------------------
+    # Tra cứu
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return len(self._projects)
+
+    def __contains__(self, project_name):
+        return project_name in self._projects
+
+    def get(self, project_name):
+        """Entry của project, None nếu không có"""
+        return self._projects.get(project_name)
+
+    def names(self) -> list:
+        with self._lock:
+            return list(self._projects)
+
+    def entries(self) -> list:
+        with self._lock:
+            return list(self._projects.values())
+
+    def findByScript(self, script) -> list:
+        """Các project dùng LM_Script_Name = script"""
+        with self._lock:
+            return [self._projects[name] for name in self._by_script.get(script, ())]
+
+    def findByPsnPre(self, psn_pre) -> list:
+        """Các project có PSN_PRE = psn_pre"""
+        with self._lock:
+            return [self._projects[name] for name in self._by_psn_pre.get(psn_pre, ())]
+
+    # ------------------------------------------------------------------
+    # Cập nhật từng entry
+    # ------------------------------------------------------------------
+    def _index(self, name, entry):
+        self._by_script.setdefault(entry.get("LM_Script_Name"), {})[name] = None
+        self._by_psn_pre.setdefault(entry.get("PSN_PRE"), {})[name] = None
+
+    def _unindex(self, name, entry):
+        for index, key in ((self._by_script, entry.get("LM_Script_Name")), (self._by_psn_pre, entry.get("PSN_PRE"))):
+            names = index.get(key)
+            if names is not None:
+                names.pop(name, None)
+                if not names:
+                    del index[key]
+
+    def add(self, entry) -> bool:
+        """Thêm project mới vào cuối catalogue. False nếu tên rỗng hoặc đã tồn tại"""
+        name = entry.get("Project_Name", "")
+        with self._lock:
+            if not name or name in self._projects:
+                return False
+            self._projects[name] = entry
+            self._index(name, entry)
+            return True
+
+    def update(self, entry) -> bool:
+        """Thay entry của project (giữ nguyên vị trí). False nếu project không tồn tại"""
+        name = entry.get("Project_Name", "")
+        with self._lock:
+            old = self._projects.get(name)
+            if old is None:
+                return False
+            self._unindex(name, old)
+            self._projects[name] = entry
+            self._index(name, entry)
+            return True
+
+    def remove(self, project_name):
+        """Xóa project, trả về entry đã xóa (None nếu không có)"""
+        with self._lock:
+            entry = self._projects.pop(project_name, None)
+            if entry is not None:
+                self._unindex(project_name, entry)
+            return entry
+
+
+# Instance global dùng chung cho TopTopPresenter / ProjectPresenter
+project_catalogue = ProjectCatalogue()
@@ -0,0 +1,146 @@
+"""
+SFIS Codec - Layout frame SFIS fixed-width khai báo 1 lần, biên dịch thành bảng offset
+- decode: 1 lần decode ASCII cả frame, tách tất cả field bằng 1 itemgetter(slice...) đã biên dịch
+- encode: 1 format string đã biên dịch ("{:<20.20}" = ljust(20)[:20]), keyword cố định nằm sẵn trong template
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    width: int
+    count: int = 1  # > 1: field lặp liên tiếp (VD: N x PSN), decode ra list
+    literal: Optional[str] = None  # keyword cố định: encode tự ghi vào, decode trả nguyên văn (không strip)
+
+
+class FrameLayout:
+    """Layout frame đã biên dịch: offset từng field, getter để decode, format string để encode"""
+
+    def __init__(self, *fields: Field, terminator: str = ""):
+        self.fields = fields
+        self.terminator = terminator
+        self._slots = []  # (field, index bắt đầu trong tuple kết quả của getter)
+        self._inputs = []  # (name, count) các field phải truyền giá trị khi encode
+        slices = []
+        template = []
+        offset = 0
+        for field in fields:
+            self._slots.append((field, len(slices)))
+            for _ in range(field.count):
+                slices.append(slice(offset, offset + field.width))
+                offset += field.width
+            if field.literal is not None:
+                literal = field.literal.ljust(field.width)[:field.width]
+                template.append(literal.replace("{", "{{").replace("}", "}}") * field.count)
+            else:
+                self._inputs.append((field.name, field.count))
+                template.append(f"{{:<{field.width}.{field.width}}}" * field.count)
+        self.size = offset
+        self._flat = all(count == 1 for _, count in self._inputs)
+        getter = itemgetter(*slices)
+        self._getter = getter if len(slices) > 1 else (lambda text: (getter(text),))
+        self._template = "".join(template) + terminator.replace("{", "{{").replace("}", "}}")
+
+    # ------------------------------------------------------------------
+    # Decode
+    # ------------------------------------------------------------------
+    def decode(self, frame) -> dict:
+        """
+        Tách frame (str hoặc bytes / bytearray / memoryview) thành dict name -> str (list[str] nếu field lặp).
+        Byte không phải ASCII bị bỏ (giống readData_SFIS). Dữ liệu thừa sau frame được bỏ qua; thiếu thì ValueError.
+        """
+        text = frame if isinstance(frame, str) else str(frame, "ascii", errors="ignore")
+        if len(text) < self.size:
+            raise ValueError(f"Frame too short: {len(text)} < {self.size}")
+        parts = self._getter(text)
+        result = {}
+        for field, index in self._slots:
+            if field.literal is not None:
+                result[field.name] = parts[index] if field.count == 1 else list(parts[index:index + field.count])
+            elif field.count == 1:
+                result[field.name] = parts[index].strip()
+            else:
+                result[field.name] = list(map(str.strip, parts[index:index + field.count]))
+        return result
+
+    # ------------------------------------------------------------------
+    # Encode
+    # ------------------------------------------------------------------
+    def format(self, **values) -> str:
+        """Tạo frame dạng text. Giá trị được str() rồi pad khoảng trắng / cắt theo width; thiếu field -> để trống"""
+        if self._flat:
+            return self._template.format(*[str(values.get(name, "")) for name, _ in self._inputs])
+        args = []
+        for name, count in self._inputs:
+            value = values.get(name, "")
+            if count == 1:
+                args.append(str(value))
+            else:
+                items = [str(item) for item in list(value)[:count]]
+                args.extend(items + [""] * (count - len(items)))
+        return self._template.format(*args)
+
+    def encode(self, **values) -> bytes:
+        """Như format() nhưng trả về bytes ASCII (giá trị không phải ASCII -> UnicodeEncodeError)"""
+        return self.format(**values).encode("ascii")
+
+
+# ------------------------------------------------------------------
+# Layout các format SFIS (cache theo số PSN / keyword)
+# ------------------------------------------------------------------
+MO_LENGTH = 20
+PANEL_NO_LENGTH = 20
+PSN_LENGTH = 20
+KEYWORD_LENGTH = 4
+BOMVER_MO_LENGTH = 15
+PCB_PRODUCT_NAME_LENGTH = 20
+PCB_NUMBER_LENGTH = 50
+CRLF = "\r\n"
+
+
+@lru_cache(maxsize=None)
+def psnResponseLayout(psn_count: int) -> FrameLayout:
+    """MODE1 response: MO 20 + PANEL 20 + N x PSN 20 + PASS 4"""
+    return FrameLayout(
+        Field("mo", MO_LENGTH),
+        Field("panel_no", PANEL_NO_LENGTH),
+        Field("psn_list", PSN_LENGTH, count=psn_count),
+        Field("keyword", KEYWORD_LENGTH, literal="PASS"),
+    )
+
+
+@lru_cache(maxsize=None)
+def needPsnLayout(keyword: str) -> FrameLayout:
+    """MODE1 request: MO 20 + PANEL 20 (để trống) + NEEDPSN<n> + CRLF"""
+    return FrameLayout(
+        Field("mo", MO_LENGTH),
+        Field("panel_no", PANEL_NO_LENGTH),
+        Field("keyword", len(keyword), literal=keyword),
+        terminator=CRLF,
+    )
+
+
+@lru_cache(maxsize=None)
+def bomverLayout() -> FrameLayout:
+    """MODE2 request 1: MO 15 + PCB product name 20 + NEEDBOMVER + CRLF"""
+    return FrameLayout(
+        Field("mo", BOMVER_MO_LENGTH),
+        Field("pcb_product_name", PCB_PRODUCT_NAME_LENGTH),
+        Field("keyword", len("NEEDBOMVER"), literal="NEEDBOMVER"),
+        terminator=CRLF,
+    )
+
+
+@lru_cache(maxsize=None)
+def bomverNeedSnLayout(keyword: str) -> FrameLayout:
+    """MODE2 request 2: MO 15 + PCB number 50 + NEEDSN<n> + CRLF"""
+    return FrameLayout(
+        Field("mo", BOMVER_MO_LENGTH),
+        Field("pcb_number", PCB_NUMBER_LENGTH),
+        Field("keyword", len(keyword), literal=keyword),
+        terminator=CRLF,
+    )
@@ -7,6 +7,7 @@ from unittest import result
 from PySide6.QtCore import QObject, Signal
 from utils.setting import settings_manager
 from utils.Logging import getLogger
+from model.sfis_codec import psnResponseLayout, needPsnLayout, bomverLayout, bomverNeedSnLayout
 log = getLogger()
 
 @dataclass
@@ -56,32 +57,18 @@ class SFISModel(QObject):
     def parseResponsePsn(self, response):
         """Parse response PSN from SFIS (dynamic based on expected PSN count)"""
         try:
-            expected_length = self.MO_LENGTH + self.PANEL_NO_LENGTH + (self.PSN_LENGTH * self.PSN_COUNT) + 4
-            
-            if len(response) < expected_length:
-                self.validation_error.emit(f"Response quá ngắn: {len(response)} < {expected_length}")
+            layout = psnResponseLayout(self.PSN_COUNT)
+            if len(response) < layout.size:
+                self.validation_error.emit(f"Response quá ngắn: {len(response)} < {layout.size}")
                 return None
-            # Parse các field
-            pos = 0
-            mo = response[pos:pos + self.MO_LENGTH].strip()
-            pos += self.MO_LENGTH
-            log.info(f"MO: {mo}")
-            panel_no = response[pos:pos + self.PANEL_NO_LENGTH].strip()
-            pos += self.PANEL_NO_LENGTH
-            log.info(f"Panel No: {panel_no}")
-            # Parse 10 PSN
-            psn_list = []
-            for i in range(self.PSN_COUNT):
-                psn = response[pos:pos + self.PSN_LENGTH].strip()
-                psn_list.append(psn)
-                pos += self.PSN_LENGTH
-                log.info(f"PSN{i}: {psn}")
+            fields = layout.decode(response)
+            mo, panel_no, psn_list = fields["mo"], fields["panel_no"], fields["psn_list"]
             # Kiểm tra PASS
-            pass_keyword = response[pos:pos + 4]
+            pass_keyword = fields["keyword"]
             if pass_keyword != self.PASS_KEYWORD:
                 self.validation_error.emit(f"Không tìm thấy PASS keyword: {pass_keyword}")
                 return None
-            log.info(f"PASS Keyword: {pass_keyword}")
+            log.info(f"MO: {mo}, Panel No: {panel_no}, PSN x{len(psn_list)}: {', '.join(psn_list)}")
             # Cập nhật current_data
             self.current_data.mo = mo
             self.current_data.panel_no = panel_no
@@ -98,11 +85,8 @@ class SFISModel(QObject):
     def createFormatNeedPSN(self, mo=None, panel_num=None):
         try:
             need_keyword = f"{self.NEED_KEYWORD}PSN{panel_num}" 
-            mo_padded = str(mo).ljust(20)[:20] #MO: 20 bytes
-            panel_padded = "".ljust(20) # Panel Number: 20 bytes (để trống)
-            
-            # Tạo START signal: 20 + 20 + 9 = 49 bytes
-            start_signal = f"{mo_padded}{panel_padded}{need_keyword}\r\n"
+            # Tạo START signal: MO 20 + Panel Number 20 (để trống) + NEEDPSN<n>
+            start_signal = needPsnLayout(need_keyword).format(mo=mo)
             log.info(f"START signal: {start_signal}")
             # Lưu vào current_data
             self.current_data.mo = mo
@@ -118,11 +102,8 @@ class SFISModel(QObject):
             self.validation_error.emit(f"Create START signal error: {str(e)}")
             return None
     def createFormatBOMVER(self, mo=None, pcb_product_name=None):
-        key ="NEEDBOMVER"
         try:
-            mo_padded = str(mo).ljust(15)[:15]
-            pcb_product_name_padded = str(pcb_product_name).ljust(20)[:20]
-            result = f"{mo_padded}{pcb_product_name_padded}{key}\r\n"
+            result = bomverLayout().format(mo=mo, pcb_product_name=pcb_product_name)
             log.info(f"Data Create: {result}")
             return result
         except Exception as e:
@@ -132,12 +113,9 @@ class SFISModel(QObject):
     def createFormatBOMVERNeedSN(self, mo=None, pcb_number=None):
         try:
             needsn_keyword = f"{self.NEED_KEYWORD}SN{self.PSN_COUNT}"
-            mo_padded = str(mo).ljust(15)[:15]
-            pcb_number_padded = str(pcb_number).ljust(50)[:50]
-
             self.current_data.mo = mo
             self.current_data.pcb_number = pcb_number
-            result = f"{mo_padded}{pcb_number_padded}{needsn_keyword}\r\n"
+            result = bomverNeedSnLayout(needsn_keyword).format(mo=mo, pcb_number=pcb_number)
             log.info(f"Data Create: {result}")
             return result
         except Exception as e:
@@ -1,21 +1,25 @@
 """
 Presenter Package - Điều phối giữa View và Model
+Import lazy: chế độ headless (main.py --headless) chỉ import presenter.station_presenter,
+không kéo theo QtWidgets của MainPresenter / TopTopPresenter
 """
-from presenter.main_presenter import MainPresenter
-from presenter.base_presenter import BasePresenter
-from presenter.sfis_presenter import SFISPresenter
-from presenter.plc_presenter import PLCPresenter
-from presenter.laser_presenter import LaserPresenter
-from presenter.toptop_presenter import TopTopPresenter
-from presenter.project_presenter import ProjectPresenter
+from importlib import import_module
 
-__all__ = [
-    'MainPresenter',
-    'BasePresenter',
-    'SFISPresenter',
-    'PLCPresenter',
-    'LaserPresenter',
-    'TopTopPresenter',
-    'ProjectPresenter',
-]
+_EXPORTS = {
+    'MainPresenter': 'presenter.main_presenter',
+    'BasePresenter': 'presenter.base_presenter',
+    'StationPresenter': 'presenter.station_presenter',
+    'SFISPresenter': 'presenter.sfis_presenter',
+    'PLCPresenter': 'presenter.plc_presenter',
+    'LaserPresenter': 'presenter.laser_presenter',
+    'TopTopPresenter': 'presenter.toptop_presenter',
+    'ProjectPresenter': 'presenter.project_presenter',
+}
 
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'presenter' has no attribute '{name}'")
+    return getattr(import_module(_EXPORTS[name]), name)
@@ -1,16 +1,18 @@
 """
 Laser Presenter - Xử lý logic giao tiếp Laser Marking System
 """
-from PySide6.QtCore import QTimer, Signal
+from PySide6.QtCore import Signal
 from presenter.base_presenter import BasePresenter
 from utils.setting import settings_manager
 from workers.laser_worker import LaserWorker
 from utils.schema import LaserConnectMode
 from utils.Logging import getLogger
+from utils.cycle_trace import cycle_tracer
 from model.laser_model import LaserModel
-from utils.setting import settings_manager
-from time import sleep
+from model.laser_protocol import LaserReplyError
+from time import sleep, perf_counter
 from workers.marking_worker import MarkingWorker
+from workers.reconnect_scheduler import reconnect_scheduler
 # Khởi tạo logger
 log = getLogger()
 
@@ -27,9 +29,9 @@ class LaserPresenter(BasePresenter):
         self.laser_port = settings_manager.get("connection.laser.port", )
         self.laser_com_port = settings_manager.get("connection.laser.com_port", )
         self.laser_baudrate = settings_manager.get("connection.laser.baudrate", )
-        self.default_script = str(settings_manager.get("project.script", ))
-        self.command_timeout_ms = settings_manager.get("connection.laser.timeout_ms", )
-        self.delay_step = settings_manager.get("project.delay_step", 0)
+        # Script / timeout / delay / retry: đọc từ snapshot, cập nhật lại khi settings thay đổi
+        self.applySettings(settings_manager.snapshot())
+        settings_manager.settingsChanged.connect(self.applySettings)
         self.worker = LaserWorker(
             mode=self.laser_mode,
             ip=self.laser_ip,
@@ -37,16 +39,30 @@ class LaserPresenter(BasePresenter):
             timeout_ms=self.command_timeout_ms,
             com_port=self.laser_com_port,
             baudrate=self.laser_baudrate,
+            async_io=settings_manager.get("advanced.async_io", False),
+            keepalive_ms=(
+                settings_manager.get("connection.laser.keepalive_idle_ms", 5000),
+                settings_manager.get("connection.laser.keepalive_interval_ms", 1000),
+                settings_manager.get("connection.laser.keepalive_count", 3),
+            ),
         )
         self.is_connected = False
         
-        # Auto-reconnect timer (check mỗi 5 giây)
-        self.reconnect_timer = QTimer()
-        self.reconnect_timer.timeout.connect(self._checkAndReconnect)
-        self.reconnect_ms = 5000  # 5 giây
+        # Auto-reconnect: dùng chung ReconnectScheduler (backoff có jitter)
         self.auto_reconnect_enabled = True
+        reconnect_scheduler.register("Laser", self.worker.checkConnectionAlive, self.probeConnect, self._onLinkChanged)
         
         log.info("LaserPresenter initialized successfully")
+
+    def applySettings(self, settings):
+        """Nhận SettingsSnapshot mới (không đổi kết nối IP / COM, cần restart)"""
+        self.default_script = str(settings.script)
+        self.command_timeout_ms = settings.laser_timeout_ms
+        self.delay_step = settings.delay_step
+        # Ack-driven: gửi lệnh kế tiếp ngay khi nhận GA,0 / C2,0 / NT,0 (bỏ delay_step)
+        self.ack_driven = settings.laser_ack_driven
+        self.retry_count = settings.laser_retry_count
+        self.retry_backoff_ms = settings.laser_retry_backoff_ms
     # ------------------------------------------------------------------
     # Connection
     # ------------------------------------------------------------------
@@ -86,7 +102,7 @@ class LaserPresenter(BasePresenter):
     def disconnect(self):
         """Ngắt kết nối Laser System"""
         self.auto_reconnect_enabled = False
-        self.reconnect_timer.stop()
+        reconnect_scheduler.disable("Laser")
 
         if not self.is_connected:
             return
@@ -113,6 +129,11 @@ class LaserPresenter(BasePresenter):
             self.show_success("GA command completed")
             log.info("GA command completed")
             return True
+        except LaserReplyError as exc:
+            # Controller trả mã lỗi: gửi lại không có tác dụng
+            self.show_error(f"Error: {exc}")
+            log.error(f"Error: {exc}")
+            return False
         except (RuntimeError, TimeoutError, OSError) as exc:
             # Phát hiện mất kết nối khi gửi lệnh thất bại   
             try:
@@ -143,6 +164,11 @@ class LaserPresenter(BasePresenter):
             self.show_success("C2 command completed")
             log.info("C2 command completed")
             return True
+        except LaserReplyError as exc:
+            # Controller trả mã lỗi: gửi lại không có tác dụng
+            self.show_error(f"Error: {exc}")
+            log.error(f"Error: {exc}")
+            return False
         except (RuntimeError, TimeoutError, OSError) as exc:
             # Phát hiện mất kết nối khi gửi lệnh thất bại
             # self._handle_connection_lost()
@@ -173,6 +199,11 @@ class LaserPresenter(BasePresenter):
             self.show_success("NT command completed")
             log.info("NT command completed")
             return True
+        except LaserReplyError as exc:
+            # Controller trả mã lỗi: gửi lại không có tác dụng
+            self.show_error(f"Error: {exc}")
+            log.error(f"Error: {exc}")
+            return False
         except (RuntimeError, TimeoutError, OSError) as exc:
             # Phát hiện mất kết nối khi gửi lệnh thất bại
             # self._handle_connection_lost()
@@ -204,14 +235,28 @@ class LaserPresenter(BasePresenter):
 
             self.show_info("=== START LASER MARKING ===")
             log.info("=== START LASER MARKING ===")
+            if self.ack_driven:
+                return self._startAckDrivenMarking(script_id, content)
+
+            timings = []
+            process_start = start = perf_counter()
             if not self.activateScript(script_id):
                 return False
+            cycle_tracer.mark("ga_ack")
+            timings.append(("GA", perf_counter() - start))
             sleep(self.delay_step)
+            start = perf_counter()
             if not self.setContent(script_id, content):
                 return False
+            cycle_tracer.mark("c2_ack")
+            timings.append(("C2", perf_counter() - start))
             sleep(self.delay_step)
+            start = perf_counter()
             if not self.startMarking():
                 return False
+            cycle_tracer.mark("nt_ack")
+            timings.append(("NT", perf_counter() - start))
+            self._logStepTimings("sleep-based", timings, perf_counter() - process_start)
             self.show_success("===LASER MARKING COMPLETED===")
             log.info("===LASER MARKING COMPLETED===")
             return True
@@ -220,6 +265,65 @@ class LaserPresenter(BasePresenter):
             log.error(f"Error: {e}")
             return False
 
+    def _startAckDrivenMarking(self, script_id, content):
+        """GA -> C2 -> NT không sleep giữa các bước: lệnh sau gửi ngay khi nhận ack của lệnh trước"""
+        script_id = str(script_id)
+        steps = (
+            ("GA", lambda: self.worker.send_ga(script_id, timeout_ms=self.command_timeout_ms)),
+            ("C2", lambda: self.worker.send_c2(script_id, content, timeout_ms=self.command_timeout_ms)),
+            ("NT", lambda: self.worker.send_nt(timeout_ms=self.command_timeout_ms)),
+        )
+        timings = []
+        process_start = perf_counter()
+        for name, send in steps:
+            elapsed = self._sendWithBackoff(name, send)
+            if elapsed is None:
+                return False
+            cycle_tracer.mark(f"{name.lower()}_ack")
+            timings.append((name, elapsed))
+        self._logStepTimings("ack-driven", timings, perf_counter() - process_start)
+        self.show_success("===LASER MARKING COMPLETED===")
+        log.info("===LASER MARKING COMPLETED===")
+        return True
+
+    def _sendWithBackoff(self, name, send):
+        """
+        Gửi 1 lệnh, retry với exponential backoff (retry_backoff_ms, x2 mỗi lần).
+        Trả về thời gian (s) của lần gửi thành công, None nếu hết số lần retry hoặc controller trả mã lỗi.
+        """
+        last_exc = None
+        for attempt in range(self.retry_count + 1):
+            if attempt:
+                sleep(self.retry_backoff_ms * (2 ** (attempt - 1)) / 1000)
+                if not self.worker.is_connected and not self.connect():
+                    last_exc = RuntimeError("laser not connected")
+                    log.warning(f"{name} attempt {attempt + 1}/{self.retry_count + 1} skipped: {last_exc}")
+                    continue
+            start = perf_counter()
+            try:
+                send()
+                elapsed = perf_counter() - start
+                if attempt:
+                    self.show_success(f"{name} command completed (retry {attempt})")
+                    log.info(f"{name} command completed (retry {attempt})")
+                return elapsed
+            except LaserReplyError as exc:
+                self.show_error(f"{name} failed: {exc}")
+                log.error(f"{name} failed: {exc}")
+                return None
+            except (RuntimeError, TimeoutError, OSError) as exc:
+                last_exc = exc
+                log.warning(f"{name} attempt {attempt + 1}/{self.retry_count + 1} failed: {exc}")
+        self.show_error(f"{name} failed: {last_exc}")
+        log.error(f"{name} failed after {self.retry_count + 1} attempts: {last_exc}")
+        return None
+
+    def _logStepTimings(self, mode, timings, total):
+        """Log thời gian từng bước GA/C2/NT và tổng thời gian (kể cả delay) theo ms"""
+        detail = ", ".join(f"{name}={elapsed * 1000:.1f}ms" for name, elapsed in timings)
+        log.info(f"Laser step timings ({mode}): {detail}, total={total * 1000:.1f}ms")
+        self.show_info(f"Laser timings: {detail}")
+
     def sendCustomCommand(self, command, expect_keyword=None):
         if not self._ensure_connection():
             return False
@@ -272,11 +376,19 @@ class LaserPresenter(BasePresenter):
     # ------------------------------------------------------------------
     def _ensure_connection(self):
         if self.is_connected:
-            if not self.worker.checkConnectionAlive():
-                self.worker.is_connected = False
-                self._handle_connection_lost()
-                return False
-            return True
+            if self.worker.checkConnectionAlive():
+                return True
+            # Link chết giữa 2 cycle: kết nối lại ngay trước lệnh thay vì chịu timeout + retry
+            log.warning("Laser link dead before command - reconnecting")
+            try:
+                if self.worker.ensureConnected():
+                    log.info("Laser reconnected before command")
+                    return True
+            except (RuntimeError, OSError) as exc:
+                log.warning(f"Laser reconnect failed: {exc}")
+            self.worker.is_connected = False
+            self._handle_connection_lost()
+            return False
         return self.connect()
     
     def _handle_connection_lost(self):
@@ -287,64 +399,51 @@ class LaserPresenter(BasePresenter):
             self.connectionStatusChanged.emit(False)
             log.warning("Laser connection lost - updating UI immediately")
             self.show_warning("Laser connection lost")
+            reconnect_scheduler.hint("Laser")  # thử kết nối lại ngay trước panel kế tiếp
 
-    def startAutoConnectLaser(self):
-        """Bắt đầu tự động kết nối và duy trì kết nối"""
+    def startAutoConnectLaser(self, connect_now: bool = True):
+        """Bắt đầu tự động kết nối và duy trì kết nối (connect_now=False: lần kết nối đầu đã chạy qua probeConnect)"""
         self.auto_reconnect_enabled = True
         # log.info("Starting auto-connect for laser controller...")
         # self.show_info("Auto-connecting to laser controller...")
-        self._tryConnect()
-        self.reconnect_timer.start(self.reconnect_ms)
-        log.info(f"Laser auto-connect started ({self.reconnect_ms}ms)")
+        reconnect_scheduler.enable("Laser", connect_now=connect_now)
+        log.info("Laser auto-connect started")
 
     def stopAutoConnect(self):
         """Dừng tự động kết nối"""
         self.auto_reconnect_enabled = False
-        self.reconnect_timer.stop()
+        reconnect_scheduler.disable("Laser")
         log.info("Auto-reconnect stopped")
 
-    def _tryConnect(self):
-        """Thử kết nối đến laser (không log nhiều để tránh spam)"""
-        if not self.auto_reconnect_enabled:
-            return
-        
-        try:
-            if not self.is_connected:
-                if self.laser_mode == LaserConnectMode.TCP:
-                    self.worker.connect(self.laser_ip, self.laser_port)
-                    description = f"{self.laser_ip}:{self.laser_port}"
-                else:
-                    self.worker.connect(com_port=self.laser_com_port, baudrate=self.laser_baudrate)
-                    description = f"{self.laser_com_port} baudrate: {self.laser_baudrate}bps"
-                self.is_connected = True
-                self.connectionStatusChanged.emit(True)
-                self.show_success(f"Laser auto-connected: {description}")
-                log.info(f"Laser auto-connected: {description}")
-        except Exception as exc:
-            # Chỉ log khi lần đầu fail hoặc khi reconnect thành công sau khi fail
-            if self.is_connected:
-                # Nếu trước đó đã connected nhưng bây giờ fail, có thể connection bị mất
-                self.is_connected = False
-                self.connectionStatusChanged.emit(False)
-                log.warning(f"Laser connection lost: {exc}")
-            # Không log mỗi lần fail để tránh spam log
+    def probeConnect(self):
+        """
+        Kết nối laser (blocking tới timeout_ms) - ConnectionOrchestrator / ReconnectScheduler gọi ngoài GUI thread.
+        Kết nối còn sống (VD _ensure_connection vừa kết nối lại) thì giữ nguyên.
+        Lỗi được raise; trạng thái presenter cập nhật trong onProbeFinished (GUI thread)
+        """
+        return self.worker.ensureConnected()
 
-    def _checkAndReconnect(self):
-        """Kiểm tra và tự động kết nối lại nếu bị ngắt"""
-        if not self.auto_reconnect_enabled:
-            return
-        worker_connected = self.worker.checkConnectionAlive()
-        # Nếu trạng thái không khớp, cập nhật ngay lập tức
-        if self.is_connected != worker_connected:
-            self.is_connected = worker_connected
-            self.connectionStatusChanged.emit(worker_connected)
-            if not worker_connected:
-                log.warning("Laser connection lost detected, attempting to reconnect...")
-                self.show_warning("Laser connection lost - reconnecting...")
-        
-        # Nếu chưa kết nối, thử kết nối lại
-        if not self.is_connected:
-            self._tryConnect()
+    def onProbeFinished(self, connected):
+        """Kết quả probeConnect: đồng bộ trạng thái + UI"""
+        if connected and self.worker.is_connected and not self.is_connected:
+            if self.laser_mode == LaserConnectMode.TCP:
+                description = f"{self.laser_ip}:{self.laser_port}"
+            else:
+                description = f"{self.laser_com_port} baudrate: {self.laser_baudrate}bps"
+            self.is_connected = True
+            self.connectionStatusChanged.emit(True)
+            self.show_success(f"Laser auto-connected: {description}")
+            log.info(f"Laser auto-connected: {description}")
+
+    def _onLinkChanged(self, connected):
+        """ReconnectScheduler: link laser rớt / đã kết nối lại"""
+        if connected:
+            self.onProbeFinished(True)
+        elif self.is_connected:
+            self.is_connected = False
+            self.connectionStatusChanged.emit(False)
+            log.warning("Laser connection lost detected, attempting to reconnect...")
+            self.show_warning("Laser connection lost - reconnecting...")
 
     def cleanup(self):
         """Dọn dẹp tài nguyên"""
@@ -353,9 +452,6 @@ class LaserPresenter(BasePresenter):
         self.connectionStatusChanged.emit(False)
 
         self.auto_reconnect_enabled = False
-        if self.reconnect_timer.isActive():
-            self.reconnect_timer.stop()
-    
         self.stopAutoConnect()
         self.disconnect()
     
\ No newline at end of file
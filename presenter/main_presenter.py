@@ -2,14 +2,10 @@
 Main Presenter - Điều phối giữa View (GUI) và các Presenter con
 """
 from re import L
-from PySide6.QtCore import Signal, QThread
-from presenter.sfis_presenter import SFISPresenter
-from presenter.plc_presenter import PLCPresenter
-from presenter.laser_presenter import LaserPresenter
+from PySide6.QtCore import Signal
+from presenter.station_presenter import StationPresenter
 from presenter.toptop_presenter import TopTopPresenter
 from presenter.project_presenter import ProjectPresenter
-from workers.marking_worker import MarkingWorker
-from PySide6.QtCore import QCoreApplication
 from utils.Logging import getLogger
 from presenter.base_presenter import BasePresenter
 from utils.setting import settings_manager
@@ -18,7 +14,6 @@ from utils.restartApp import restartApp
 log = getLogger()
 
 
-
 class MainPresenter(BasePresenter):
     """Presenter chính - điều phối toàn bộ ứng dụng"""
     
@@ -30,33 +25,31 @@ class MainPresenter(BasePresenter):
     def __init__(self, main_window):
         super().__init__()        
         self.main_window = main_window
-        self.sfis_presenter = SFISPresenter()
-        self.plc_presenter = PLCPresenter()
-        self.laser_presenter = LaserPresenter()
+        # Lõi trạm (SFIS / PLC / laser, marking worker, auto-connect) - dùng chung với chế độ headless
+        self.station = StationPresenter()
+        self.sfis_presenter = self.station.sfis_presenter
+        self.plc_presenter = self.station.plc_presenter
+        self.laser_presenter = self.station.laser_presenter
+        self.marking_worker = self.station.marking_worker
+        self.marking_thread = self.station.marking_thread
+        self.connect_orchestrator = self.station.connect_orchestrator
         self.toptop_presenter = TopTopPresenter()
         self.project_presenter = ProjectPresenter()
         self.setting_window = None
         self.about_window = None
         
-        # Khởi tạo marking worker và thread
-        self.marking_worker = MarkingWorker(
-            self.sfis_presenter,
-            self.laser_presenter,
-            settings_manager
-        )
-        self.marking_thread = QThread()
-        self.marking_worker.moveToThread(self.marking_thread)
-        
         # Kết nối signals
         self.connectSignals()
         self._connectMarkingWorkerSignals()
-        
-        # Khởi động marking thread
-        self.marking_thread.start()
-        
-        # Trạng thái
-        self.isRunning = False
         log.info("MainPresenter initialized successfully")
+
+    @property
+    def isRunning(self):
+        return self.station.isRunning
+
+    @isRunning.setter
+    def isRunning(self, running):
+        self.station.isRunning = running
         
     def connectSignals(self):
         """Kết nối các signals giữa View và các Presenter con"""
@@ -97,16 +90,18 @@ class MainPresenter(BasePresenter):
         self.sfis_presenter.connectionStatusChanged.connect(self.onSfisConnectionChanged)
         self.sfis_presenter.startSignalSent.connect(self.onStartSignalSent)
         
-        # PLC Presenter signals
+        # PLC Presenter signals (READY -> marking do StationPresenter xử lý)
         self.plc_presenter.logMessage.connect(self.forwardLog)
         self.plc_presenter.connectionStatusChanged.connect(self.onPlcConnectionChanged)
-        # Khi PLC gửi tín hiệu READY thì tự động bắt đầu quy trình test (giống như bấm START)
-        self.plc_presenter.readyReceived.connect(self.startAutomationMarkingLaser)
         
         # Laser Presenter signals
         self.laser_presenter.logMessage.connect(self.forwardLog)
         self.laser_presenter.connectionStatusChanged.connect(self.onLaserConnectionChanged)
         
+        # Station signals
+        self.station.logMessage.connect(self.forwardLog)
+        self.station.cycleStarted.connect(self.onCycleStarted)
+        
         # TopTop Presenter signals
         self.toptop_presenter.logMessage.connect(self.forwardLog)
         self.toptop_presenter.modelChanged.connect(self.onModelChangedFromPresenter)
@@ -122,11 +117,9 @@ class MainPresenter(BasePresenter):
         self.statusChanged.connect(self.updateStatusBar)
     
     def _connectMarkingWorkerSignals(self):
-        """Kết nối signals từ MarkingWorker"""
+        """Kết nối signals từ MarkingWorker / StationPresenter để cập nhật panel"""
         self.marking_worker.statusChanged.connect(self.onMarkingStatusChanged)
-        self.marking_worker.progressUpdate.connect(self.onMarkingProgressUpdate)
-        self.marking_worker.finished.connect(self.onMarkingFinished)
-        self.marking_worker.error.connect(self.onMarkingError)
+        self.station.cycleFinished.connect(self.onMarkingFinished)
     
     def forwardLog(self, message, level):
         """Forward log from sub-presenters to View"""
@@ -169,14 +162,8 @@ class MainPresenter(BasePresenter):
         # Reset timer
         leftPanel.resetTimer()
         
-        # Tự động kết nối SFIS, PLC và laser (chạy song song với QTimer)
-        self.laser_presenter.startAutoConnectLaser()
-        self.sfis_presenter.startAutoConnectSFIS()
-        self.plc_presenter.startAutoConnectPLC()
-        self.plc_presenter.startReceiverPLC()
-
-        self.show_info(f"[_______SYSTEM IS READY!_______]")
-        log.info("[_______SYSTEM IS READY!_______]")
+        # Tự động kết nối SFIS, PLC và laser song song ngoài GUI thread (mỗi thiết bị 1 deadline)
+        self.station.initialize()
 
     def onSfisConnectRequested(self, shouldConnect, portName):
         """Xử lý yêu cầu kết nối/ngắt kết nối SFIS từ nút toggle"""
@@ -229,45 +216,10 @@ class MainPresenter(BasePresenter):
         log.info("START signal sent successfully - waiting for response...")
         self.show_info("START signal sent successfully - waiting for response...")
     
-    def startAutomationMarkingLaser(self, message):
-        try:
-            if message == "Ready" or "READY":
-                log.info(f"PLC received:[{message}] --> start marking process")
-                self.show_info(f"PLC received:[{message}] --> start marking process")
-                log.info(f"=========START AUTOMATION MARKING LASER=========")
-                self.show_info(f"=========START AUTOMATION MARKING LASER=========")
-                
-                # Check if already running
-                if self.isRunning:
-                    log.warning("Marking process already running")
-                    self.show_warning("Marking process already running, please wait...")
-                    return False
-                
-                # Mark as running
-                self.isRunning = True
-                
-                # Start timer
-                left_panel = self.main_window.getLeftPanel()
-                left_panel.startTimer()
-                
-                # Start marking in worker thread
-                from PySide6.QtCore import QMetaObject, Qt
-                QMetaObject.invokeMethod(
-                    self.marking_worker,
-                    "startMarking",
-                    Qt.QueuedConnection
-                )
-                
-                return True
-            else:
-                log.info(f"PLC received:[{message}] --> Wrong signal cannot start")
-                self.show_info(f"PLC received:[{message}] --> Wrong signal cannot start")
-                return False
-        except Exception as e:
-            log.error(f"Error starting automation marking laser: {e}")
-            self.show_error(f"Error starting automation marking laser: {e}")
-            self.isRunning = False
-            return False
+    def onCycleStarted(self):
+        """PLC Ready đã bắt đầu 1 cycle marking: chạy đồng hồ trên LeftPanel"""
+        left_panel = self.main_window.getLeftPanel()
+        left_panel.startTimer()
     
     def _resetToStandby(self):
         """Reset system to STANDBY state"""
@@ -291,43 +243,18 @@ class MainPresenter(BasePresenter):
         except Exception as e:
             log.error(f"Error handling status change: {e}")
     
-    def onMarkingProgressUpdate(self, message):
-        """Handle progress update from marking worker"""
-        self.show_info(message)
-        log.info(f"Progress: {message}")
-    
-    def onMarkingFinished(self, success):
-        """Handle marking process finished"""
+    def onMarkingFinished(self, success, elapsed):
+        """Cycle marking đã xong (PLC OK / cycle trace do StationPresenter xử lý): dừng đồng hồ, về STANDBY sau 3s"""
         try:
             left_panel = self.main_window.getLeftPanel()
             left_panel.stopTimer()
-            elapsed = left_panel.getElapsedTime()
-            
-            if success:
-                self.plc_presenter.sendPLC_OK()
-                self.show_success(f"Marking completed successfully in {elapsed}s")
-                log.info(f"=========MARKING LASER PROCESS SUCCESSFULLY in {elapsed}s=========")
-            else:
-                self.show_error(f"Marking failed after {elapsed}s")
-                log.error(f"=========MARKING LASER PROCESS FAILED in {elapsed}s=========")
             
             # Reset to STANDBY after delay
             from PySide6.QtCore import QTimer
             QTimer.singleShot(3000, self._resetToStandby)
-            
-            # Mark as not running
-            self.isRunning = False
-            
         except Exception as e:
             log.error(f"Error handling marking finished: {e}")
-            self.isRunning = False
-    
-    def onMarkingError(self, error_msg):
-        """Handle error from marking worker"""
-        self.show_error(error_msg)
-        log.error(f"Marking error: {error_msg}")
 
-    
     def onSfisConnectionChanged(self, isConnected):
         """Cập nhật trạng thái SFIS trên cả TopPanel và BottomStatus"""
         topPanel = self.main_window.getTopPanel()
@@ -500,9 +427,9 @@ class MainPresenter(BasePresenter):
     def onSendActivateSFIS(self):
         """Handle menu 'Activate SFIS'"""
         try:
-            self.sfis_presenter.activateSFIS()
-            self.show_success("Activate SFIS successfully")
-            log.info("Activate SFIS successfully")
+            # Kết quả báo qua SFISPresenter.onActivated
+            if self.sfis_presenter.activateSFIS():
+                log.info("Activate SFIS requested")
         except Exception as e:
             self.show_error(f"Failed to activate SFIS: {e}")
             log.error(f"Failed to activate SFIS: {e}")
@@ -698,30 +625,9 @@ class MainPresenter(BasePresenter):
 
     def cleanup(self):
         """Dọn dẹp tài nguyên khi đóng ứng dụng"""
-        # Stop marking worker
-        if hasattr(self, 'marking_worker'):
-            self.marking_worker.stop()
-        QCoreApplication.processEvents()
-        QThread.msleep(50) #Đợi 50ms để đảm bảo dữ liệu được gửi đi
-        # Stop marking thread
-        if hasattr(self, 'marking_thread') and self.marking_thread.isRunning():
-            self.marking_thread.quit()
-            self.marking_thread.wait(3000)
-        
-        # Cleanup presenters 
-        self.sfis_presenter.cleanup()
-        self.plc_presenter.cleanup()
-        self.laser_presenter.cleanup()
         self.toptop_presenter.cleanup()
         self.project_presenter.cleanup()
-        QThread.msleep(200) #Đợi 200ms để đảm bảo dữ liệu được gửi đi
-
-        # Stop marking thread
-        if hasattr(self, 'marking_thread') and self.marking_thread.isRunning():
-            self.marking_thread.quit()
-            if not self.marking_thread.wait(5000):
-                self.marking_thread.terminate()
-                self.marking_thread.wait()
+        self.station.cleanup()
 
         self.show_info("Cleanup completed")
-        log.info("Cleanup completed")
\ No newline at end of file
+        log.info("Cleanup completed")
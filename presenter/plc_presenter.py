@@ -1,11 +1,13 @@
 """
 PLC Presenter - Xử lý logic giao tiếp PLC (Programmable Logic Controller)
 """
-from PySide6.QtCore import QThread, QMetaObject, Qt, Q_ARG, Signal, QTimer
+from PySide6.QtCore import QThread, QMetaObject, Qt, Q_ARG, Signal
 
 from presenter.base_presenter import BasePresenter
 from workers.plc_worker import PLCWorker
+from workers.reconnect_scheduler import reconnect_scheduler
 from utils.Logging import getLogger
+from utils.cycle_trace import cycle_tracer
 
 
 log = getLogger()
@@ -28,11 +30,9 @@ class PLCPresenter(BasePresenter):
         self.is_connected = False
         self.current_port = self.plc_worker.port_name
 
-        # Auto-reconnect timer
-        self.reconnect_timer = QTimer()
-        self.reconnect_timer.timeout.connect(self._checkAndReconnect)
-        self.reconnect_ms = 5000  # 5 giây
+        # Auto-reconnect: dùng chung ReconnectScheduler (backoff có jitter)
         self.auto_reconnect_enabled = False
+        reconnect_scheduler.register("PLC", self.plc_worker.checkConnectionAlive, self.probeConnect, self._onLinkChanged)
 
     def _connectSignals(self):
         self.plc_worker.error_occurred.connect(self.onPLCError)
@@ -85,21 +85,20 @@ class PLCPresenter(BasePresenter):
         #     Qt.QueuedConnection,
         # )
     # ------------------------------Auto connect / reconnect-------------------------------
-    def startAutoConnectPLC(self, port_name: str | None = None):
-        """Bắt đầu tự động kết nối PLC"""
+    def startAutoConnectPLC(self, port_name: str | None = None, connect_now: bool = True):
+        """Bắt đầu tự động kết nối PLC (connect_now=False: lần kết nối đầu đã chạy qua probeConnect)"""
         self.auto_reconnect_enabled = True
         if port_name:
             self.current_port = port_name
         # self.show_info(f"[PLC] Auto-connect enabled on {self.current_port}")
         # log.info(f"[PLC] Auto-connect enabled on {self.current_port}")
-        self._tryConnect()
-        self.reconnect_timer.start(self.reconnect_ms)
-        log.info(f"PLC auto-connect started ({self.reconnect_ms}ms)")
+        reconnect_scheduler.enable("PLC", connect_now=connect_now)
+        log.info(f"PLC auto-connect started on {self.current_port}")
    
     def stopAutoConnectPLC(self):
         """Dừng tự động kết nối PLC."""
         self.auto_reconnect_enabled = False
-        self.reconnect_timer.stop()
+        reconnect_scheduler.disable("PLC")
         log.info("[PLC] Auto-connect stopped")
 
     #-----------------------------send to PLC-----------------------------
@@ -115,7 +114,10 @@ class PLCPresenter(BasePresenter):
         )
 
     def sendPLC_OK(self):
-        return self.sendData_PLC("OK")
+        success = self.sendData_PLC("OK")
+        if success:
+            cycle_tracer.mark("plc_ok_sent")
+        return success
 
     def sendPLC_NG(self):
         return self.sendData_PLC("NG")
@@ -139,6 +141,8 @@ class PLCPresenter(BasePresenter):
         self.readyReceived.emit(cleaned)
 
     def onConnectionChanged(self, isConnected):
+        if self.is_connected and not isConnected:
+            reconnect_scheduler.hint("PLC")  # link vừa rớt: thử lại ngay
         self.is_connected = isConnected
         status = "Connected" if isConnected else "Disconnected"
         self.show_info(f"[PLC] {status}")
@@ -146,46 +150,30 @@ class PLCPresenter(BasePresenter):
         self.connectionStatusChanged.emit(isConnected)
 
     #-----------------------------Auto-reconnect helpers-----------------------------
-    def _tryConnect(self):
-        if not self.auto_reconnect_enabled:
-            return
-        if self.is_connected:
-            return
-
-        try:
-            #connect to worker (in worker thread)
-            QMetaObject.invokeMethod(
-                self.plc_worker,
-                "connect",
-                Qt.BlockingQueuedConnection,
-                Q_ARG(str, self.current_port),
-            )
-            if self.plc_worker.is_connected:
-                self.is_connected = True
-                self.show_success(f"[PLC] Auto-connected on {self.current_port}")
-                log.info(f"[PLC] Auto-connected on {self.current_port}")
-        except Exception as exc:
-            log.warning(f"[PLC] Auto-connect failed: {exc}")
-
-    def _checkAndReconnect(self):
-        """Kiểm tra và tự động kết nối lại nếu PLC bị ngắt."""
-        if not self.auto_reconnect_enabled:
-            return
-
-        worker_connected = self.plc_worker.checkConnectionAlive()
-        if self.is_connected != worker_connected:
-            self.is_connected = worker_connected
-            self.plc_worker.connectionStatusChanged.emit(worker_connected)
-
-        if not self.is_connected:
-            self._tryConnect()
+    def probeConnect(self):
+        """Mở cổng PLC trong thread của worker, chặn thread gọi (ConnectionOrchestrator / ReconnectScheduler, không gọi từ GUI thread)"""
+        QMetaObject.invokeMethod(
+            self.plc_worker,
+            "connect",
+            Qt.BlockingQueuedConnection,
+            Q_ARG(str, self.current_port),
+        )
+        return self.plc_worker.is_connected
+
+    def _onLinkChanged(self, connected):
+        """ReconnectScheduler: link PLC rớt / đã kết nối lại"""
+        if connected:
+            self.show_success(f"[PLC] Auto-connected on {self.current_port}")
+            log.info(f"[PLC] Auto-connected on {self.current_port}")
+        if self.is_connected != connected:
+            self.is_connected = connected
+            self.connectionStatusChanged.emit(connected)
 
     #-----------------------------Cleanup-----------------------------
     def cleanup(self):
         #dọn dẹp auto-reconnect
         self.auto_reconnect_enabled = False
-        if self.reconnect_timer.isActive():
-            self.reconnect_timer.stop()
+        reconnect_scheduler.disable("PLC")
         # 2. Stop receiver loop và timer trong worker thread
         self.stopReceiverPLC()
         
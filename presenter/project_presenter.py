@@ -2,11 +2,11 @@
 Project Presenter - Xử lý logic quản lý project (CRUD operations)
 Tách riêng từ TopTopPresenter để tuân thủ Single Responsibility Principle
 """
-import json
 import os
 from PySide6.QtCore import Signal, QThread
 from presenter.base_presenter import BasePresenter
 from workers.project_worker import ProjectWorker
+from model.project_catalogue import project_catalogue
 from utils.Logging import getLogger
 from utils.AppPathService import getAppDirectory
 
@@ -36,9 +36,8 @@ class ProjectPresenter(BasePresenter):
         # Tạo thư mục nếu chưa tồn tại
         os.makedirs(self.app_folder, exist_ok=True)
         
-        # Dữ liệu project
-        self.project_data = []
-        self.project_names = []
+        # Danh mục project dùng chung với TopTopPresenter (index theo Project_Name)
+        self.catalogue = project_catalogue
         
         # Khởi tạo QThread worker
         self.project_worker = ProjectWorker(self.model_json_path)
@@ -63,24 +62,26 @@ class ProjectPresenter(BasePresenter):
         self.project_worker.progress.connect(self.onProjectProgress)
         self.project_worker.projectUpdated.connect(self.onProjectUpdatedSuccess)
         self.project_worker.projectDeleted.connect(self.onProjectDeletedSuccess)
+        self.project_worker.projectAdded.connect(self.onProjectAddedSuccess)
     
     def onProjectDataLoaded(self, data):
         """Xử lý khi dữ liệu project được load thành công"""
         try:
-            self.project_data = data
-            
-            # Trích xuất danh sách Project_Name
-            self.project_names = []
-            for item in self.project_data:
-                project_name = item.get("Project_Name", "")
-                if project_name and project_name not in self.project_names:
-                    self.project_names.append(project_name)
-            
-            # Emit signal
-            self.projectDataLoaded.emit(self.project_data)
+            self.catalogue.load(data)
+            self.catalogue.markSynced(self.project_worker.store)  # worker vừa đọc chính file này
+            self._publishCatalogue()
+        except Exception as e:
+            self.show_error(f"Error processing project data: {str(e)}")
+            log.error(f"ProjectPresenter: Error processing project data: {str(e)}")
+
+    def _publishCatalogue(self):
+        """Emit dữ liệu project hiện có trong catalogue"""
+        try:
+            project_data = self.catalogue.entries()
+            self.projectDataLoaded.emit(project_data)
             
-            self.show_success(f"Loaded {len(self.project_data)} projects")
-            log.info(f"ProjectPresenter: Loaded {len(self.project_data)} projects")
+            self.show_success(f"Loaded {len(project_data)} projects")
+            log.info(f"ProjectPresenter: Loaded {len(project_data)} projects")
             
         except Exception as e:
             self.show_error(f"Error processing project data: {str(e)}")
@@ -96,14 +97,28 @@ class ProjectPresenter(BasePresenter):
         self.show_info(progress_msg)
         log.info(f"ProjectPresenter: {progress_msg}")
     
-    def onProjectUpdatedSuccess(self, project_name):
+    def onProjectUpdatedSuccess(self, project_data):
         """Xử lý khi project được update thành công"""
+        project_name = project_data.get("Project_Name", "")
+        self.catalogue.update(project_data)
+        self.catalogue.markSynced(self.project_worker.store)
         self.projectUpdated.emit(project_name)
         self.show_success(f"Project '{project_name}' updated successfully")
         log.info(f"ProjectPresenter: Project '{project_name}' updated successfully")
     
+    def onProjectAddedSuccess(self, project_data):
+        """Xử lý khi project mới được thêm thành công"""
+        project_name = project_data.get("Project_Name", "")
+        self.catalogue.add(project_data)
+        self.catalogue.markSynced(self.project_worker.store)
+        self.projectAdded.emit(project_name)
+        self.show_success(f"Project '{project_name}' added successfully")
+        log.info(f"ProjectPresenter: Project '{project_name}' added successfully")
+    
     def onProjectDeletedSuccess(self, project_name):
         """Xử lý khi project được xóa thành công"""
+        self.catalogue.remove(project_name)
+        self.catalogue.markSynced(self.project_worker.store)
         self.projectDeleted.emit(project_name)
         self.show_success(f"Project '{project_name}' deleted successfully")
         log.info(f"ProjectPresenter: Project '{project_name}' deleted successfully")
@@ -140,11 +155,8 @@ class ProjectPresenter(BasePresenter):
                 self.show_error(f"Project data file not found: {self.model_json_path}")
                 return
             
-            with open(self.model_json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            # Process data directly
-            self.onProjectDataLoaded(data)
+            self.catalogue.loadStore(self.project_worker.store, force=True)
+            self._publishCatalogue()
             
         except Exception as e:
             error_msg = f"Error loading project data synchronously: {str(e)}"
@@ -156,11 +168,9 @@ class ProjectPresenter(BasePresenter):
         try:
             if os.path.exists(self.model_json_path):
                 # log.info(f"project data immediately from {self.model_json_path}")
-                with open(self.model_json_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                # Process data directly
-                self.onProjectDataLoaded(data)
+                # File không đổi kể từ lần load / ghi trước (VD TopTopPresenter đã load): không parse lại
+                if self.catalogue.loadStore(self.project_worker.store):
+                    self._publishCatalogue()
             else:
                 log.warning("ProjectPresenter: Project data file does not exist for immediate load")
                 
@@ -171,19 +181,16 @@ class ProjectPresenter(BasePresenter):
     
     def getProjectData(self):
         """Lấy toàn bộ dữ liệu project"""
-        return self.project_data
+        return self.catalogue.entries()
     
     def getProjectNames(self):
         """Lấy danh sách tất cả project names"""
-        return self.project_names
+        return self.catalogue.names()
     
     def getProjectInfo(self, project_name):
         """Lấy thông tin chi tiết của project"""
         try:
-            for item in self.project_data:
-                if item.get("Project_Name") == project_name:
-                    return item
-            return None
+            return self.catalogue.get(project_name)
         except Exception as e:
             self.show_error(f"Error getting project info: {str(e)}")
             log.error(f"Error getting project info: {str(e)}")
@@ -221,7 +228,7 @@ class ProjectPresenter(BasePresenter):
                 return False
             
             # Check if project exists
-            if project_name not in self.project_names:
+            if project_name not in self.catalogue:
                 self.show_error(f"Project '{project_name}' not found")
                 return False
             
@@ -236,7 +243,7 @@ class ProjectPresenter(BasePresenter):
             return False
     
     def addProject(self, project_data):
-        """Thêm project mới vào model.json"""
+        """Thêm project mới vào model.json (qua ProjectWorker)"""
         try:
             project_name = project_data.get("Project_Name", "")
             log.info(f"ProjectPresenter: Adding new project '{project_name}'")
@@ -247,35 +254,12 @@ class ProjectPresenter(BasePresenter):
                 return False
             
             # Check if project already exists
-            if project_name in self.project_names:
+            if project_name in self.catalogue:
                 self.show_error(f"Project '{project_name}' already exists")
                 return False
             
-            # Load current data
-            if not os.path.exists(self.model_json_path):
-                self.show_error(f"Project data file not found: {self.model_json_path}")
-                return False
-            
-            with open(self.model_json_path, "r", encoding="utf-8") as f:
-                model_data = json.load(f)
-            
-            # Add new project
-            model_data.append(project_data)
-            
-            # Save updated data
-            with open(self.model_json_path, "w", encoding="utf-8") as f:
-                json.dump(model_data, f, indent=2, ensure_ascii=False)
-            
-            self.show_success(f"Project '{project_name}' added successfully")
-            log.info(f"ProjectPresenter: Project '{project_name}' added successfully")
-            
-            # Reload data
-            self.loadProjectDataImmediate()
-            
-            # Emit signal
-            self.projectAdded.emit(project_name)
-            
-            return True
+            # Call worker to add project (1 bản ghi journal, catalogue cập nhật trong onProjectAddedSuccess)
+            return self.project_worker.addProject(project_data)
             
         except Exception as e:
             error_msg = f"Error adding project: {str(e)}"
@@ -290,7 +274,7 @@ class ProjectPresenter(BasePresenter):
     
     def projectExists(self, project_name):
         """Kiểm tra xem project có tồn tại không"""
-        return project_name in self.project_names
+        return project_name in self.catalogue
     
     def cleanup(self):
         """Dọn dẹp tài nguyên"""
@@ -1,15 +1,26 @@
 """
 SFIS Presenter - Xử lý logic giao tiếp SFIS
+- Mỗi giao dịch SFIS (gửi + đọc reply) giữ _io_lock: thread marking / prefetch và thread SFISOutbox dùng chung 1 cổng
+- END (test complete) qua SfisOutbox (general.sfis_outbox): queueComplete() ghi xuống đĩa, thread nền gửi + retry,
+  NEEDPSN chỉ gửi sau khi các END trước đó đã được SFIS xác nhận
+- ACTIVATE (UNDO + OP) chạy trong thread của SFISWorker: GUI thread không chờ _io_lock
+- Outbox chỉ gửi sau khi ACTIVATE của lần kết nối hiện tại đã xong
 """
-from PySide6.QtCore import QThread, Signal, QMetaObject, Qt, Q_ARG, QTimer
+from PySide6.QtCore import QThread, Signal, QMetaObject, Qt, Q_ARG
 from utils.setting import settings_manager
 from model.sfis_model import SFISModel
 from workers.sfis_worker import SFISWorker
 from utils.Logging import getLogger
+from utils.cycle_trace import cycle_tracer
 from presenter.base_presenter import BasePresenter
+from workers.reconnect_scheduler import reconnect_scheduler
+from workers.sfis_outbox import SfisOutbox
 # Khởi tạo logger
 log = getLogger()
 
+# Thời gian tối đa chờ outbox gửi xong END trước khi NEEDPSN (SFIS readData_SFIS timeout là 10s)
+COMPLETE_WAIT_S = 15.0
+
 class SFISPresenter(BasePresenter):
     """Presenter xử lý SFIS communication"""
     # Signals
@@ -35,12 +46,13 @@ class SFISPresenter(BasePresenter):
         # Trạng thái
         self.isConnected = False
         self.currentPort = None
+        self._io_lock = self.sfis_worker.io_lock
+        self._activated = False  # ACTIVATE của lần kết nối hiện tại đã xong => outbox được gửi
+        self.outbox = SfisOutbox(self._deliverQueued)
 
-        # Auto-reconnect timer
-        self.reconnect_timer = QTimer()
-        self.reconnect_timer.timeout.connect(self._checkAndReconnect)
-        self.reconnect_ms = 5000  # 5 giây
+        # Auto-reconnect: dùng chung ReconnectScheduler (backoff có jitter)
         self.auto_reconnect_enabled = False
+        reconnect_scheduler.register("SFIS", self.sfis_worker.checkConnectionAlive, self.probeConnect, self._onLinkChanged)
 
         log.info("SFISPresenter initialized successfully")
     
@@ -51,6 +63,7 @@ class SFISPresenter(BasePresenter):
         self.sfis_worker.error_occurred.connect(self.onError)
         self.sfis_worker.connectionStatusChanged.connect(self.onConnectionChanged)
         self.sfis_worker.signal_sent.connect(self.onStartSignalSent)
+        self.sfis_worker.activated.connect(self.onActivated)
         # SFIS Model signals
         self.sfis_model.data_parsed.connect(self.onDataParsed)
         self.sfis_model.validation_error.connect(self.onValidationError)
@@ -103,33 +116,39 @@ class SFISPresenter(BasePresenter):
         return success
 
     def activateSFIS(self, op_number=None):
-        """Gửi tín hiệu ACTIVATE (UNDO + OP Number) đến SFIS để bắt đầu quy trình EMP"""
+        """
+        Gửi tín hiệu ACTIVATE (UNDO + OP Number) đến SFIS để bắt đầu quy trình EMP.
+        Chạy trong thread của SFISWorker (không chờ), kết quả báo qua onActivated
+        """
         if not self.isConnected:
             self.show_error("SFIS is not connected")
             log.error("SFIS is not connected")
             return False
-        #Reset SFIS
-        message_undo = "UNDO\r\n"
-        if not self.sfis_worker.sendData_SFIS(message_undo):
-            self.show_error("Failed to send UNDO to SFIS")
-            log.error("Failed to send UNDO to SFIS")
-            return False
-
-        import time
-        time.sleep(0.2)
-
-        # Send OP Number
         if op_number is None:
-            op_number = settings_manager.get("general.op_num", "")  # Lấy OP_Number từ instance 
+            op_number = settings_manager.snapshot().op_num  # Lấy OP_Number từ instance 
         message_op = "{:<20}END\r\n".format(op_number if op_number else "")
-        if not self.sfis_worker.sendData_SFIS(message_op):
-            self.show_error("Failed to send OP number to SFIS")
-            log.error("Failed to send OP number to SFIS")
-            return False
+        QMetaObject.invokeMethod(
+            self.sfis_worker,
+            "activate",
+            Qt.QueuedConnection,
+            Q_ARG(str, message_op)
+        )
+        return True
+
+    def onActivated(self, success):
+        """ACTIVATE xong trong thread của worker: từ đây outbox được gửi END"""
+        self._activated = bool(success) and self.isConnected
+        if not success:
+            self.show_error("Failed to send ACTIVATE (UNDO + OP) to SFIS")
+            return
+        self.show_success("Activate SFIS successfully")
+        if self._activated:
+            # Link vừa lên và đã ACTIVATE: gửi ngay các END còn chờ trong outbox
+            self.outbox.hint()
     # Auto connect / reconnect
     # ------------------------------------------------------------------
-    def startAutoConnectSFIS(self, portName: str | None = None):
-        """Bắt đầu tự động kết nối SFIS"""
+    def startAutoConnectSFIS(self, portName: str | None = None, connect_now: bool = True):
+        """Bắt đầu tự động kết nối SFIS (connect_now=False: lần kết nối đầu đã chạy qua probeConnect)"""
         self.auto_reconnect_enabled = True
         if portName:
             self.currentPort = portName
@@ -137,13 +156,12 @@ class SFISPresenter(BasePresenter):
             self.currentPort = self.sfis_worker.port_name
         # self.show_info(f"[SFIS] Auto-connect enabled on {self.currentPort}")
         # log.info(f"[SFIS] Auto-connect enabled on {self.currentPort}")
-        self._tryConnect()
-        self.reconnect_timer.start(self.reconnect_ms)
-        log.info(f"SFIS auto-connect started ({self.reconnect_ms}ms)")
+        reconnect_scheduler.enable("SFIS", connect_now=connect_now)
+        log.info(f"SFIS auto-connect started on {self.currentPort}")
     def stopAutoConnectSFIS(self):
         """Dừng tự động kết nối SFIS."""
         self.auto_reconnect_enabled = False
-        self.reconnect_timer.stop()
+        reconnect_scheduler.disable("SFIS")
         log.info("[SFIS] Auto-connect stopped")
     
     def requestDataSFIS(self, mo=None, panelNo=None):
@@ -169,32 +187,39 @@ class SFISPresenter(BasePresenter):
     def getDataFromSFIS(self):
         try:
             log.info("getDataFromSFIS started")
-            mode = settings_manager.get("project.sfis_format", 1)
+            mode = settings_manager.snapshot().sfis_format
             log.info(f"Mode: {mode}")
-            if mode == 1:
-                return self.getDataFromSFIS_MODE1()
-            elif mode == 2:
-                return self.getDataFromSFIS_MODE2()
-            else:
+            if mode not in (1, 2):
                 log.error("Error in getDataFromSFIS: Invalid mode")
                 return False
+            # END panel N chưa tới SFIS: không được gửi NEEDPSN panel N+1
+            if not self.waitCompleteDelivered():
+                self.show_error("Previous test complete not delivered to SFIS, NEEDPSN not sent")
+                return False
+            with self._io_lock:
+                if mode == 1:
+                    return self.getDataFromSFIS_MODE1()
+                return self.getDataFromSFIS_MODE2()
         except Exception as e:
             self.show_error(f"Error in getDataFromSFIS: {e}")
             log.error(f"Error in getDataFromSFIS: {e}")
             return False
 
     def getDataFromSFIS_MODE2(self):
-        mo = settings_manager.get("general.mo", '')
-        pcb_product_name = settings_manager.get("general.pcb_product_name", '')
-        pcb_number = settings_manager.get("general.pcb_number", '')
+        settings = settings_manager.snapshot()
+        mo = settings.mo
+        pcb_product_name = settings.pcb_product_name
+        pcb_number = settings.pcb_number
         try: 
             req1 = self.sfis_model.createFormatBOMVER(mo, pcb_product_name)
             if self.sfis_worker.sendData_SFIS(req1):
+                cycle_tracer.mark("needpsn_sent")
                 data_res = self.sfis_worker.readData_SFIS(timeout_ms=10000)
                 if 'ENDBOMVERPASS' in data_res:
                     req2 = self.sfis_model.createFormatBOMVERNeedSN(mo, pcb_number)
                     if self.sfis_worker.sendData_SFIS(req2):
                         data_res2 = self.sfis_worker.readData_SFIS(timeout_ms=10000)
+                        cycle_tracer.mark("sfis_response")
                         if data_res2:
                             return data_res2
                         else:
@@ -213,8 +238,9 @@ class SFISPresenter(BasePresenter):
             return False
 
     def getDataFromSFIS_MODE1(self):
-        mo = settings_manager.get("general.mo", '')
-        panel_num = settings_manager.get("project.panel_num", '')
+        settings = settings_manager.snapshot()
+        mo = settings.mo
+        panel_num = settings.panel_num
         try:
             needpsn_message = self.sfis_model.createFormatNeedPSN(mo, panel_num)
             if not needpsn_message:
@@ -225,7 +251,13 @@ class SFISPresenter(BasePresenter):
                 self.show_error("Failed to send NEEDPSN message to SFIS")
                 log.error("Failed to send NEEDPSN message to SFIS")
                 return False
+            cycle_tracer.mark("needpsn_sent")
             data_res = self.sfis_worker.readData_SFIS(timeout_ms=10000)
+            # ENDPASS tới trễ của lệnh END trước đó (SFIS trả lời sau timeout đọc) không phải PSN response: đọc tiếp
+            while data_res and data_res.strip().endswith("ENDPASS"):
+                log.warning(f"SFIS: discarded stale reply '{data_res.strip()}' while waiting for PSN")
+                data_res = self.sfis_worker.readData_SFIS(timeout_ms=10000)
+            cycle_tracer.mark("sfis_response")
             # log.info(f"Data received from SFIS: {data_res}")
             if not data_res:
                 self.show_error("Timeout or no data received from SFIS")
@@ -246,10 +278,11 @@ class SFISPresenter(BasePresenter):
             log.error("SFIS not connected")
             return False
         
+        settings = settings_manager.snapshot()
         if panel_num is None:
-            panel_num = settings_manager.get("project.panel_num", '') 
+            panel_num = settings.panel_num
         if mo is None:
-            mo = settings_manager.get("general.mo", '')  
+            mo = settings.mo
         # tạo format gửi lên SFIS
         start_message = self.sfis_model.createFormatNeedPSN(mo, panel_num)
         if not start_message:
@@ -278,6 +311,15 @@ class SFISPresenter(BasePresenter):
         if message:
             # self.show_info("send complete to SFIS...")
             # log.info(f"send complete to SFIS... {message}")
+            return self.deliverComplete(message)
+        log.error("Create test complete failed")
+        return False
+
+    def deliverComplete(self, message) -> bool:
+        """Gửi 1 message END và chờ SFIS trả lời (SendComplete / thread SFISOutbox)"""
+        if not self.isConnected:
+            return False
+        with self._io_lock:
             success = self.sfis_worker.sendData_SFIS(message)
             if success:
                 res = self.sfis_worker.readData_SFIS(timeout_ms=10000)
@@ -291,8 +333,35 @@ class SFISPresenter(BasePresenter):
                     return False
             else:
                 log.error("Send test complete failed")
-                return False  
-        log.error("Create test complete failed")
+                return False
+
+    def _deliverQueued(self, message) -> bool:
+        """Thread SFISOutbox: chỉ gửi khi link đã ACTIVATE xong (tránh chen vào giữa UNDO và OP)"""
+        if not self._activated:
+            return False
+        return self.deliverComplete(message)
+
+    def queueComplete(self, mo=None, panelNo=None) -> bool:
+        """Ghi message END vào outbox (bền vững trên đĩa), SFIS nhận sau qua thread SFISOutbox"""
+        message = self.sfis_model.createTestComplete(mo, panelNo)
+        if not message:
+            log.error("Create test complete failed")
+            return False
+        if not self.outbox.enqueue(message, mo, panelNo):
+            self.show_error("Cannot store test complete in SFIS outbox")
+            return False
+        log.info(f"Test complete queued for SFIS ({self.outbox.pending()} pending)")
+        return True
+
+    def waitCompleteDelivered(self):
+        """END của các panel trước phải tới SFIS trước NEEDPSN của panel kế tiếp"""
+        if not self.outbox.pending():
+            return True
+        log.info(f"SFIS: waiting for {self.outbox.pending()} queued test complete(s) before NEEDPSN")
+        if self.outbox.waitDrained(COMPLETE_WAIT_S):
+            return True
+        log.error(f"SFIS: {self.outbox.pending()} test complete(s) still queued after {COMPLETE_WAIT_S:.0f}s, "
+                  f"NEEDPSN not sent")
         return False
     
     def sendTestError(self, mo, panelNo, errorCode):
@@ -389,17 +458,16 @@ class SFISPresenter(BasePresenter):
     
     def onConnectionChanged(self, isConnected):
         """Xử lý khi trạng thái kết nối thay đổi"""
+        if self.isConnected and not isConnected:
+            reconnect_scheduler.hint("SFIS")  # link vừa rớt: thử lại ngay
+        self._activated = False
         self.isConnected = isConnected
         status = "Connected" if isConnected else "Disconnected"
         self.show_info(f"SFIS: {status}")
         if isConnected:
-            try:
-                self.show_info("SFIS connected - auto ACTIVATE (UNDO + OP)")
-                log.info("SFIS connected - auto calling activateSFIS()")
-                self.activateSFIS()
-            except Exception as exc:
-                log.error(f"Auto activateSFIS failed: {exc}")
-                self.show_error(f"Auto activateSFIS failed: {exc}")
+            self.show_info("SFIS connected - auto ACTIVATE (UNDO + OP)")
+            log.info("SFIS connected - auto calling activateSFIS()")
+            self.activateSFIS()
 
         # Emit signal để MainPresenter cập nhật UI
         self.connectionStatusChanged.emit(isConnected)
@@ -437,40 +505,31 @@ class SFISPresenter(BasePresenter):
     # ------------------------------------------------------------------
     # Auto-reconnect helpers
     # ------------------------------------------------------------------
-    def _tryConnect(self):
-        """Thử kết nối SFIS (không log nhiều để tránh spam)."""
-        if not self.auto_reconnect_enabled:
-            return
-        if self.isConnected:
-            return
-
-        try:
-            # Gọi connect trên worker (trong thread của worker)
-            QMetaObject.invokeMethod(
-                self.sfis_worker,
-                "connect",
-                Qt.BlockingQueuedConnection,
-                Q_ARG(str, self.currentPort),
-            )
-            if self.sfis_worker.is_connected:
-                self.isConnected = True
-                self.show_success(f"[SFIS] Auto-connected on {self.currentPort}")
-                log.info(f"[SFIS] Auto-connected on {self.currentPort}")
-        except Exception as exc:
-            log.warning(f"[SFIS] Auto-connect failed: {exc}")
-
-    def _checkAndReconnect(self):
-        """Kiểm tra và tự động kết nối lại nếu SFIS bị ngắt."""
-        if not self.auto_reconnect_enabled:
-            return
-
-        worker_connected = self.sfis_worker.checkConnectionAlive()
-        if self.isConnected != worker_connected:
-            self.isConnected = worker_connected
-            self.connectionStatusChanged.emit(worker_connected)
+    def probeConnect(self):
+        """
+        Mở cổng SFIS trong thread của worker, chặn thread gọi tới khi xong
+        (ConnectionOrchestrator / ReconnectScheduler, không gọi từ GUI thread).
+        Trạng thái presenter cập nhật qua connectionStatusChanged của worker
+        """
+        port = self.currentPort or self.sfis_worker.port_name
+        QMetaObject.invokeMethod(
+            self.sfis_worker,
+            "connect",
+            Qt.BlockingQueuedConnection,
+            Q_ARG(str, port),
+        )
+        return self.sfis_worker.is_connected
 
-        if not self.isConnected:
-            self._tryConnect()
+    def _onLinkChanged(self, connected):
+        """ReconnectScheduler: link SFIS rớt / đã kết nối lại"""
+        if connected:
+            self.show_success(f"[SFIS] Auto-connected on {self.currentPort}")
+            log.info(f"[SFIS] Auto-connected on {self.currentPort}")
+        else:
+            self._activated = False
+        if self.isConnected != connected:
+            self.isConnected = connected
+            self.connectionStatusChanged.emit(connected)
     
     def onStartSignalSent(self, success, message):
         """Xử lý khi START signal đã được gửi"""
@@ -519,8 +578,11 @@ class SFISPresenter(BasePresenter):
         """Dọn dẹp tài nguyên"""
         #dọn dẹp auto-reconnect
         self.auto_reconnect_enabled = False
-        if self.reconnect_timer.isActive():
-            self.reconnect_timer.stop()
+        reconnect_scheduler.disable("SFIS")
+
+        # Dừng gửi END nền (message chưa gửi được giữ lại trong file outbox)
+        self.outbox.stop()
+        self.outbox.dumpSummary()
     
         # Disconnect
         if self.isConnected:
@@ -0,0 +1,247 @@
+"""
+Station Presenter - Lõi 1 trạm marking, không phụ thuộc GUI (chỉ QtCore)
+- Sở hữu SFIS / PLC / laser presenter, MarkingWorker + thread và auto-connect lúc khởi động (ConnectionOrchestrator)
+- Flow: PLC Ready -> MarkingWorker (SFIS NEEDPSN -> laser GA / C2 / NT -> SFIS END) -> PLC OK
+- Dùng chung cho MainPresenter (GUI nghe signal để cập nhật panel) và chế độ headless (main.py --headless)
+"""
+import time
+from PySide6.QtCore import QCoreApplication, QMetaObject, QThread, Qt, Signal
+from presenter.base_presenter import BasePresenter
+from presenter.laser_presenter import LaserPresenter
+from presenter.plc_presenter import PLCPresenter
+from presenter.sfis_presenter import SFISPresenter
+from workers.connection_orchestrator import ConnectionOrchestrator
+from workers.io_core import io_core
+from workers.marking_worker import MarkingWorker
+from workers.reconnect_scheduler import reconnect_scheduler
+from utils.cycle_trace import cycle_tracer
+from utils.Logging import getLogger
+from utils.setting import settings_manager
+from utils.startup_profile import startup_profiler
+
+log = getLogger()
+
+SERIAL_CONNECT_DEADLINE_MS = 3000  # mở COM port SFIS / PLC
+CONNECT_DEADLINE_MARGIN_MS = 1000  # laser: timeout_ms của socket + margin
+
+
+class StationPresenter(BasePresenter):
+    """Điều phối SFIS / PLC / laser của 1 trạm, không tạo widget nào"""
+
+    cycleStarted = Signal()  # PLC Ready đã được nhận, marking bắt đầu
+    cycleFinished = Signal(bool, float)  # (success, thời gian cycle tính bằng giây)
+    systemReady = Signal(dict)  # {tên thiết bị: connected} sau lần auto-connect đầu tiên
+
+    def __init__(self):
+        super().__init__()
+        self.sfis_presenter = SFISPresenter()
+        self.plc_presenter = PLCPresenter()
+        self.laser_presenter = LaserPresenter()
+        self.connect_orchestrator = ConnectionOrchestrator(self)
+        self.connect_orchestrator.deviceFinished.connect(self.onDeviceAutoConnectFinished)
+        self.connect_orchestrator.deviceLateConnected.connect(self.onDeviceLateConnected)
+        self.connect_orchestrator.allFinished.connect(self.onAutoConnectFinished)
+
+        # Khởi tạo marking worker và thread
+        self.marking_worker = MarkingWorker(
+            self.sfis_presenter,
+            self.laser_presenter,
+            settings_manager
+        )
+        self.marking_thread = QThread()
+        self.marking_worker.moveToThread(self.marking_thread)
+
+        # Khi PLC gửi tín hiệu READY thì tự động bắt đầu quy trình marking
+        self.plc_presenter.readyReceived.connect(self.startAutomationMarkingLaser)
+        self.marking_worker.statusChanged.connect(self.onMarkingStatusChanged)
+        self.marking_worker.progressUpdate.connect(self.onMarkingProgressUpdate)
+        self.marking_worker.finished.connect(self.onMarkingFinished)
+        self.marking_worker.error.connect(self.onMarkingError)
+
+        # Khởi động marking thread
+        self.marking_thread.start()
+
+        # Trạng thái (đọc bởi statusSnapshot)
+        self.isRunning = False
+        self.ready = False
+        self.marking_status = "STANDBY"
+        self.cycle_counts = {"OK": 0, "NG": 0}
+        self.last_result = None
+        self.last_cycle_s = None
+        self._started_at = time.monotonic()
+        self._cycle_start = None
+        log.info("StationPresenter initialized successfully")
+
+    def useConfiguredPorts(self):
+        """SFIS / PLC mở COM port theo connection.sfc / connection.plc (headless: không có combo chọn cổng trên GUI)"""
+        self.sfis_presenter.currentPort = settings_manager.get("connection.sfc.com_port", self.sfis_presenter.sfis_worker.port_name)
+        self.plc_presenter.current_port = settings_manager.get("connection.plc.com_port", self.plc_presenter.current_port)
+
+    def initialize(self):
+        """Tự động kết nối SFIS, PLC và laser song song ngoài thread chính (mỗi thiết bị 1 deadline)"""
+        laser_deadline_ms = (self.laser_presenter.worker.timeout_ms or 3000) + CONNECT_DEADLINE_MARGIN_MS
+        self.connect_orchestrator.addDevice("Laser", self.laser_presenter.probeConnect, laser_deadline_ms)
+        self.connect_orchestrator.addDevice("SFIS", self.sfis_presenter.probeConnect, SERIAL_CONNECT_DEADLINE_MS)
+        self.connect_orchestrator.addDevice("PLC", self.plc_presenter.probeConnect, SERIAL_CONNECT_DEADLINE_MS)
+        self.connect_orchestrator.start()
+
+    def onDeviceAutoConnectFinished(self, name, connected, elapsed_ms):
+        """1 thiết bị đã probe xong (hoặc quá deadline): bật auto-reconnect cho thiết bị đó"""
+        if name == "Laser":
+            self.laser_presenter.onProbeFinished(connected)
+            self.laser_presenter.startAutoConnectLaser(connect_now=False)
+        elif name == "SFIS":
+            self.sfis_presenter.startAutoConnectSFIS(connect_now=False)
+        elif name == "PLC":
+            self.plc_presenter.startAutoConnectPLC(connect_now=False)
+            self.plc_presenter.startReceiverPLC()
+
+    def onDeviceLateConnected(self, name, elapsed_ms):
+        """
+        Probe quá deadline nhưng kết nối muộn thành công: auto-reconnect / receiver đã bật ở deviceFinished,
+        chỉ nhờ ReconnectScheduler kiểm tra link ngay để presenter cập nhật trạng thái connected
+        """
+        log.info(f"Auto-connect {name}: connected late ({elapsed_ms:.0f} ms), syncing state")
+        reconnect_scheduler.hint(name)
+
+    def onAutoConnectFinished(self, results):
+        """Mọi thiết bị đã probe xong: trạng thái sẵn sàng chung"""
+        offline = [name for name, connected in results.items() if not connected]
+        if offline:
+            self.show_warning(f"Not connected: {', '.join(offline)} (auto-reconnect running)")
+        self.show_info("[_______SYSTEM IS READY!_______]")
+        log.info("[_______SYSTEM IS READY!_______]")
+        self.ready = True
+        startup_profiler.mark("system_ready")
+        startup_profiler.report()
+        self.systemReady.emit(dict(results))
+
+    # ------------------------------------------------------------------
+    # Cycle marking
+    # ------------------------------------------------------------------
+    def startAutomationMarkingLaser(self, message):
+        try:
+            if message in ("Ready", "READY"):
+                log.info(f"PLC received:[{message}] --> start marking process")
+                self.show_info(f"PLC received:[{message}] --> start marking process")
+                log.info("=========START AUTOMATION MARKING LASER=========")
+                self.show_info("=========START AUTOMATION MARKING LASER=========")
+
+                # Check if already running
+                if self.isRunning:
+                    log.warning("Marking process already running")
+                    self.show_warning("Marking process already running, please wait...")
+                    return False
+
+                # Mark as running
+                self.isRunning = True
+                self._cycle_start = time.perf_counter()
+                cycle_tracer.beginCycle()
+                self.cycleStarted.emit()
+
+                # Start marking in worker thread
+                QMetaObject.invokeMethod(
+                    self.marking_worker,
+                    "startMarking",
+                    Qt.QueuedConnection
+                )
+
+                return True
+            else:
+                log.info(f"PLC received:[{message}] --> Wrong signal cannot start")
+                self.show_info(f"PLC received:[{message}] --> Wrong signal cannot start")
+                return False
+        except Exception as e:
+            log.error(f"Error starting automation marking laser: {e}")
+            self.show_error(f"Error starting automation marking laser: {e}")
+            self.isRunning = False
+            return False
+
+    def onMarkingStatusChanged(self, status):
+        """Handle status change from marking worker"""
+        self.marking_status = status
+        log.info(f"Status changed to: {status}")
+
+    def onMarkingProgressUpdate(self, message):
+        """Handle progress update from marking worker"""
+        self.show_info(message)
+        log.info(f"Progress: {message}")
+
+    def onMarkingFinished(self, success):
+        """Handle marking process finished: báo PLC OK, ghi cycle trace"""
+        elapsed = time.perf_counter() - self._cycle_start if self._cycle_start is not None else 0.0
+        try:
+            if success:
+                self.plc_presenter.sendPLC_OK()
+            cycle_tracer.endCycle(success)
+            if success:
+                self.show_success(f"Marking completed successfully in {elapsed:.1f}s")
+                log.info(f"=========MARKING LASER PROCESS SUCCESSFULLY in {elapsed:.1f}s=========")
+            else:
+                self.show_error(f"Marking failed after {elapsed:.1f}s")
+                log.error(f"=========MARKING LASER PROCESS FAILED in {elapsed:.1f}s=========")
+        except Exception as e:
+            log.error(f"Error handling marking finished: {e}")
+        finally:
+            self.cycle_counts["OK" if success else "NG"] += 1
+            self.last_result = "OK" if success else "NG"
+            self.last_cycle_s = round(elapsed, 3)
+            self._cycle_start = None
+            # Mark as not running
+            self.isRunning = False
+            self.cycleFinished.emit(success, elapsed)
+
+    def onMarkingError(self, error_msg):
+        """Handle error from marking worker"""
+        self.show_error(error_msg)
+        log.error(f"Marking error: {error_msg}")
+
+    # ------------------------------------------------------------------
+    # Trạng thái
+    # ------------------------------------------------------------------
+    def statusSnapshot(self):
+        """Trạng thái hiện tại của trạm (dict JSON được), đọc được từ thread khác"""
+        return {
+            "station": settings_manager.get("general.station_name", ""),
+            "project": settings_manager.get("project.current_project", ""),
+            "ready": self.ready,
+            "running": self.isRunning,
+            "status": self.marking_status,
+            "devices": {
+                "SFIS": bool(self.sfis_presenter.isConnected),
+                "PLC": bool(self.plc_presenter.is_connected),
+                "Laser": bool(self.laser_presenter.is_connected),
+            },
+            "cycles": dict(self.cycle_counts),
+            "sfis_outbox": self.sfis_presenter.outbox.pending(),
+            "last_result": self.last_result,
+            "last_cycle_s": self.last_cycle_s,
+            "uptime_s": round(time.monotonic() - self._started_at, 1),
+        }
+
+    def cleanup(self):
+        """Dừng marking thread, auto-connect / reconnect, đóng kết nối thiết bị"""
+        self.marking_worker.stop()
+        QCoreApplication.processEvents()
+        QThread.msleep(50) #Đợi 50ms để đảm bảo dữ liệu được gửi đi
+        if self.marking_thread.isRunning():
+            self.marking_thread.quit()
+            self.marking_thread.wait(3000)
+
+        self.connect_orchestrator.stop()
+        reconnect_scheduler.stop()
+
+        self.sfis_presenter.cleanup()
+        self.plc_presenter.cleanup()
+        self.laser_presenter.cleanup()
+        cycle_tracer.dumpSummary()
+        reconnect_scheduler.dumpSummary()
+        io_core.stop()
+        settings_manager.flush()
+        QThread.msleep(200) #Đợi 200ms để đảm bảo dữ liệu được gửi đi
+
+        if self.marking_thread.isRunning():
+            self.marking_thread.quit()
+            if not self.marking_thread.wait(5000):
+                self.marking_thread.terminate()
+                self.marking_thread.wait()
@@ -1,13 +1,13 @@
 """
 TopTop Presenter - Xử lý logic chọn model và quản lý model.json trong appdata
 """
-import json
 import os
 import shutil
 from PySide6.QtCore import Signal, QThread, QTimer
 from PySide6.QtWidgets import QMessageBox, QApplication, QMessageBox
 from presenter.base_presenter import BasePresenter
 from workers.project_worker import ProjectWorker
+from model.project_catalogue import project_catalogue
 from utils.Logging import getLogger
 from utils.setting import settings_manager
 from utils.restartApp import restartApp
@@ -40,8 +40,8 @@ class TopTopPresenter(BasePresenter):
         
         # Model hiện tại
         self.current_model = ""  # Sẽ được set khi load data
-        self.project_data = []
-        self.project_names = []
+        # Danh mục project dùng chung với ProjectPresenter (index theo Project_Name)
+        self.catalogue = project_catalogue
         
         # Khởi tạo QThread worker
         self.project_worker = ProjectWorker(self.model_json_path)
@@ -93,34 +93,37 @@ class TopTopPresenter(BasePresenter):
     def onModelLoaded(self, data):
         """Xử lý khi dữ liệu model được load thành công"""
         try:
-            self.project_data = data
-            
-            # Trích xuất danh sách Project_Name
-            self.project_names = []
-            for item in self.project_data:
-                project_name = item.get("Project_Name", "")
-                if project_name and project_name not in self.project_names:
-                    self.project_names.append(project_name)
-                
+            self.catalogue.load(data)
+            self.catalogue.markSynced(self.project_worker.store)  # worker vừa đọc chính file này
+            self._publishCatalogue()
+        except Exception as e:
+            self.show_error(f"Error processing model data: {str(e)}")
+            log.error(f"TopTopPresenter: Error processing model data: {str(e)}")
+
+    def _publishCatalogue(self):
+        """Chọn project hiện tại và emit danh sách project từ catalogue"""
+        try:
+            project_names = self.catalogue.names()
+
             # Set model mặc định từ settings hoặc project đầu tiên
             saved_project = settings_manager.get("project.current_project", "")
-            if saved_project and saved_project in self.project_names:
+            if saved_project and saved_project in self.catalogue:
                 self.current_model = saved_project
                 log.info(f"Restored project from settings: {saved_project}")
-            elif self.project_names and not self.current_model:
-                self.current_model = self.project_names[0]
+            elif project_names and not self.current_model:
+                self.current_model = project_names[0]
                 log.info(f"Set default project: {self.current_model}")
             
             # Emit signals
-            self.projectDataLoaded.emit(self.project_data)
-            self.projectNamesLoaded.emit(self.project_names)
+            self.projectDataLoaded.emit(self.catalogue.entries())
+            self.projectNamesLoaded.emit(project_names)
             
             # Emit current model if set
             if self.current_model:
                 self.modelChanged.emit(self.current_model)
             
-            self.show_success(f"Loaded {len(self.project_names)} project names")
-            log.info(f"TopTopPresenter: Loaded {len(self.project_names)} project names")
+            self.show_success(f"Loaded {len(project_names)} project names")
+            log.info(f"TopTopPresenter: Loaded {len(project_names)} project names")
             
         except Exception as e:
             self.show_error(f"Error processing model data: {str(e)}")
@@ -162,11 +165,8 @@ class TopTopPresenter(BasePresenter):
         """Load dữ liệu synchronously (fallback)"""
         try:
             log.info("TopTopPresenter: Loading model data synchronously")
-            with open(self.model_json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            # Process data directly
-            self.onModelLoaded(data)
+            self.catalogue.loadStore(self.project_worker.store, force=True)
+            self._publishCatalogue()
             
         except Exception as e:
             error_msg = f"Error loading model data synchronously: {str(e)}"
@@ -178,11 +178,10 @@ class TopTopPresenter(BasePresenter):
         try:
             if os.path.exists(self.model_json_path):
                 log.info(f"TopTopPresenter: Loading model data immediately from {self.model_json_path}")
-                with open(self.model_json_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                # Process data directly
-                self.onModelLoaded(data)
+                # File không đổi kể từ lần load / ghi trước: dùng luôn catalogue, không parse lại JSON
+                if not self.catalogue.loadStore(self.project_worker.store):
+                    log.info("TopTopPresenter: Model file unchanged, using project catalogue")
+                self._publishCatalogue()
             else:
                 log.warning("TopTopPresenter: Model file does not exist for immediate load")
                 
@@ -194,7 +193,7 @@ class TopTopPresenter(BasePresenter):
     def change_model(self, project_name):
         """Thay đổi model hiện tại (project name) và lưu vào settings"""
         try:
-            if project_name in self.project_names:
+            if project_name in self.catalogue:
                 old_model = self.current_model
                 self.current_model = project_name
                 
@@ -202,13 +201,14 @@ class TopTopPresenter(BasePresenter):
                 project_info = self.getProjectInfo(project_name)
                 if project_info:
                     # Lưu vào settings (project section)
-                    settings_manager.set("project.current_project", project_name)
-                    settings_manager.set("project.psn_pre", project_info.get('PSN_PRE'))
-                    settings_manager.set("project.script", project_info.get('LM_Script_Name'))
-                    settings_manager.set("project.panel_num", project_info.get('Panel_Num'))
-                    settings_manager.set("project.sfis_format", project_info.get('SFIS_format'))
-                    settings_manager.set("project.lm_mode", project_info.get('LM_mode'))
-                    settings_manager.save_settings()
+                    settings_manager.update({
+                        "project.current_project": project_name,
+                        "project.psn_pre": project_info.get('PSN_PRE'),
+                        "project.script": project_info.get('LM_Script_Name'),
+                        "project.panel_num": project_info.get('Panel_Num'),
+                        "project.sfis_format": project_info.get('SFIS_format'),
+                        "project.lm_mode": project_info.get('LM_mode'),
+                    })
                     
                     self.show_info(f"Project info: LM_Script={project_info.get('LM_Script_Name')}, Panel_Num={project_info.get('Panel_Num')}, PSN_PRE={project_info.get('PSN_PRE')}, SFIS_format={project_info.get('sfis_format')}, LM_mode={project_info.get('LM_mode')}")
                     log.info(f"Project info: LM_Script={project_info.get('LM_Script_Name')}, Panel_Num={project_info.get('Panel_Num')}, PSN_PRE={project_info.get('PSN_PRE')}, SFIS_format={project_info.get('sfis_format')}, LM_mode={project_info.get('LM_mode')}")
@@ -233,10 +233,7 @@ class TopTopPresenter(BasePresenter):
     def getProjectInfo(self, project_name):
         """Lấy thông tin chi tiết của project"""
         try:
-            for item in self.project_data:
-                if item.get("Project_Name") == project_name:
-                    return item
-            return None
+            return self.catalogue.get(project_name)
         except Exception as e:
             self.show_error(f"Error getting project info: {str(e)}")
             log.error(f"Error getting project info: {str(e)}")
@@ -244,15 +241,15 @@ class TopTopPresenter(BasePresenter):
     
     def getProjectNames(self):
         """Lấy danh sách tất cả project names"""
-        return self.project_names
+        return self.catalogue.names()
     
     def wait_for_data_loaded(self, timeout_ms=5000):
         """Đợi cho đến khi dữ liệu được load xong"""
         import time
         start_time = time.time()
-        while len(self.project_names) == 0 and (time.time() - start_time) * 1000 < timeout_ms:
+        while len(self.catalogue) == 0 and (time.time() - start_time) * 1000 < timeout_ms:
             time.sleep(0.1)  # Sleep 100ms
-        return len(self.project_names) > 0
+        return len(self.catalogue) > 0
     
     
     def getCurrentModel(self):
@@ -0,0 +1,402 @@
+"""
+Thiết bị giả lập dùng chung cho simulation_sfis.py / simulation_plc.py / simulation_laser.py
+- SimulatedDevice: 1 thiết bị, 1 link, chạy trong thread riêng (start / stop), import được từ test / benchmark
+- Link: pty pair (attachPty, chỉ Linux/macOS), TCP localhost port ngẫu nhiên (attachTcp), COM thật (attachSerial)
+- Lớp con chỉ cần process_buffer(buffer, send_func, peer_name) -> buffer còn dư (cùng contract với bản script cũ)
+- Output qua logger của ứng dụng: verbose=False: log.debug (chạy cùng process với MainPresenter),
+  verbose=True: log.info ra console như script cũ
+- FaultProfile: latency theo lệnh (fixed / normal / long-tail), reply bị chia mảnh, mất, hỏng byte,
+  baud chậm, đóng kết nối TCP => đo hành vi của reader / reconnect dưới jitter thật (PROFILES: preset có sẵn)
+"""
+import os
+import random
+import select
+import selectors
+import socket
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import serial
+
+
+def _logger():
+    # Import muộn: chỉ import module (benchmark dựng APPDATA tạm trước) không khởi tạo Logging
+    from utils.Logging import getLogger
+    return getLogger()
+
+
+def bytes_to_hex(data: bytes, max_bytes: int = 100) -> str:
+    """Chuyển bytes sang HEX string để log"""
+    if len(data) <= max_bytes:
+        return " ".join(f"{b:02X}" for b in data)
+    hex_str = " ".join(f"{b:02X}" for b in data[:max_bytes])
+    return f"{hex_str} ... ({len(data)} bytes total)"
+
+
+def split_lines(buffer: bytes):
+    """Tách các dòng hoàn chỉnh theo \\r\\n / \\n: (list dòng không rỗng, buffer còn dư)"""
+    lines = []
+    while b"\n" in buffer:
+        line, buffer = buffer.split(b"\n", 1)
+        line = line.rstrip(b"\r")
+        if line:
+            lines.append(line)
+    return lines, buffer
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Phân bố thời gian xử lý 1 lệnh (ms):
+    - fixed: luôn ms
+    - normal: Gauss(ms, sd_ms), cắt ở 0
+    - longtail: ms, thêm đuôi exponential trung bình tail_ms với xác suất tail_p (VD controller bận ghi log)
+    """
+    kind: str = "fixed"
+    ms: float = 0.0
+    sd_ms: float = 0.0
+    tail_p: float = 0.0
+    tail_ms: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Thời gian (ms) cho 1 lần xử lý"""
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.ms, self.sd_ms))
+        if self.kind == "longtail":
+            extra = rng.expovariate(1.0 / self.tail_ms) if self.tail_ms > 0 and rng.random() < self.tail_p else 0.0
+            return self.ms + extra
+        if self.kind != "fixed":
+            raise ValueError(f"Unknown latency kind: {self.kind}")
+        return self.ms
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """Cách thiết bị giả lập trả lời: latency, chia mảnh, lỗi. Mặc định = thiết bị lý tưởng"""
+    latency: dict = field(default_factory=dict)  # {tên lệnh: Latency}, "*" = mọi lệnh; thiếu => latency mặc định của thiết bị
+    fragment_bytes: int = 0  # >0: reply gửi thành từng mảnh N byte
+    fragment_gap_ms: float = 0.0  # khoảng nghỉ giữa 2 mảnh
+    baud: int = 0  # >0: giả lập tốc độ đường truyền (10 bit / byte)
+    drop_rate: float = 0.0  # xác suất không trả lời
+    garble_rate: float = 0.0  # xác suất hỏng 1 byte trong reply (giữ nguyên CRLF)
+    hangup_rate: float = 0.0  # xác suất đóng kết nối thay vì trả lời (chỉ TCP)
+    seed: int | None = None  # cố định để benchmark lặp lại được
+
+    def latencyFor(self, command: str) -> Latency | None:
+        return self.latency.get(command) or self.latency.get("*")
+
+
+# Preset dùng cho benchmark / chạy tay (tên truyền vào SimulatedDevice(profile="line"))
+PROFILES = {
+    "ideal": FaultProfile(),
+    # Line thật: RS232 9600bps, reply tới từng mảnh, thời gian xử lý dao động ~10%
+    "line": FaultProfile(
+        latency={
+            "NEEDPSN": Latency("normal", 30.0, 5.0),
+            "END": Latency("normal", 20.0, 4.0),
+            "GA": Latency("normal", 500.0, 50.0),
+            "C2": Latency("normal", 1000.0, 100.0),
+            "NT": Latency("normal", 500.0, 50.0),
+        },
+        fragment_bytes=16,
+        fragment_gap_ms=2.0,
+        baud=9600,
+        seed=1,
+    ),
+    # Line xấu: thỉnh thoảng xử lý rất lâu (đuôi dài), mất / hỏng reply, rớt kết nối TCP
+    "noisy": FaultProfile(
+        latency={
+            "NEEDPSN": Latency("longtail", 30.0, tail_p=0.05, tail_ms=1000.0),
+            "END": Latency("longtail", 20.0, tail_p=0.05, tail_ms=1000.0),
+            "GA": Latency("longtail", 500.0, tail_p=0.05, tail_ms=1000.0),
+            "C2": Latency("longtail", 1000.0, tail_p=0.05, tail_ms=1000.0),
+            "NT": Latency("longtail", 500.0, tail_p=0.05, tail_ms=1000.0),
+        },
+        fragment_bytes=8,
+        fragment_gap_ms=5.0,
+        baud=9600,
+        drop_rate=0.02,
+        garble_rate=0.02,
+        hangup_rate=0.02,
+        seed=2,
+    ),
+}
+
+
+def resolveProfile(profile) -> FaultProfile:
+    """None / tên preset / FaultProfile -> FaultProfile"""
+    if profile is None:
+        return PROFILES["ideal"]
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown simulator profile '{profile}' (available: {', '.join(PROFILES)})")
+        return PROFILES[profile]
+    return profile
+
+
+class SimulatedDevice:
+    """Base cho thiết bị giả lập: quản lý link + thread nhận, lớp con xử lý lệnh trong process_buffer"""
+
+    name = "DEVICE"
+    POLL_S = 0.1  # chu kỳ kiểm tra stop của thread nhận
+
+    def __init__(self, verbose: bool = False, profile=None, scale: float = 1.0):
+        self.verbose = verbose
+        self.profile = resolveProfile(profile)
+        self.scale = scale  # nhân mọi latency xử lý (benchmark chạy nhanh hơn thiết bị thật)
+        self.faults = Counter()  # số lần đã áp dụng từng lỗi (drop / garble / hangup)
+        self._rng = random.Random(self.profile.seed)
+        self._hangup = False
+        self.port_name = ""  # pty slave / COM port mà ứng dụng mở
+        self.port = None  # TCP port mà ứng dụng kết nối tới
+        self.peer = ""
+        self.counts = Counter()  # số lệnh đã nhận theo tên (VD NEEDPSN / END, GA / C2 / NT)
+        self._stop = threading.Event()
+        self._send_lock = threading.Lock()
+        self._thread = None
+        self._serve = None
+        self._write = None  # hàm gửi của link đang mở (None = chưa có client)
+        self._fds = ()
+        self._server = None
+        self._serial = None
+
+    def say(self, text: str):
+        if self.verbose:
+            _logger().info(text)
+        else:
+            _logger().debug(text)
+
+    def process_buffer(self, buffer: bytes, send_func, peer_name: str) -> bytes:
+        raise NotImplementedError
+
+    def defaultLatencyMs(self, command: str) -> float:
+        """Thời gian xử lý khi profile không chỉ định latency cho lệnh"""
+        return 0.0
+
+    def reply(self, command: str, data: bytes, send_func):
+        """
+        Trả lời lệnh command theo profile: chờ latency -> mất / hỏng / đóng kết nối -> gửi theo mảnh và baud.
+        Chạy trong thread của simulator (thiết bị xử lý tuần tự từng lệnh như thiết bị thật).
+        """
+        profile, rng = self.profile, self._rng
+        latency = profile.latencyFor(command)
+        delay_ms = latency.sample(rng) if latency is not None else self.defaultLatencyMs(command)
+        if delay_ms > 0:
+            time.sleep(delay_ms * self.scale / 1000.0)
+        if profile.hangup_rate and self._serve == self._serveTcp and rng.random() < profile.hangup_rate:
+            self.faults["hangup"] += 1
+            self.say(f"[FAULT] {self.name} hang up instead of replying to {command}")
+            self._hangup = True
+            return
+        if profile.drop_rate and rng.random() < profile.drop_rate:
+            self.faults["drop"] += 1
+            self.say(f"[FAULT] {self.name} dropped reply to {command}")
+            return
+        if profile.garble_rate and rng.random() < profile.garble_rate:
+            body = len(data.rstrip(b"\r\n"))
+            if body:
+                index = rng.randrange(body)
+                data = data[:index] + bytes([data[index] ^ 0x5A]) + data[index + 1:]
+                self.faults["garble"] += 1
+                self.say(f"[FAULT] {self.name} garbled reply to {command}: {data!r}")
+        self._writePaced(data, send_func)
+
+    def _writePaced(self, data: bytes, send_func):
+        profile = self.profile
+        # Không chia mảnh nhưng có baud: gửi mỗi 10 ms 1 lượng byte tương ứng tốc độ đường truyền
+        size = profile.fragment_bytes or (max(1, profile.baud // 1000) if profile.baud else len(data))
+        for offset in range(0, len(data), size):
+            chunk = data[offset:offset + size]
+            wait_s = len(chunk) * 10.0 / profile.baud if profile.baud else 0.0
+            if offset and profile.fragment_gap_ms:
+                wait_s += profile.fragment_gap_ms / 1000.0
+            if wait_s:
+                time.sleep(wait_s)
+            send_func(chunk)
+
+    def onConnected(self, peer: str):
+        """Hook: có client mới (TCP) / link sẵn sàng (pty, COM)"""
+        self.say(f"[CONNECTED] {self.name} link ready ({peer})")
+
+    # ------------------------------------------------------------------
+    # Link
+    # ------------------------------------------------------------------
+    def attachPty(self) -> str:
+        """Mở pty pair: simulator giữ master, trả về tên slave (VD /dev/pts/3) để ứng dụng mở như cổng COM"""
+        import tty
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        self._fds = (master_fd, slave_fd)
+        self.port_name = os.ttyname(slave_fd)
+        self._serve = self._servePty
+        return self.port_name
+
+    def attachTcp(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Lắng nghe TCP (port=0: OS chọn port trống), trả về port thực tế"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen(2)
+        self._server = server
+        self.port = server.getsockname()[1]
+        self._serve = self._serveTcp
+        return self.port
+
+    def attachSerial(self, com: str, baudrate: int = 9600, timeout_s: float = 1.0) -> str:
+        """Mở cổng COM thật (VD cặp cổng ảo com0com), ném SerialException nếu không mở được"""
+        self._serial = serial.Serial(
+            port=com,
+            baudrate=baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=timeout_s,
+            xonxoff=False,
+            rtscts=False,
+            dsrdtr=False,
+        )
+        self.port_name = com
+        self._serve = self._serveSerial
+        return com
+
+    # ------------------------------------------------------------------
+    # Thread
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._serve is None:
+            raise RuntimeError(f"{self.name} simulator: attach a link before start()")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name=f"{self.name}Sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        """Chạy link trong thread hiện tại tới khi stop() (dùng cho script chạy tay)"""
+        if self._serve is None:
+            raise RuntimeError(f"{self.name} simulator: attach a link before run()")
+        self._serve()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self._write = None
+        for fd in self._fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = ()
+        for handle in (self._server, self._serial):
+            if handle is not None:
+                try:
+                    handle.close()
+                except (OSError, serial.SerialException):
+                    pass
+        self._server = self._serial = None
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def send(self, data: bytes) -> bool:
+        """Gửi chủ động (VD PLC báo Ready) từ thread bất kỳ. False nếu chưa có link"""
+        write = self._write
+        if write is None:
+            return False
+        try:
+            with self._send_lock:
+                write(data)
+            return True
+        except OSError as exc:
+            self.say(f"[ERROR] {self.name} send error: {exc}")
+            return False
+
+    def _feed(self, buffer: bytes, data: bytes) -> bytes:
+        self.say(f"\n[RECEIVED] {self.name} from {self.peer}: {len(data)} bytes {data.decode('ascii', errors='replace')!r}")
+        return self.process_buffer(buffer + data, self.send, self.peer)
+
+    def _servePty(self):
+        master_fd = self._fds[0]
+        self.peer = f"pty:{self.port_name}"
+        self._write = lambda data: os.write(master_fd, data)
+        self.onConnected(self.peer)
+        buffer = b""
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([master_fd], [], [], self.POLL_S)
+                if not readable:
+                    continue
+                data = os.read(master_fd, 4096)
+            except (OSError, ValueError):
+                break
+            if data:
+                buffer = self._feed(buffer, data)
+
+    def _serveSerial(self):
+        port = self._serial
+        self.peer = f"COM:{self.port_name}"
+        self._write = port.write
+        self.onConnected(self.peer)
+        buffer = b""
+        while not self._stop.is_set():
+            try:
+                data = port.read(4096)
+            except (serial.SerialException, OSError, TypeError) as exc:
+                if not self._stop.is_set():
+                    self.say(f"[ERROR] {self.name} COM receive error: {exc}")
+                break
+            if data:
+                buffer = self._feed(buffer, data)
+
+    def _serveTcp(self):
+        """1 client tại 1 thời điểm (như thiết bị thật): client mới kết nối thì đóng client cũ"""
+        selector = selectors.DefaultSelector()
+        selector.register(self._server, selectors.EVENT_READ)
+        conn, buffer = None, b""
+
+        def drop():
+            nonlocal conn, buffer
+            if conn is not None:
+                self._write = None
+                selector.unregister(conn)
+                conn.close()
+                self.say(f"[DISCONNECTED] {self.name} client {self.peer}")
+            conn, buffer = None, b""
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    events = selector.select(self.POLL_S)
+                except (OSError, ValueError):
+                    break
+                for key, _ in events:
+                    if key.fileobj is self._server:
+                        try:
+                            new_conn, addr = self._server.accept()
+                        except OSError:
+                            continue
+                        drop()
+                        conn = new_conn
+                        selector.register(conn, selectors.EVENT_READ)
+                        self.peer = f"{addr}"
+                        self._write = conn.sendall
+                        self.onConnected(self.peer)
+                    elif key.fileobj is conn:
+                        try:
+                            data = conn.recv(4096)
+                        except OSError:
+                            data = b""
+                        if not data:
+                            drop()
+                            continue
+                        buffer = self._feed(buffer, data)
+                        if self._hangup:
+                            self._hangup = False
+                            drop()
+        finally:
+            drop()
+            selector.close()
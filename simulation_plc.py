@@ -1,13 +1,14 @@
 """Giả lập PLC:
 - MODE = 1: TCP server (ứng dụng PLC kết nối qua TCP)
 - MODE = 2: RS232 (COM) server – ứng dụng PLC kết nối qua cổng COM
+- Import PlcSimulator để chạy trên pty pair / TCP localhost (benchmark), sendReady() thay cho phím 's'
 """
 
-import socket
+import queue
 import threading
 import sys
 
-import serial
+from simulation_device import SimulatedDevice, split_lines
 
 # 1: TCP, 2: RS232 (COM)
 MODE = 2
@@ -20,20 +21,40 @@ COM = "COM4"
 BAUDRATE = 9600
 TIMEOUT_S = 1.0
 
-shutdown_flag = threading.Event()
-send_ready_event = threading.Event()
+READY = b"Ready\r\n"
 
 
-def bytes_to_hex(data: bytes, max_bytes: int = 100) -> str:
-    """Chuyển bytes sang HEX string để log."""
-    if len(data) <= max_bytes:
-        return " ".join(f"{b:02X}" for b in data)
-    hex_str = " ".join(f"{b:02X}" for b in data[:max_bytes])
-    return f"{hex_str} ... ({len(data)} bytes total)"
+class PlcSimulator(SimulatedDevice):
+    """PLC giả lập: sendReady() báo có panel, ghi lại các lệnh ứng dụng gửi về (OK / NG / CHE_OK / CHE_NG)"""
 
+    name = "PLC"
 
+    def __init__(self, verbose: bool = False, on_command=None):
+        super().__init__(verbose)
+        # on_command(text): gọi trong thread của simulator mỗi khi nhận 1 lệnh
+        self.on_command = on_command
+        self.commands = queue.Queue()
 
-def input_listener(send_func):
+    def sendReady(self) -> bool:
+        """Báo Ready (có panel mới trên line) -> ứng dụng bắt đầu 1 cycle marking"""
+        sent = self.send(READY)
+        if sent:
+            self.say("[PLC] >>> Sent Ready")
+        return sent
+
+    def process_buffer(self, buffer: bytes, send_func, peer_name: str) -> bytes:
+        lines, buffer = split_lines(buffer)
+        for line in lines:
+            text = line.decode("ascii", errors="replace").strip()
+            self.counts[text] += 1
+            self.say(f"[PLC RECEIVED] From {peer_name}: '{text}'")
+            self.commands.put(text)
+            if self.on_command is not None:
+                self.on_command(text)
+        return buffer
+
+
+def input_listener(simulator):
     print("Nhấn 's' để gửi READY, 'q' để thoát (không cần Enter).")
     # Sử dụng đọc ký tự không cần Enter
     try:
@@ -55,136 +76,51 @@ def input_listener(send_func):
         print(f"[ERROR] getch setup failed: {e}")
         return
 
-    while not shutdown_flag.is_set():
+    while not simulator.stopped:
         try:
             ch = getch()
             if not ch:
                 continue
             ch_lower = ch.lower()
             if ch_lower == 'q':
-                shutdown_flag.set()
+                simulator.stop()
                 print("[SHUTDOWN] Đã nhận lệnh tắt PLC giả lập.")
                 break
-            if ch_lower == 's':
-                send_ready_event.set()
-                send_func(b"Ready\r\n")
-                print("[PLC] >>> Sent Ready")
+            if ch_lower == 's' and not simulator.sendReady():
+                print("[PLC] No client connected, Ready not sent")
         except (KeyboardInterrupt, EOFError):
             break
 
 
-def handle_tcp_client(conn, addr):
-    peer = f"{addr}"
-    print(f"[CONNECTED] PLC client connected from {peer}")
-
-    def send_bytes(data: bytes):
-        try:
-            conn.sendall(data)
-        except Exception as exc:
-            print(f"[ERROR] TCP send error: {exc}")
-
-    listener_thread = threading.Thread(target=input_listener, args=(send_bytes,), daemon=True)
-    listener_thread.start()
-
+def _serve(simulator, description):
+    threading.Thread(target=input_listener, args=(simulator,), daemon=True).start()
     try:
-        while not shutdown_flag.is_set():
-            conn.settimeout(1.0)
-            try:
-                data = conn.recv(4096)
-                if not data:
-                    print(f"[DISCONNECTED] Client {peer} closed connection")
-                    break
-                print(f"\n{'=' * 30}")
-                print(f"[PLC RECEIVED TCP] From {peer}:")
-                print(f"  Length: {len(data)} bytes")
-                print(f"  ASCII: {repr(data.decode('ascii', errors='replace'))}")
-            except socket.timeout:
-                continue
-            except Exception as exc:
-                print(f"[ERROR] TCP receive error: {exc}")
-                break
+        simulator.run()
+    except KeyboardInterrupt:
+        print(f"\n[SHUTDOWN] KeyboardInterrupt - shutting down {description} PLC.")
     finally:
-        shutdown_flag.set()
-        conn.close()
-        print(f"[DISCONNECTED] TCP client {peer} disconnected")
+        simulator.stop()
+        print(f"[STOPPED] {description} PLC server exited cleanly.")
 
 
 def run_tcp_server():
     print(f"[STARTED] Fake PLC TCP Server listening on {HOST}:{PORT}")
     print("[INFO] Waiting for laser app to connect via TCP...")
-    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server.bind((HOST, PORT))
-    server.listen(1)
-
-    try:
-        server.settimeout(1)
-        while not shutdown_flag.is_set():
-            try:
-                conn, addr = server.accept()
-                handle_tcp_client(conn, addr)
-            except socket.timeout:
-                continue
-    except KeyboardInterrupt:
-        print("\n[SHUTDOWN] KeyboardInterrupt - shutting down TCP PLC.")
-        shutdown_flag.set()
-    finally:
-        server.close()
-        print("[STOPPED] TCP PLC server exited cleanly.")
+    simulator = PlcSimulator(verbose=True)
+    simulator.attachTcp(HOST, PORT)
+    _serve(simulator, "TCP")
 
 
 def run_com_server():
     print(f"[STARTED] Fake PLC COM Server on {COM} @ {BAUDRATE}bps")
     print("[INFO] Waiting for laser app to connect via COM...")
-
+    simulator = PlcSimulator(verbose=True)
     try:
-        ser = serial.Serial(
-            port=COM,
-            baudrate=BAUDRATE,
-            bytesize=serial.EIGHTBITS,
-            parity=serial.PARITY_NONE,
-            stopbits=serial.STOPBITS_ONE,
-            timeout=TIMEOUT_S,
-            xonxoff=False,
-            rtscts=False,
-            dsrdtr=False,
-        )
+        simulator.attachSerial(COM, BAUDRATE, TIMEOUT_S)
     except Exception as exc:
         print(f"[ERROR] Cannot open COM port {COM}: {exc}")
         return
-
-    def send_bytes(data: bytes):
-        try:
-            ser.write(data)
-        except Exception as exc:
-            print(f"[ERROR] COM send error: {exc}")
-
-    listener_thread = threading.Thread(target=input_listener, args=(send_bytes,), daemon=True)
-    listener_thread.start()
-
-    try:
-        while not shutdown_flag.is_set():
-            try:
-                data = ser.read(4096)
-                if not data:
-                    continue
-                print(f"\n{'=' * 30}")
-                print(f"[PLC RECEIVED COM] From {COM}:")
-                print(f"  Length: {len(data)} bytes")
-                print(f"  ASCII: {repr(data.decode('ascii', errors='replace'))}")
-            except Exception as exc:
-                print(f"[ERROR] COM receive error: {exc}")
-                break
-    except KeyboardInterrupt:
-        print("\n[SHUTDOWN] KeyboardInterrupt - shutting down COM PLC.")
-        shutdown_flag.set()
-    finally:
-        print("[SHUTDOWN] Closing COM port...")
-        try:
-            ser.close()
-        except Exception:
-            pass
-        print("[STOPPED] COM PLC server exited cleanly.")
+    _serve(simulator, "COM")
 
 
 def main():
@@ -1,23 +1,23 @@
 """
 Giả lập SFIS Server để test giao tiếp SFIS:
-- Lắng nghe trên cổng COM (RS232)
+- Lắng nghe trên cổng COM (RS232), hoặc import SfisSimulator để chạy trên pty pair / TCP localhost (benchmark)
 - Nhận START signal dạng: MO(20) + PANEL(20) + NEEDPSN{panel_num}
 - Trả về response PSN dạng cũ, ví dụ:
   2792000196          PX5BF03CL           PT53QG0754670080    ... PASS
 """
 
-import sys
-import time
 import threading
 import re
 
-import serial
+from simulation_device import SimulatedDevice, bytes_to_hex, split_lines
 
 
 # Cấu hình COM cho SFIS (phù hợp với cấu hình trong SFISWorker / config.yaml)
 COM = "COM7"          # Đổi lại nếu bạn dùng cổng khác
 BAUDRATE = 9600
 TIMEOUT_S = 1.0
+# Profile lỗi / latency khi chạy tay: None = như thiết bị lý tưởng, hoặc tên trong simulation_device.PROFILES
+PROFILE = None
 
 # Tham số định dạng — phải đồng bộ với SFISModel
 MO_LENGTH = 20
@@ -26,18 +26,6 @@ PSN_LENGTH = 20
 PASS_KEYWORD = "PASS"
 
 
-shutdown_flag = threading.Event()
-
-
-def bytes_to_hex(data: bytes, max_bytes: int = 100) -> str:
-    """Chuyển bytes sang HEX string để log"""
-    if len(data) <= max_bytes:
-        return " ".join(f"{b:02X}" for b in data)
-    else:
-        hex_str = " ".join(f"{b:02X}" for b in data[:max_bytes])
-        return f"{hex_str} ... ({len(data)} bytes total)"
-
-
 def _extract_panel_num(text: str) -> int:
     """Lấy số panel từ chuỗi NEEDPSNx (ví dụ NEEDPSN5 -> 5)."""
     m = re.search(r"NEEDPSN(\d+)", text.upper())
@@ -81,71 +69,74 @@ def build_psn_response(start_line: str) -> str:
     return response
 
 
-def process_buffer(buffer: bytes, send_func, peer_name: str) -> bytes:
-    """
-    Xử lý buffer, tách các lệnh theo \r\n / \n và gửi response qua send_func(bytes).
-    Trả về buffer còn dư (nếu không đủ để tạo 1 dòng).
-    """
-    while b"\r\n" in buffer or (b"\n" in buffer and b"\r\n" not in buffer):
-        if b"\r\n" in buffer:
-            line, buffer = buffer.split(b"\r\n", 1)
+class SfisSimulator(SimulatedDevice):
+    """SFIS giả lập: NEEDPSN -> PSN ... PASS, ...END -> ENDPASS, UNDO chỉ log (profile: latency / lỗi của reply)"""
+
+    name = "SFIS"
+
+    def process_buffer(self, buffer: bytes, send_func, peer_name: str) -> bytes:
+        """
+        Xử lý buffer, tách các lệnh theo \r\n / \n và gửi response qua send_func(bytes).
+        Trả về buffer còn dư (nếu không đủ để tạo 1 dòng).
+        """
+        lines, buffer = split_lines(buffer)
+        for line in lines:
+            try:
+                self._handle(line.decode("ascii", errors="replace").strip(), send_func, peer_name)
+            except Exception as e:
+                self.say(f"[ERROR] Error processing command from {peer_name}: {e}")
+                send_func(f"ERROR,{str(e)}\r\n".encode("ascii", errors="ignore"))
+        return buffer
+
+    def _handle(self, text: str, send_func, peer_name: str):
+        self.say(f"\n[COMMAND from {peer_name}] '{text}'")
+
+        # Lệnh UNDO: chỉ log, không phản hồi
+        if text.upper().startswith("UNDO"):
+            self.counts["UNDO"] += 1
+            self.say("[SFIS SIM] UNDO received (reset state)")
+            return
+
+        # START signal: MO(20) + PANEL(20) + NEEDPSN{panel_num}
+        if "NEEDPSN" in text:
+            command = "NEEDPSN"
+            self.say("[SFIS SIM] START signal (NEEDPSN...) detected")
+            response = build_psn_response(text)
+        elif text.endswith("END"):
+            # Giả lập SFIS nhận test complete và trả về ENDPASS
+            command = "END"
+            mo = text[:MO_LENGTH].strip()
+            response = f"{mo.ljust(MO_LENGTH)[:MO_LENGTH]}ENDPASS"
         else:
-            line, buffer = buffer.split(b"\n", 1)
+            # Lệnh khác: log + trả về lỗi chung
+            command = "UNKNOWN"
+            self.say(f"[SFIS SIM] Unknown command: '{text}'")
+            response = "ERROR,UNKNOWN_CMD"
 
-        if not line:
-            continue
+        self.counts[command] += 1
+        resp_line = f"{response}\r\n".encode("ascii", errors="ignore")
+        self.reply(command, resp_line, send_func)
+        self.say(f"[RESPONSE to {peer_name}] '{response}'")
+        self.say(f"  HEX: {bytes_to_hex(resp_line)}")
 
-        try:
-            text = line.decode("ascii", errors="replace").strip()
-            print(f"\n[COMMAND from {peer_name}] '{text}'")
-
-            response = None
-
-            # Lệnh UNDO: chỉ log, không phản hồi
-            if text.upper().startswith("UNDO"):
-                print("[SFIS SIM] UNDO received (reset state)")
-
-            # START signal: MO(20) + PANEL(20) + NEEDPSN{panel_num}
-            elif "NEEDPSN" in text:
-                print("[SFIS SIM] START signal (NEEDPSN...) detected")
-                psn_response = build_psn_response(text)
-                response = psn_response
-            elif text.strip().endswith("END"):
-                # Giả lập SFIS nhận test complete và trả về ENDPASS
-                mo_raw = text[:MO_LENGTH]
-                mo = mo_raw.strip()
-                resp = f"{mo.ljust(MO_LENGTH)[:MO_LENGTH]}ENDPASS"
-                resp_line = f"{resp}\r\n".encode("ascii", errors="ignore")
-                send_func(resp_line)
-                print(f"[SFIS SIM] END response -> '{resp}'")
-            else:
-                # Lệnh khác: log + trả về lỗi chung
-                print(f"[SFIS SIM] Unknown command: '{text}'")
-                response = "ERROR,UNKNOWN_CMD"
-
-            if response is not None:
-                resp_line = f"{response}\r\n".encode("ascii", errors="ignore")
-                send_func(resp_line)
-                print(f"[RESPONSE to {peer_name}] '{response}'")
-                print(f"  HEX: {bytes_to_hex(resp_line)}")
-
-        except Exception as e:
-            print(f"[ERROR] Error processing command from {peer_name}: {e}")
-            error_response = f"ERROR,{str(e)}\r\n".encode("ascii", errors="ignore")
-            send_func(error_response)
-
-    return buffer
-
-
-def input_listener():
+
+# Simulator in ra console, dùng cho script chạy tay và PtyResponder của benchmark
+_console = SfisSimulator(verbose=True)
+
+
+def process_buffer(buffer: bytes, send_func, peer_name: str) -> bytes:
+    return _console.process_buffer(buffer, send_func, peer_name)
+
+
+def input_listener(simulator):
     print("Nhấn 'q' rồi Enter để tắt SFIS simulator.")
-    while not shutdown_flag.is_set():
+    while not simulator.stopped:
         try:
             line = input()
         except EOFError:
             break
         if line.strip().lower() == "q":
-            shutdown_flag.set()
+            simulator.stop()
             print("[SHUTDOWN] Đã nhận lệnh tắt SFIS simulator.")
             break
 
@@ -156,58 +147,21 @@ def run_com_server():
     print("[INFO] Ready to receive SFIS START signal (NEEDPSN...) via RS232")
     print("[INFO] Press 'q' + Enter to shutdown\n")
 
-    listener_thread = threading.Thread(target=input_listener, daemon=True)
-    listener_thread.start()
-
+    simulator = SfisSimulator(verbose=True, profile=PROFILE)
     try:
-        ser = serial.Serial(
-            port=COM,
-            baudrate=BAUDRATE,
-            bytesize=serial.EIGHTBITS,
-            parity=serial.PARITY_NONE,
-            stopbits=serial.STOPBITS_ONE,
-            timeout=TIMEOUT_S,
-            xonxoff=False,
-            rtscts=False,
-            dsrdtr=False,
-        )
+        simulator.attachSerial(COM, BAUDRATE, TIMEOUT_S)
     except Exception as e:
         print(f"[ERROR] Cannot open COM port {COM}: {e}")
         return
 
-    buffer = b""
-    peer = f"COM:{COM}"
-
+    threading.Thread(target=input_listener, args=(simulator,), daemon=True).start()
     try:
-        while not shutdown_flag.is_set():
-            try:
-                data = ser.read(4096)
-                if not data:
-                    # Timeout bình thường, tiếp tục vòng lặp
-                    continue
-
-                print(f"\n{'=' * 60}")
-                print(f"[RECEIVED COM] From {peer}:")
-                print(f"  Length: {len(data)} bytes")
-                print(f"  ASCII: {repr(data.decode('ascii', errors='replace'))}")
-
-                buffer += data
-
-                # Xử lý buffer thành các lệnh
-                buffer = process_buffer(buffer, ser.write, peer)
-
-            except Exception as e:
-                print(f"[ERROR] COM receive error on {peer}: {e}")
-                break
+        simulator.run()
     except KeyboardInterrupt:
         print("\n[SHUTDOWN] KeyboardInterrupt - shutting down SFIS COM server.")
-        shutdown_flag.set()
     finally:
         print("[SHUTDOWN] Closing COM port...")
-        try:
-            ser.close()
-        except Exception:
-            pass
+        simulator.stop()
         print("[STOPPED] SFIS COM server exited cleanly.")
 
 
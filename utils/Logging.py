@@ -2,11 +2,14 @@
 Logging Module - Hệ thống logging cho ứng dụng
 Hỗ trợ logging ra console (có màu) và file (theo ngày)
 """
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import threading
-from datetime import datetime
 from utils.setting import settings_manager
+from utils.log_rotation import DailySizeRotatingFileHandler
 
 # Màu ANSI cho console
 COLOR = {
@@ -53,6 +56,117 @@ class ColoredFormatter(logging.Formatter):
         return super().format(record_copy)
 
 
+# ===== FORMAT GIỐNG NHAU CHO CONSOLE VÀ FILE =====
+LOG_FORMAT = (
+    "[%(asctime)s] "
+    "[%(levelname)s] "
+    "[%(filename)s] "
+    "[%(funcName)s:%(lineno)d] "
+    "[Name=%(threadName)s] "
+    "%(message)s"
+)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_QUEUE_SIZE = 10000
+
+
+def createHandlers(log_dir, log_name):
+    """Tạo console handler (có màu, INFO) và file handler (DEBUG). Trả về (console, file, log_filename)"""
+    # ===== Console handler có màu =====
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(ColoredFormatter(LOG_FORMAT, DATE_FORMAT))
+    console_handler.setLevel(logging.INFO)
+
+    # ===== File =====
+    # File name: Regilaser_2025-11-21.log, đổi file lúc 0h / khi vượt log_max_mb, file cũ nén .gz
+    file_handler = DailySizeRotatingFileHandler(
+        log_dir,
+        log_name,
+        max_bytes=int(settings_manager.get("advanced.log_max_mb", 50) * 1024 * 1024),
+        retention_bytes=int(settings_manager.get("advanced.log_retention_mb", 1024) * 1024 * 1024),
+        retention_days=settings_manager.get("advanced.log_retention_days", 30),
+    )
+    log_filename = file_handler.baseFilename
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    file_handler.setLevel(logging.DEBUG)
+    return console_handler, file_handler, log_filename
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler với queue giới hạn.
+    policy "drop": queue đầy thì bỏ record DEBUG / INFO (không block thread I/O), đếm số record bị bỏ và ghi lại
+      số đó vào log; WARNING trở lên không bao giờ bị bỏ (chờ listener như policy "block")
+    policy "block": queue đầy thì chờ listener (không mất log, thread gọi có thể bị chậm)
+    """
+
+    def __init__(self, log_queue, policy="drop"):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Listener chạy cùng process: đưa nguyên record vào queue, việc format để listener làm
+        return record
+
+    def enqueue(self, record):
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                with self._drop_lock:
+                    self.dropped += 1
+                return
+        if self.dropped:
+            self.reportDropped()
+
+    def reportDropped(self, wait=False):
+        """Ghi 1 record WARNING với số record đã bị bỏ. wait=True: chờ chỗ trống trong queue (lúc đóng ứng dụng)"""
+        with self._drop_lock:
+            dropped, self.dropped = self.dropped, 0
+        if not dropped:
+            return
+        warning = logging.LogRecord(
+            "Regilaser", logging.WARNING, __file__, 0,
+            f"Log queue full: dropped {dropped} record(s)", None, None, "enqueue",
+        )
+        try:
+            self.queue.put(warning, block=wait)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += dropped
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener cho queue giới hạn: sentinel chờ chỗ trống (put_nowait sẽ lỗi khi queue đầy), stop() gọi nhiều lần được"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def attachQueueListener(logger, handlers, maxsize=DEFAULT_QUEUE_SIZE, policy="drop"):
+    """Gắn BoundedQueueHandler vào logger, các handler thật chạy trong thread QueueListener"""
+    log_queue = queue.Queue(maxsize=maxsize)
+    handler = BoundedQueueHandler(log_queue, policy)
+    logger.addHandler(handler)
+    listener = DrainingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Đóng ứng dụng: xả hết record còn trong queue ra console/file
+    atexit.register(listener.stop)
+    # atexit chạy ngược thứ tự đăng ký: số record bị bỏ được ghi trước khi listener dừng
+    atexit.register(handler.reportDropped, wait=True)
+    return listener
+
+
 class ThreadLogger:
     _instance = None
     _lock = threading.Lock()
@@ -92,50 +206,31 @@ class ThreadLogger:
                 logger.setLevel(logging.DEBUG)
                 logger.propagate = False
 
+                listener = None
                 if not logger.handlers:
+                    console_handler, file_handler, log_filename = createHandlers(log_dir, log_name)
 
-                    # ===== FORMAT GIỐNG NHAU CHO CONSOLE VÀ FILE =====
-                    log_format = (
-                        "[%(asctime)s] "
-                        "[%(levelname)s] "
-                        "[%(filename)s] "
-                        "[%(funcName)s:%(lineno)d] "
-                        "[Name=%(threadName)s] "
-                        "%(message)s"
-                    )
-
-                    # ===== Console handler có màu =====
-                    console_handler = logging.StreamHandler()
-                    console_handler.setFormatter(
-                        ColoredFormatter(log_format, "%Y-%m-%d %H:%M:%S")
-                    )
-                    console_handler.setLevel(logging.INFO)
-
-                    # ===== File =====
-                    # File name: Regilaser_2025-11-21.log
-                    today = datetime.now().strftime("%Y-%m-%d")
-                    log_filename = os.path.join(log_dir, f"{log_name}_{today}.log")
-                    
-                    file_handler = logging.FileHandler(
-                        filename=log_filename,
-                        mode='a',  # Append mode
-                        encoding="utf-8"
-                    )
-                    
-                    file_handler.setFormatter(
-                        logging.Formatter(log_format, "%Y-%m-%d %H:%M:%S")
-                    )
-                    file_handler.setLevel(logging.DEBUG)
-
-                    # Thêm handlers vào logger
-                    logger.addHandler(console_handler)
-                    logger.addHandler(file_handler)
+                    if settings_manager.get("advanced.async_logging", True):
+                        # Thread gọi log chỉ enqueue record; format/màu/ghi file chạy ở thread QueueListener
+                        listener = attachQueueListener(
+                            logger,
+                            (console_handler, file_handler),
+                            maxsize=settings_manager.get("advanced.log_queue_size", DEFAULT_QUEUE_SIZE),
+                            policy=settings_manager.get("advanced.log_queue_policy", "drop"),
+                        )
+                    else:
+                        # Thêm handlers vào logger
+                        logger.addHandler(console_handler)
+                        logger.addHandler(file_handler)
                     
                     # Log khởi động
                     logger.info("--------------------------------- Starting Logger ---------------------------------")
                     logger.info(f"Logger initialized: {log_name}")
                     logger.info(f"Log file: {log_filename}")
+                    if listener is not None:
+                        logger.info("Async logging enabled (QueueHandler -> QueueListener)")
        
+                cls._instance.listener = listener
                 cls._instance.logger = logger
 
             return cls._instance
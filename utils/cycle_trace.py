@@ -0,0 +1,222 @@
+"""
+Cycle Trace - Đo thời gian từng stage của 1 chu kỳ marking (PLC Ready -> PLC OK)
+- mark(stage) ghi timestamp monotonic cho stage trong cycle hiện tại
+- Giữ rolling window cho mỗi stage, tính p50/p95/p99 trong bộ nhớ
+- Mỗi ca (shift) ghi 1 file CSV (1 dòng / cycle) và 1 file JSON tổng hợp percentile
+"""
+import csv
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from utils.Logging import getLogger
+from utils.setting import settings_manager
+
+log = getLogger()
+
+# Thứ tự stage trong 1 cycle; duration của stage = timestamp stage - timestamp stage trước đó
+STAGES = (
+    "plc_ready",
+    "needpsn_sent",
+    "sfis_response",
+    "parse",
+    "ga_ack",
+    "c2_ack",
+    "nt_ack",
+    "end_ack",
+    "plc_ok_sent",
+)
+ROLLING_WINDOW = 500  # số cycle giữ lại để tính percentile
+SUMMARY_EVERY = 20  # ghi lại file JSON sau mỗi N cycle
+
+
+def _percentile(ordered, p):
+    if not ordered:
+        return None
+    # nearest-rank
+    return round(ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)], 2)
+
+
+class CycleTracer:
+    """Tracer dùng chung cho MarkingWorker / SFISPresenter / LaserPresenter / PLCPresenter"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._marks = None  # {stage: monotonic timestamp} của cycle đang chạy
+        self._cycle_start_wall = None
+        self._cycle_count = 0
+        self._history = {stage: deque(maxlen=ROLLING_WINDOW) for stage in STAGES + ("total",)}
+        self._shift_id = None
+        self.enabled = settings_manager.get("advanced.cycle_trace", True)
+
+    # ------------------------------------------------------------------
+    # Ghi timestamp
+    # ------------------------------------------------------------------
+    def beginCycle(self) -> bool:
+        """Bắt đầu cycle mới (PLC Ready). False nếu cycle trước chưa kết thúc"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self._marks is not None:
+                log.warning("Cycle trace: previous cycle not finished, ignoring new start")
+                return False
+            self._marks = {"plc_ready": time.monotonic()}
+            self._cycle_start_wall = datetime.now()
+            return True
+
+    def mark(self, stage: str):
+        """Ghi timestamp cho stage. Bỏ qua nếu không có cycle đang chạy hoặc thread đang detached"""
+        if not self.enabled or getattr(self._local, "detached", False):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._marks is not None and stage not in self._marks:
+                self._marks[stage] = now
+
+    @contextmanager
+    def detached(self):
+        """Các mark trong block này (thread hiện tại) không thuộc cycle đang chạy (VD: SFIS prefetch)"""
+        self._local.detached = True
+        try:
+            yield
+        finally:
+            self._local.detached = False
+
+    def endCycle(self, success: bool = True):
+        """
+        Kết thúc cycle: tính duration từng stage, cập nhật histogram, ghi CSV ca hiện tại.
+        Histogram chỉ lấy cycle thành công (cycle lỗi vẫn được ghi vào CSV).
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            marks, self._marks = self._marks, None
+            start_wall = self._cycle_start_wall
+        if marks is None:
+            return None
+        durations = self._durations(marks)
+
+        shift_id = self.shiftId(start_wall)
+        if self._shift_id is not None and shift_id != self._shift_id:
+            # Sang ca mới: chốt file JSON của ca cũ, histogram bắt đầu lại
+            self.dumpSummary()
+            with self._lock:
+                for history in self._history.values():
+                    history.clear()
+                self._cycle_count = 0
+        self._shift_id = shift_id
+
+        with self._lock:
+            if success:
+                for stage, value in durations.items():
+                    self._history[stage].append(value)
+            self._cycle_count += 1
+            cycle_no = self._cycle_count
+
+        try:
+            self._writeCycle(shift_id, cycle_no, start_wall, success, durations)
+            if cycle_no % SUMMARY_EVERY == 0:
+                self.dumpSummary()
+        except OSError as e:
+            log.error(f"Cycle trace: cannot write trace file: {e}")
+
+        stage_text = ", ".join(f"{stage}={value:.1f}ms" for stage, value in durations.items() if stage != "total")
+        log.info(f"Cycle #{cycle_no} {'OK' if success else 'FAIL'} total={durations['total']:.1f}ms ({stage_text})")
+        return durations
+
+    @staticmethod
+    def _durations(marks):
+        """Duration (ms) của các stage có mặt trong cycle, tính từ stage trước đó có mặt"""
+        durations = {}
+        previous = marks["plc_ready"]
+        for stage in STAGES[1:]:
+            if stage in marks:
+                durations[stage] = (marks[stage] - previous) * 1000.0
+                previous = marks[stage]
+        durations["total"] = (previous - marks["plc_ready"]) * 1000.0
+        return durations
+
+    # ------------------------------------------------------------------
+    # Thống kê
+    # ------------------------------------------------------------------
+    def percentiles(self, stage: str):
+        """p50/p95/p99 (ms) của rolling window cho 1 stage"""
+        with self._lock:
+            ordered = sorted(self._history[stage])
+        return {
+            "n": len(ordered),
+            "p50": _percentile(ordered, 50),
+            "p95": _percentile(ordered, 95),
+            "p99": _percentile(ordered, 99),
+        }
+
+    def summary(self):
+        return {stage: self.percentiles(stage) for stage in STAGES[1:] + ("total",)}
+
+    # ------------------------------------------------------------------
+    # File theo ca
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _traceDir():
+        base_path = settings_manager.get("advanced.path_app", "") or "logs"
+        trace_dir = os.path.join(base_path, "RegilaserLog", "cycle_times")
+        os.makedirs(trace_dir, exist_ok=True)
+        return trace_dir
+
+    @staticmethod
+    def shiftId(moment: datetime) -> str:
+        """
+        ID ca làm việc theo advanced.shift_start_hours (VD [8, 20]).
+        Ca đêm qua 0h vẫn thuộc ngày bắt đầu ca: 2025-01-01_20 chạy tới 08:00 ngày 02.
+        """
+        hours = sorted(settings_manager.get("advanced.shift_start_hours", [8, 20]) or [0])
+        day = moment.date()
+        if moment.hour < hours[0]:
+            day -= timedelta(days=1)
+            start_hour = hours[-1]
+        else:
+            start_hour = max(h for h in hours if h <= moment.hour)
+        return f"{day.isoformat()}_{start_hour:02d}"
+
+    def _writeCycle(self, shift_id, cycle_no, start_wall, success, durations):
+        csv_path = os.path.join(self._traceDir(), f"cycle_{shift_id}.csv")
+        new_file = not os.path.exists(csv_path)
+        with open(csv_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["cycle", "start_time", "result"] + list(STAGES[1:]) + ["total"])
+            row = [cycle_no, start_wall.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], "OK" if success else "FAIL"]
+            row += [f"{durations[stage]:.2f}" if stage in durations else "" for stage in STAGES[1:]]
+            row.append(f"{durations['total']:.2f}")
+            writer.writerow(row)
+
+    def dumpSummary(self):
+        """Ghi p50/p95/p99 của ca hiện tại ra cycle_<shift>.json"""
+        if not self.enabled or self._shift_id is None:
+            return None
+        json_path = f"cycle_{self._shift_id}.json"
+        data = {
+            "shift": self._shift_id,
+            "cycles": self._cycle_count,
+            "window": ROLLING_WINDOW,
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "stages_ms": self.summary(),
+        }
+        try:
+            json_path = os.path.join(self._traceDir(), json_path)
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            log.error(f"Cycle trace: cannot write summary {json_path}: {e}")
+            return None
+        return json_path
+
+
+# Instance global dùng chung cho toàn bộ ứng dụng
+cycle_tracer = CycleTracer()
@@ -0,0 +1,150 @@
+"""
+Log Rotation - File handler đổi file lúc 0h và khi vượt dung lượng, nén gzip ở thread nền
+- File đang ghi: <log_name>_<yyyy-mm-dd>.log (giống tên cũ)
+- Vượt max_bytes trong ngày: đổi tên thành <log_name>_<yyyy-mm-dd>.<n>.log rồi nén
+- File đã đóng được nén thành .log.gz, sau đó xóa file cũ nhất cho tới khi nằm trong retention
+"""
+import gzip
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+# Module này được utils.Logging import nên không dùng getLogger(): lỗi của thread nén in ra stderr
+
+
+class LogArchiver:
+    """
+    Thread nền nén file log đã đóng và giữ thư mục log trong giới hạn retention:
+    xóa file cũ hơn retention_days, và file cũ nhất khi tổng dung lượng file đã đóng vượt retention_bytes
+    """
+
+    def __init__(self, log_dir, log_name, retention_bytes, retention_days):
+        self.log_dir = log_dir
+        self.log_name = log_name
+        self.retention_bytes = retention_bytes
+        self.retention_days = retention_days
+        self._pattern = re.compile(rf"^{re.escape(log_name)}_(\d{{4}}-\d{{2}}-\d{{2}})((?:\.\d+)*)\.log(\.gz)?$")
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="LogArchiver", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, active_path=None):
+        """Nén path (None: chỉ dọn retention). active_path: file đang ghi, không được đụng tới"""
+        self._jobs.put((path, active_path))
+
+    def _run(self):
+        while True:
+            path, active_path = self._jobs.get()
+            try:
+                if path and os.path.exists(path):
+                    self._compress(path)
+                self._enforceRetention(active_path)
+            except OSError as e:
+                print(f"LogArchiver error: {e}")
+
+    @staticmethod
+    def _compress(path):
+        target = f"{path}.gz"
+        index = 1
+        while os.path.exists(target):
+            root = path[:-len(".log")]
+            target = f"{root}.{index}.log.gz"
+            index += 1
+        with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.remove(path)
+
+    def _enforceRetention(self, active_path):
+        files = []
+        for name in os.listdir(self.log_dir):
+            match = self._pattern.match(name)
+            path = os.path.join(self.log_dir, name)
+            if not match or (active_path and os.path.abspath(path) == os.path.abspath(active_path)):
+                continue
+            day, suffix = match.group(1), match.group(2)
+            index = int(suffix.rsplit(".", 1)[-1]) if suffix else 0
+            files.append((day, index, os.path.getsize(path), path))
+        files.sort()  # cũ nhất trước (theo ngày trong tên file, không theo mtime: nén làm đổi mtime)
+
+        oldest_day = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        total = sum(size for _, _, size, _ in files)
+        for day, _, size, path in files:
+            if day >= oldest_day and total <= self.retention_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def oldLogs(self, active_path):
+        """File .log (chưa nén) của các ngày trước, VD ứng dụng bị tắt trước khi kịp nén"""
+        result = []
+        for name in os.listdir(self.log_dir):
+            path = os.path.join(self.log_dir, name)
+            if (self._pattern.match(name) and name.endswith(".log")
+                    and os.path.abspath(path) != os.path.abspath(active_path)):
+                result.append(path)
+        return result
+
+
+class DailySizeRotatingFileHandler(logging.FileHandler):
+    """FileHandler đổi file theo ngày (0h) và theo dung lượng, nén file cũ bằng LogArchiver"""
+
+    def __init__(self, log_dir, log_name, max_bytes, retention_bytes, retention_days, encoding="utf-8"):
+        self.log_dir = log_dir
+        self.log_name = log_name
+        self.max_bytes = max_bytes
+        self._day = datetime.now().date()
+        self._next_midnight = self._midnightAfter(self._day)
+        super().__init__(self._pathFor(self._day), mode="a", encoding=encoding)
+        self.archiver = LogArchiver(log_dir, log_name, retention_bytes, retention_days)
+        for path in self.archiver.oldLogs(self.baseFilename):
+            self.archiver.submit(path, self.baseFilename)
+        self.archiver.submit(None, self.baseFilename)
+
+    def _pathFor(self, day):
+        return os.path.abspath(os.path.join(self.log_dir, f"{self.log_name}_{day.isoformat()}.log"))
+
+    @staticmethod
+    def _midnightAfter(day):
+        return time.mktime((day + timedelta(days=1)).timetuple())
+
+    def emit(self, record):
+        try:
+            if time.time() >= self._next_midnight:
+                self._rolloverDay()
+            elif self.max_bytes and self.stream is not None and self.stream.tell() >= self.max_bytes:
+                self._rolloverSize()
+        except OSError:
+            self.handleError(record)
+        super().emit(record)
+
+    def _closeStream(self):
+        if self.stream is not None:
+            self.stream.flush()
+            self.stream.close()
+            self.stream = None
+
+    def _rolloverDay(self):
+        closed_path = self.baseFilename
+        self._closeStream()
+        self._day = datetime.now().date()
+        self._next_midnight = self._midnightAfter(self._day)
+        self.baseFilename = self._pathFor(self._day)
+        self.stream = self._open()
+        if closed_path != self.baseFilename:  # đồng hồ bị chỉnh lùi: vẫn ghi tiếp file cũ
+            self.archiver.submit(closed_path, self.baseFilename)
+
+    def _rolloverSize(self):
+        self._closeStream()
+        root = self.baseFilename[:-len(".log")]
+        index = 1
+        while os.path.exists(f"{root}.{index}.log") or os.path.exists(f"{root}.{index}.log.gz"):
+            index += 1
+        rotated = f"{root}.{index}.log"
+        os.replace(self.baseFilename, rotated)
+        self.stream = self._open()
+        self.archiver.submit(rotated, self.baseFilename)
@@ -4,6 +4,7 @@ import json
 import subprocess
 from utils.Logging import getLogger
 from utils.AppPathService import getAppDirectory
+from utils.setting import settings_manager
 log = getLogger()
 
 def restartApp(app_path = None):
@@ -13,6 +14,8 @@ def restartApp(app_path = None):
     app_path: đường dẫn exe của ứng dụng cần restart
     """ 
     try:
+        # Ghi settings còn chờ (write-behind) trước khi process bị thay thế
+        settings_manager.flush()
         if app_path is None:
             app_path = sys.executable
         else:
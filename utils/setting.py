@@ -1,9 +1,114 @@
+"""
+Settings Manager - Đọc / ghi %APPDATA%/Regilaser/settings.json
+- Write-behind (advanced.settings_write_behind): set() / save_settings() chỉ đánh dấu dirty,
+  thread nền gộp các lần ghi trong cửa sổ debounce (advanced.settings_debounce_ms) thành 1 lần ghi
+- Ghi atomic: settings.json.tmp + fsync rồi os.replace => crash giữa chừng không làm hỏng file
+- flush(): ghi ngay phần còn chờ (gọi trước khi restart / thoát, đã đăng ký atexit)
+- Mọi thao tác đọc / ghi cây settings đi qua 1 lock => get() không thấy cây đang sửa dở
+- snapshot(): SettingsSnapshot typed, bất biến cho hot path (dựng lại 1 lần mỗi khi settings đổi),
+  settingsChanged(snapshot) phát sau mỗi lần set / update / save / reload để các thành phần cache setting làm mới
+- update({key: value}): đổi nhiều key trong 1 lần giữ lock, lưu như save_settings() và chỉ phát settingsChanged 1 lần
+- applyOverlay(): ghi đè 1 phần cây chỉ trong bộ nhớ (cấu hình riêng 1 trạm trong multi-station),
+  get() / snapshot() thấy giá trị ghi đè, settings.json không bao giờ bị ghi phần overlay
+- read_only (process của 1 trạm trong multi-station): set / update / save chỉ đổi trong bộ nhớ, không ghi
+  settings.json => process trạm không ghi đè thay đổi của GUI / process khác bằng bản cây cũ của nó
+"""
+import atexit
+import copy
 import json
 import os
+import threading
+import time
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from PySide6.QtCore import QObject, Signal
 from utils.AppPathService import getAppDirectory
 
-class SettingsManager:
+DEFAULT_DEBOUNCE_MS = 300
+
+
+@lru_cache(maxsize=512)
+def _keyPath(key):
+    """'general.mo' -> ('general', 'mo'), cache để get() không split lại mỗi lần gọi"""
+    return tuple(key.split('.'))
+
+
+def _merged(base, overlay):
+    """Bản sao base với các key của overlay ghi đè (đệ quy theo dict)"""
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merged(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _lookup(tree, path, default=None):
+    value = tree
+    for k in path:
+        if isinstance(value, dict):
+            value = value.get(k)
+        else:
+            return default
+    return value if value is not None else default
+
+
+@dataclass(frozen=True, slots=True)
+class SettingsSnapshot:
+    """Các setting dùng trên hot path (marking / SFIS / laser). Giá trị thiếu hoặc null => default của field"""
+    # general
+    mo: str = ""
+    op_num: str = ""
+    pcb_product_name: str = ""
+    pcb_number: str = ""
+    post_result_sfc: bool = True
+    sfis_lookahead: bool = False
+    sfis_outbox: bool = True
+    # project
+    current_project: str = ""
+    script: int | str | None = None
+    panel_num: int | str = ""
+    sfis_format: int = 1
+    delay_step: float = 0
+    # connection.laser
+    laser_timeout_ms: int | None = None
+    laser_ack_driven: bool = False
+    laser_retry_count: int = 3
+    laser_retry_backoff_ms: int = 20
+
+    @classmethod
+    def fromTree(cls, tree):
+        return cls(**{name: _lookup(tree, path, default) for name, path, default in _SNAPSHOT_FIELDS})
+
+
+# Field của snapshot -> key path trong settings.json (compile 1 lần)
+_SNAPSHOT_PATHS = {
+    "mo": "general.mo",
+    "op_num": "general.op_num",
+    "pcb_product_name": "general.pcb_product_name",
+    "pcb_number": "general.pcb_number",
+    "post_result_sfc": "general.post_result_sfc",
+    "sfis_lookahead": "general.sfis_lookahead",
+    "sfis_outbox": "general.sfis_outbox",
+    "current_project": "project.current_project",
+    "script": "project.script",
+    "panel_num": "project.panel_num",
+    "sfis_format": "project.sfis_format",
+    "delay_step": "project.delay_step",
+    "laser_timeout_ms": "connection.laser.timeout_ms",
+    "laser_ack_driven": "connection.laser.ack_driven",
+    "laser_retry_count": "connection.laser.retry_count",
+    "laser_retry_backoff_ms": "connection.laser.retry_backoff_ms",
+}
+_SNAPSHOT_FIELDS = tuple((f.name, _keyPath(_SNAPSHOT_PATHS[f.name]), f.default) for f in fields(SettingsSnapshot))
+
+
+class SettingsManager(QObject):
+    settingsChanged = Signal(object)  # SettingsSnapshot mới sau set / update / save_settings / reload / reset_to_default
+
     def __init__(self):
+        super().__init__()
         exe_dir = getAppDirectory()
         appdata = os.getenv("APPDATA")
         self.app_folder = os.path.join(appdata, "Regilaser")
@@ -17,10 +122,27 @@ class SettingsManager:
         exe_dir,
         "default_setting.json"
             )
-        
+
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()  # giữ thứ tự: snapshot sau không bị ghi đè bởi snapshot trước
+        self._dirty = False
+        self._last_change = 0.0
+        self._flusher = None
+        self._snapshot = None  # SettingsSnapshot, None khi cần dựng lại
+        self._overlay = None  # applyOverlay(): ghi đè chỉ trong bộ nhớ
+        self._view = None  # cây settings + overlay, None khi cần dựng lại
+        self.write_behind = False  # lần ghi default settings lúc khởi tạo luôn ghi ngay
+        self.read_only = False  # True: không bao giờ ghi settings.json (process trạm, xem utils.stations)
+        self._read_only_warned = False
+
         # Load settings
         self._settings = self._loadSettings()
-    
+
+        self.write_behind = bool(self.get("advanced.settings_write_behind", True))
+        self.debounce_s = max(0, self.get("advanced.settings_debounce_ms", DEFAULT_DEBOUNCE_MS)) / 1000.0
+        atexit.register(self.flush)
+
     def _loadSettings(self):
         if os.path.exists(self.config_path):
             try:
@@ -30,7 +152,7 @@ class SettingsManager:
                 return self._loadDefaultSettings()
         else:
             return self._loadDefaultSettings()
-    
+
     def _loadDefaultSettings(self):
         try:
             with open(self.default_setting_path, "r", encoding="utf-8") as df:
@@ -39,45 +161,172 @@ class SettingsManager:
             return default_settings
         except Exception as e:
             return {}
-    
+
+    def _tree(self):
+        """Cây settings đang hiệu lực (đã áp overlay). Gọi khi đang giữ lock"""
+        if self._overlay is None:
+            return self._settings
+        if self._view is None:
+            self._view = _merged(self._settings, self._overlay)
+        return self._view
+
     def get_settings(self):
-        return self._settings.copy()
-    
+        """Bản sao sâu của cây settings (sửa bản sao không ảnh hưởng settings đang dùng)"""
+        with self._lock:
+            return copy.deepcopy(self._tree())
+
     def get(self, key, default=None):
-        keys = key.split('.')
-        value = self._settings
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                return default
-        return value if value is not None else default
-    
-    def set(self, key, value):
-        keys = key.split('.')
+        with self._lock:
+            return _lookup(self._tree(), _keyPath(key), default)
+
+    def snapshot(self) -> SettingsSnapshot:
+        """Bản chụp bất biến hiện tại: hot path đọc attribute thay vì get() theo key"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = SettingsSnapshot.fromTree(self._tree())
+                snapshot = self._snapshot
+        return snapshot
+
+    def applyOverlay(self, overlay):
+        """Ghi đè 1 phần cây settings chỉ trong bộ nhớ (None: bỏ overlay). set() / save vẫn ghi cây gốc"""
+        with self._lock:
+            self._overlay = copy.deepcopy(overlay) if overlay else None
+            self._view = None
+            self._snapshot = None
+        self.settingsChanged.emit(self.snapshot())
+
+    def _assign(self, key, value):
+        """Gọi khi đang giữ lock"""
+        keys = _keyPath(key)
         settings = self._settings
         for k in keys[:-1]:
             if k not in settings:
                 settings[k] = {}
             settings = settings[k]
         settings[keys[-1]] = value
-    
+
+    def set(self, key, value):
+        with self._lock:
+            self._assign(key, value)
+            self._markDirty()
+        self.settingsChanged.emit(self.snapshot())
+
+    def update(self, values):
+        """
+        Đổi nhiều key ('a.b' -> value) cùng lúc: get() / snapshot() không thấy trạng thái đổi dở,
+        settingsChanged phát 1 lần. Lưu như save_settings()
+        """
+        with self._lock:
+            for key, value in values.items():
+                self._assign(key, value)
+            self._markDirty()
+            write_behind = self.write_behind
+        self.settingsChanged.emit(self.snapshot())
+        return True if write_behind else self.flush()
+
     def save_settings(self, settings=None):
-        if settings is not None:
-            self._settings = settings
-        
+        """
+        Lưu settings. Write-behind: chỉ lên lịch ghi (trả về True), lỗi ghi được log ở thread nền;
+        cần kết quả ghi thật thì gọi flush(). Không write-behind: ghi ngay, trả về True/False.
+        """
+        with self._lock:
+            if settings is not None:
+                self._settings = settings
+            self._markDirty()
+            write_behind = self.write_behind
+        self.settingsChanged.emit(self.snapshot())
+        return True if write_behind else self.flush()
+
+    # ------------------------------------------------------------------
+    # Ghi nền (write-behind)
+    # ------------------------------------------------------------------
+    def _markDirty(self):
+        """Gọi khi đang giữ lock"""
+        self._snapshot = None
+        self._view = None
+        self._dirty = True
+        self._last_change = time.monotonic()
+        if not self.write_behind or self.read_only:
+            return
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flushLoop, name="SettingsFlusher", daemon=True)
+            self._flusher.start()
+        self._cond.notify()
+
+    def _flushLoop(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                # Debounce: chờ tới khi không còn thay đổi mới trong cửa sổ rồi mới ghi 1 lần
+                while True:
+                    remaining = self._last_change + self.debounce_s - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            if not self.flush():
+                with self._lock:
+                    self._last_change = time.monotonic()  # thử lại sau 1 cửa sổ debounce
+
+    def flush(self):
+        """Ghi ngay settings đang chờ (nếu có). Trả về False nếu ghi lỗi"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                self._dirty = False
+                text = None if self.read_only else json.dumps(self._settings, indent=2, ensure_ascii=False)
+                warn = text is None and not self._read_only_warned
+                self._read_only_warned = self._read_only_warned or warn
+            if text is None:
+                if warn:
+                    self._log("warning", f"Settings: read-only in this process, changes not written to "
+                                         f"{self.config_path}")
+                return True
+            try:
+                self._writeAtomic(text)
+                return True
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                self._log("error", f"Settings: failed to write {self.config_path}: {e}")
+                return False
+
+    def _writeAtomic(self, text):
+        tmp_path = f"{self.config_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.config_path)
+
+    @staticmethod
+    def _log(level, message):
         try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(self._settings, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            return False
-    
+            # Import muộn: utils.Logging import module này khi khởi tạo
+            from utils.Logging import getLogger
+            getattr(getLogger(), level)(message)
+        except Exception:
+            print(message)
+
     def reload(self):
-        self._settings = self._loadSettings()
-    
+        self.flush()
+        settings = self._loadSettings()
+        with self._lock:
+            self._settings = settings
+            self._snapshot = None
+            self._view = None
+        self.settingsChanged.emit(self.snapshot())
+
     def reset_to_default(self):
-        self._settings = self._loadDefaultSettings()
+        settings = self._loadDefaultSettings()
+        with self._lock:
+            self._settings = settings
+            self._snapshot = None
+            self._view = None
+        self.settingsChanged.emit(self.snapshot())
 
 
 # Tạo instance global để sử dụng trong toàn bộ ứng dụng
@@ -0,0 +1,98 @@
+"""
+Startup Profiler - Đo thời gian khởi động (bật bằng --profile-startup hoặc REGILASER_PROFILE_STARTUP=1)
+- Thời gian import từng module giống `python -X importtime` (self / cumulative), chạy được cả bản PyInstaller
+- mark(phase): mốc thời gian tính từ lúc import module này (imports, MainWindow, presenter, show, SYSTEM IS READY)
+- report(): ghi các mốc + các module import chậm nhất vào log, rồi gỡ hook import
+Chỉ dùng thư viện chuẩn, phải import trước mọi module khác trong main.py
+"""
+import os
+import sys
+import threading
+import time
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_ENV = "REGILASER_PROFILE_STARTUP"
+TOP_IMPORTS = 25
+
+
+class StartupProfiler:
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = PROFILE_FLAG in sys.argv or os.getenv(PROFILE_ENV, "") == "1"
+        self.enabled = enabled
+        self.t0 = time.perf_counter()
+        self.phases = []  # (phase, ms từ t0)
+        self.imports = []  # (module, self_us, cumulative_us, depth)
+        self._stack = []  # thời gian import con của từng import đang chạy
+        self._main_ident = threading.get_ident()
+        self._original = None
+        if enabled:
+            self._installImportHook()
+
+    # ------------------------------------------------------------------
+    # Import timing
+    # ------------------------------------------------------------------
+    def _installImportHook(self):
+        # Lệnh import gọi importlib._bootstrap._find_and_load (tra theo tên mỗi lần) - cùng điểm đo với -X importtime
+        import importlib._bootstrap as bootstrap
+        original = getattr(bootstrap, "_find_and_load", None)
+        if original is None:
+            return
+        stack = self._stack
+        imports = self.imports
+        main_ident = self._main_ident
+
+        def _timedFindAndLoad(name, import_):
+            if threading.get_ident() != main_ident:
+                return original(name, import_)
+            start = time.perf_counter()
+            stack.append(0.0)
+            try:
+                return original(name, import_)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                imports.append((name, (elapsed - children) * 1e6, elapsed * 1e6, len(stack)))
+
+        self._original = original
+        bootstrap._find_and_load = _timedFindAndLoad
+
+    def _removeImportHook(self):
+        if self._original is not None:
+            import importlib._bootstrap as bootstrap
+            bootstrap._find_and_load = self._original
+            self._original = None
+
+    # ------------------------------------------------------------------
+    # Mốc thời gian + báo cáo
+    # ------------------------------------------------------------------
+    def mark(self, phase):
+        if self.enabled:
+            self.phases.append((phase, (time.perf_counter() - self.t0) * 1000.0))
+
+    def report(self):
+        """Ghi báo cáo vào log (1 lần), không làm gì nếu profiler tắt"""
+        if not self.enabled:
+            return
+        self._removeImportHook()
+        self.enabled = False
+        from utils.Logging import getLogger
+        log = getLogger()
+
+        log.info("Startup profile: phases (ms since launch)")
+        previous = 0.0
+        for phase, at_ms in self.phases:
+            log.info(f"  {phase:<24} {at_ms:9.1f} ms  (+{at_ms - previous:.1f})")
+            previous = at_ms
+
+        top_level = sum(cumulative for _, _, cumulative, depth in self.imports if depth == 0)
+        log.info(f"Startup profile: {len(self.imports)} imports, {top_level / 1000.0:.1f} ms total; "
+                 f"slowest {TOP_IMPORTS} (self us | cumulative us | module):")
+        for name, self_us, cumulative, depth in sorted(self.imports, key=lambda item: item[2], reverse=True)[:TOP_IMPORTS]:
+            log.info(f"  {self_us:10.0f} | {cumulative:10.0f} | {'  ' * depth}{name}")
+
+
+# Instance global dùng chung - tạo lúc main.py import module này
+startup_profiler = StartupProfiler()
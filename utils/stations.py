@@ -0,0 +1,78 @@
+"""
+Stations - Cấu hình multi-station: 1 PC điều khiển nhiều đầu laser, mỗi trạm chạy trong 1 process headless riêng
+- settings "stations": [{"name": "LM1", "connection": {"sfc": {...}, "plc": {...}, "laser": {...}}, ...}, ...]
+  mỗi entry (trừ "name") ghi đè lên settings chung, chỉ trong bộ nhớ của process trạm đó (settings_manager.applyOverlay)
+- Process trạm không ghi settings.json (settings_manager.read_only): chỉ GUI / người sửa file mới đổi settings chung
+- Mặc định mỗi trạm: general.station_name = name, log / cycle trace trong <path_app>/<name>,
+  status port = advanced.status_port + số thứ tự trạm (1, 2, ...)
+- main.py --headless --station <name>: process của 1 trạm; phải gọi applyStationArg() trước khi import utils.Logging
+Không import utils.Logging (đường dẫn log phụ thuộc overlay của trạm): entry lỗi trả về qua rejectedStationEntries(),
+main.py ghi log sau khi Logging đã khởi tạo
+"""
+import copy
+import os
+
+from utils.setting import settings_manager
+
+STATION_FLAG = "--station"
+DEFAULT_STATUS_PORT = 50110  # giống workers.status_server (module đó import Logging)
+
+
+def _splitStationEntries():
+    """(entry hợp lệ, entry bị bỏ qua) trong settings "stations" """
+    entries, rejected, names = [], [], set()
+    for entry in settings_manager.get("stations", []) or []:
+        name = str(entry.get("name", "")).strip() if isinstance(entry, dict) else ""
+        if not name or name in names:
+            rejected.append(entry)
+            continue
+        names.add(name)
+        entries.append(dict(entry, name=name))
+    return entries, rejected
+
+
+def stationEntries():
+    """Danh sách cấu hình trạm hợp lệ (có name, không trùng) trong settings "stations" """
+    return _splitStationEntries()[0]
+
+
+def rejectedStationEntries():
+    """Các entry trong settings "stations" bị bỏ qua (không phải dict, thiếu name hoặc trùng name)"""
+    return _splitStationEntries()[1]
+
+
+def stationOverlay(index, entry):
+    """Cây settings ghi đè cho trạm thứ index (0-based)"""
+    overlay = copy.deepcopy({key: value for key, value in entry.items() if key != "name"})
+    name = entry["name"]
+    overlay.setdefault("general", {}).setdefault("station_name", name)
+    advanced = overlay.setdefault("advanced", {})
+    if not advanced.get("path_app"):
+        base_path = settings_manager.get("advanced.path_app", "") or "logs"
+        advanced["path_app"] = os.path.join(base_path, name)
+    advanced.setdefault("status_port", settings_manager.get("advanced.status_port", DEFAULT_STATUS_PORT) + index + 1)
+    return overlay
+
+
+def stationArg(argv):
+    """Tên trạm sau --station trong argv, None nếu không có"""
+    if STATION_FLAG not in argv:
+        return None
+    position = argv.index(STATION_FLAG) + 1
+    return argv[position] if position < len(argv) else ""
+
+
+def applyStationArg(argv):
+    """
+    --station <name>: áp cấu hình của trạm đó lên settings_manager, trả về tên trạm.
+    Không có --station: trả về None, settings giữ nguyên. Tên không có trong "stations": ValueError
+    """
+    name = stationArg(argv)
+    if name is None:
+        return None
+    for index, entry in enumerate(stationEntries()):
+        if entry["name"] == name:
+            settings_manager.applyOverlay(stationOverlay(index, entry))
+            settings_manager.read_only = True
+            return name
+    raise ValueError(f"Station '{name}' is not configured in settings 'stations'")
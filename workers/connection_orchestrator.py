@@ -0,0 +1,118 @@
+"""
+Connection Orchestrator - Tự động kết nối SFIS / PLC / Laser song song lúc khởi động
+- Mỗi thiết bị đăng ký 1 hàm probe (blocking, trả về bool), chạy trong thread pool => không chặn GUI thread
+- Deadline riêng từng thiết bị: quá hạn coi như chưa kết nối (probe vẫn chạy nốt)
+- deviceFinished(name, ok, elapsed_ms) đúng 1 lần cho từng thiết bị, allFinished(results) đúng 1 lần khi mọi thiết bị
+  xong / quá hạn
+- deviceLateConnected(name, elapsed_ms): probe đã quá hạn nhưng kết nối muộn thành công (chỉ để đồng bộ trạng thái,
+  không chạy lại các bước khởi động của deviceFinished)
+=> thời gian khởi động = thiết bị chậm nhất thay vì tổng của cả 3
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from utils.Logging import getLogger
+
+log = getLogger()
+
+
+class ConnectionOrchestrator(QObject):
+    deviceFinished = Signal(str, bool, float)  # (name, connected, elapsed_ms)
+    deviceLateConnected = Signal(str, float)  # (name, elapsed_ms) kết nối thành công sau deadline
+    allFinished = Signal(dict)  # name -> connected
+    _probeDone = Signal(str, bool, float)  # thread pool -> thread của orchestrator (queued)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._devices = {}  # name -> (probe, deadline_ms)
+        self._results = {}
+        self._deadline_timers = {}
+        self._started_at = 0.0
+        self._finished = False
+        self._probeDone.connect(self._onProbeDone)
+
+    def addDevice(self, name, probe, deadline_ms):
+        """Đăng ký thiết bị. probe() chạy ngoài GUI thread, trả về True nếu đã kết nối"""
+        self._devices[name] = (probe, int(deadline_ms))
+
+    def start(self):
+        """Chạy probe của mọi thiết bị cùng lúc"""
+        self._results.clear()
+        self._finished = False
+        self._started_at = time.perf_counter()
+        if not self._devices:
+            self._finish()
+            return
+        executor = ThreadPoolExecutor(max_workers=len(self._devices), thread_name_prefix="AutoConnect")
+        for name, (probe, deadline_ms) in self._devices.items():
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda name=name: self._onDeadline(name))
+            timer.start(deadline_ms)
+            self._deadline_timers[name] = timer
+            executor.submit(self._runProbe, name, probe)
+        executor.shutdown(wait=False)
+        log.info(f"Auto-connect started for {', '.join(self._devices)}")
+
+    def stop(self):
+        """Bỏ các deadline đang chờ (probe đang chạy vẫn kết thúc theo timeout của nó)"""
+        for timer in self._deadline_timers.values():
+            timer.stop()
+        self._deadline_timers.clear()
+        self._finished = True
+
+    @property
+    def results(self) -> dict:
+        return dict(self._results)
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+    def _runProbe(self, name, probe):
+        start = time.perf_counter()
+        try:
+            ok = bool(probe())
+        except Exception as exc:
+            log.warning(f"Auto-connect {name} failed: {exc}")
+            ok = False
+        self._probeDone.emit(name, ok, (time.perf_counter() - start) * 1000.0)
+
+    @Slot(str, bool, float)
+    def _onProbeDone(self, name, ok, elapsed_ms):
+        timer = self._deadline_timers.pop(name, None)
+        if timer is not None:
+            timer.stop()
+        if name in self._results:
+            # Đã quá deadline: deviceFinished đã phát, kết nối muộn thành công chỉ báo qua deviceLateConnected
+            log.info(f"Auto-connect {name}: late result after deadline ({'connected' if ok else 'failed'}, {elapsed_ms:.0f} ms)")
+            if ok:
+                self._results[name] = True
+                self.deviceLateConnected.emit(name, elapsed_ms)
+            return
+        self._record(name, ok, elapsed_ms)
+
+    def _onDeadline(self, name):
+        self._deadline_timers.pop(name, None)
+        if name in self._results or self._finished:
+            return
+        deadline_ms = self._devices[name][1]
+        log.warning(f"Auto-connect {name}: no result within {deadline_ms} ms")
+        self._record(name, False, float(deadline_ms))
+
+    def _record(self, name, ok, elapsed_ms):
+        self._results[name] = ok
+        log.info(f"Auto-connect {name}: {'connected' if ok else 'not connected'} ({elapsed_ms:.0f} ms)")
+        self.deviceFinished.emit(name, ok, elapsed_ms)
+        if len(self._results) == len(self._devices):
+            self._finish()
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        total_ms = (time.perf_counter() - self._started_at) * 1000.0
+        summary = ", ".join(f"{name}={'OK' if ok else 'NG'}" for name, ok in self._results.items())
+        log.info(f"Auto-connect finished in {total_ms:.0f} ms: {summary}")
+        self.allFinished.emit(dict(self._results))
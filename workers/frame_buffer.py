@@ -0,0 +1,74 @@
+"""
+Frame Buffer - Buffer nhận dữ liệu cấp phát sẵn cho từng port (SFIS / PLC / Laser)
+- Đọc thẳng vào bytearray qua readinto / recv_into, không nối bytes (data += chunk)
+- Frame được trả ra dưới dạng memoryview trỏ vào buffer (không copy)
+"""
+
+DEFAULT_CAPACITY = 4096
+
+
+class FrameBuffer:
+    """
+    Buffer tuyến tính có compact: dữ liệu chưa đọc luôn liền mạch nên memoryview trả ra không bị cắt đôi.
+    memoryview lấy từ view()/take() chỉ hợp lệ tới lần readinto()/clear() kế tiếp.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._buf = bytearray(capacity)
+        self._mv = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def _reserve(self, size: int):
+        """Đảm bảo còn size byte trống sau _end: dồn dữ liệu về đầu buffer, hoặc cấp buffer lớn hơn"""
+        if len(self._buf) - self._end >= size:
+            return
+        used = self._end - self._start
+        if len(self._buf) - used >= size:
+            self._mv[:used] = self._mv[self._start:self._end]
+        else:
+            # Không resize tại chỗ: memoryview đang được giữ bên ngoài sẽ làm bytearray không resize được
+            grown = bytearray(max(len(self._buf) * 2, used + size))
+            grown[:used] = self._mv[self._start:self._end]
+            self._buf = grown
+            self._mv = memoryview(grown)
+        self._start, self._end = 0, used
+
+    def readinto(self, fill, size: int) -> int:
+        """
+        Gọi fill(memoryview) để ghi tối đa size byte vào cuối buffer, trả về số byte nhận được.
+        fill: serial.Serial.readinto, socket.recv_into, ...
+        """
+        self._reserve(size)
+        received = fill(self._mv[self._end:self._end + size]) or 0
+        self._end += received
+        return received
+
+    def view(self) -> memoryview:
+        """Toàn bộ dữ liệu chưa đọc (không copy)"""
+        return self._mv[self._start:self._end]
+
+    def endswith(self, suffix: bytes) -> bool:
+        size = len(suffix)
+        return len(self) >= size and self._mv[self._end - size:self._end] == suffix
+
+    def find(self, sub: bytes) -> int:
+        """Vị trí của sub tính từ đầu dữ liệu chưa đọc, -1 nếu không có"""
+        index = self._buf.find(sub, self._start, self._end)
+        return index - self._start if index >= 0 else -1
+
+    def take(self, size: int = None) -> memoryview:
+        """Lấy size byte đầu (mặc định: tất cả) ra khỏi buffer dưới dạng memoryview"""
+        if size is None or size > len(self):
+            size = len(self)
+        frame = self._mv[self._start:self._start + size]
+        self._start += size
+        if self._start == self._end:
+            self._start = self._end = 0
+        return frame
@@ -0,0 +1,366 @@
+"""
+IO Core - 1 asyncio event loop (chạy trong 1 thread riêng) quản lý transport SFIS / PLC / Laser
+- SerialChannel: COM port qua async serial adapter (add_reader trên POSIX, blocking read có timeout trên Windows)
+- TcpChannel: TCP qua asyncio streams (tuỳ chọn keepalive ngắn để phát hiện link half-open)
+- write() / readFrame(expect=...) là coroutine; worker SFIS / PLC / laser gọi io_core.run(...) để chờ kết quả ngay
+  trong thread của mình (advanced.async_io, mặc định tắt)
+"""
+import abc
+import asyncio
+import sys
+import threading
+from typing import Callable, Optional, Union
+
+import serial
+
+from utils.Logging import getLogger
+from workers.tcp_keepalive import enableKeepalive
+
+log = getLogger()
+
+# expect: terminator (bytes/str), tuple các terminator, hoặc callable(buffer) -> True khi cả buffer là 1 frame
+# expect=() : không có terminator, frame chỉ kết thúc theo idle gap
+Expect = Union[None, bytes, str, tuple, Callable[[bytearray], bool]]
+
+DEFAULT_TERMINATOR = b"\n"
+# Windows không hỗ trợ add_reader cho COM port: đọc blocking trong executor, tối đa mỗi lần (giây)
+SERIAL_READ_SLICE_S = 0.2
+
+
+def _frameEnd(buffer: bytearray, expect: Expect) -> int:
+    """Vị trí kết thúc frame đầu tiên trong buffer, -1 nếu chưa đủ frame"""
+    if callable(expect):
+        return len(buffer) if buffer and expect(buffer) else -1
+    terminators = expect if isinstance(expect, tuple) else (expect or DEFAULT_TERMINATOR,)
+    best = -1
+    for term in terminators:
+        term = term.encode("ascii") if isinstance(term, str) else term
+        idx = buffer.find(term)
+        if idx >= 0 and (best < 0 or idx + len(term) < best):
+            best = idx + len(term)
+    return best
+
+
+class AsyncChannel(abc.ABC):
+    """Base class cho 1 transport do IOCore quản lý. Mọi coroutine chạy trong loop của IOCore"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.is_open = False
+        # Callback(bytes) cho dữ liệu không có request nào đang chờ (VD: PLC gửi Ready)
+        self.on_data: Optional[Callable[[bytes], None]] = None
+        self._rx = bytearray()
+        self._rx_event: Optional[asyncio.Event] = None
+        self._waiting = 0
+
+    def _initLoopObjects(self):
+        self._rx_event = asyncio.Event()
+
+    # ---- hooks cho subclass ----
+    @abc.abstractmethod
+    async def open(self):
+        ...
+
+    @abc.abstractmethod
+    async def close(self):
+        ...
+
+    @abc.abstractmethod
+    async def _write(self, data: bytes):
+        ...
+
+    # ---- dữ liệu nhận ----
+    def _feed(self, data: bytes):
+        """Gọi trong loop khi transport nhận được dữ liệu"""
+        if not data:
+            return
+        if self.on_data is not None and not self._waiting:
+            try:
+                self.on_data(bytes(data))
+            except Exception as exc:
+                log.error(f"[{self.name}] on_data callback error: {exc}")
+            return
+        self._rx.extend(data)
+        self._rx_event.set()
+
+    def _connectionLost(self, exc=None):
+        if self.is_open:
+            log.warning(f"[{self.name}] Connection lost: {exc or 'closed by peer'}")
+        self.is_open = False
+        if self._rx_event is not None:
+            self._rx_event.set()
+
+    def clearRx(self):
+        self._rx.clear()
+
+    async def takeRx(self) -> bytes:
+        """Lấy toàn bộ dữ liệu còn trong buffer (frame chưa đủ terminator)"""
+        data = bytes(self._rx)
+        self._rx.clear()
+        return data
+
+    # ---- API ----
+    async def write(self, frame: Union[bytes, str], clear_rx: bool = False):
+        """Gửi frame. clear_rx: bỏ dữ liệu cũ trong buffer trước khi gửi (reply mới không bị lẫn)"""
+        if not self.is_open:
+            raise RuntimeError(f"{self.name} channel is not open")
+        if clear_rx:
+            self._rx.clear()
+        data = frame.encode("ascii") if isinstance(frame, str) else frame
+        await self._write(data)
+
+    async def readFrame(self, expect: Expect = DEFAULT_TERMINATOR, timeout: float = 5.0,
+                        idle: Optional[float] = None) -> bytes:
+        """
+        Chờ 1 frame hoàn chỉnh theo expect.
+        idle: nếu đã có dữ liệu mà không khớp expect, trả về toàn bộ sau khoảng lặng idle (giây).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self._waiting += 1
+        try:
+            while True:
+                end = _frameEnd(self._rx, expect)
+                if end >= 0:
+                    frame = bytes(self._rx[:end])
+                    del self._rx[:end]
+                    return frame
+                if not self.is_open:
+                    raise RuntimeError(f"{self.name} channel closed while waiting for data")
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    if idle and self._rx:
+                        frame = bytes(self._rx)
+                        self._rx.clear()
+                        return frame
+                    raise TimeoutError(f"{self.name}: timeout waiting for frame ({len(self._rx)} bytes buffered)")
+                wait_s = min(remaining, idle) if (idle and self._rx) else remaining
+                self._rx_event.clear()
+                try:
+                    await asyncio.wait_for(self._rx_event.wait(), wait_s)
+                except asyncio.TimeoutError:
+                    if idle and self._rx and wait_s < remaining:
+                        frame = bytes(self._rx)
+                        self._rx.clear()
+                        return frame
+        finally:
+            self._waiting -= 1
+
+
+class SerialChannel(AsyncChannel):
+    """COM port không polling: POSIX dùng loop.add_reader, Windows dùng blocking read trong executor"""
+
+    def __init__(self, name: str, port: str, baudrate: int = 9600, **serial_kwargs):
+        super().__init__(name)
+        self.port = port
+        self.baudrate = baudrate
+        self.serial_kwargs = serial_kwargs
+        self.serial: Optional[serial.Serial] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._use_add_reader = sys.platform != "win32"
+        self._fd: Optional[int] = None
+
+    def _openPort(self):
+        return serial.Serial(
+            port=self.port,
+            baudrate=self.baudrate,
+            bytesize=self.serial_kwargs.get("bytesize", serial.EIGHTBITS),
+            parity=self.serial_kwargs.get("parity", serial.PARITY_NONE),
+            stopbits=self.serial_kwargs.get("stopbits", serial.STOPBITS_ONE),
+            timeout=0 if self._use_add_reader else SERIAL_READ_SLICE_S,
+            xonxoff=False,
+            rtscts=False,
+            dsrdtr=False,
+        )
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._initLoopObjects()
+        # Mở COM port có thể block (driver USB-serial) -> chạy trong executor
+        self.serial = await loop.run_in_executor(None, self._openPort)
+        self.serial.reset_input_buffer()
+        self.serial.reset_output_buffer()
+        self.is_open = True
+        if self._use_add_reader:
+            # Giữ fd: port có thể bị đóng trước khi remove_reader (fileno() lúc đó sẽ lỗi)
+            self._fd = self.serial.fileno()
+            loop.add_reader(self._fd, self._onReadable)
+        else:
+            self._reader_task = loop.create_task(self._readLoop())
+        log.info(f"[{self.name}] Async serial opened: {self.port} baudrate: {self.baudrate}bps")
+
+    def _onReadable(self):
+        try:
+            data = self.serial.read(self.serial.in_waiting or 1)
+        except (serial.SerialException, OSError) as exc:
+            self._removeReader()
+            self._connectionLost(exc)
+            return
+        self._feed(data)
+
+    async def _readLoop(self):
+        loop = asyncio.get_running_loop()
+        while self.is_open:
+            try:
+                data = await loop.run_in_executor(None, self._readBlocking)
+            except (serial.SerialException, OSError) as exc:
+                self._connectionLost(exc)
+                return
+            self._feed(data)
+
+    def _readBlocking(self):
+        return self.serial.read(max(1, self.serial.in_waiting))
+
+    def _removeReader(self):
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            self._fd = None
+
+    async def _write(self, data: bytes):
+        loop = asyncio.get_running_loop()
+        try:
+            # write + flush có thể block theo baudrate -> không chạy trực tiếp trong loop
+            await loop.run_in_executor(None, self._writeBlocking, data)
+        except (serial.SerialException, OSError) as exc:
+            self._connectionLost(exc)
+            raise RuntimeError(f"{self.name} serial write error: {exc}") from exc
+
+    def _writeBlocking(self, data: bytes):
+        self.serial.write(data)
+        self.serial.flush()
+
+    async def close(self):
+        self._removeReader()
+        self.is_open = False
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self.serial is not None:
+            try:
+                self.serial.close()
+            except serial.SerialException:
+                pass
+            self.serial = None
+        if self._rx_event is not None:
+            self._rx_event.set()
+
+
+class TcpChannel(AsyncChannel):
+    """TCP client qua asyncio streams"""
+
+    def __init__(self, name: str, host: str, port: int, connect_timeout: float = 3.0,
+                 keepalive_ms: Optional[tuple] = None):
+        super().__init__(name)
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.keepalive_ms = keepalive_ms  # (idle_ms, interval_ms, count): link chết => _readLoop nhận lỗi
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def open(self):
+        self._initLoopObjects()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout
+        )
+        if self.keepalive_ms:
+            sock = self._writer.get_extra_info("socket")
+            if sock is not None:
+                enableKeepalive(sock, *self.keepalive_ms)
+        self.is_open = True
+        self._reader_task = asyncio.get_running_loop().create_task(self._readLoop())
+        log.info(f"[{self.name}] Async TCP connected: {self.host}:{self.port}")
+
+    async def _readLoop(self):
+        try:
+            while self.is_open:
+                data = await self._reader.read(4096)
+                if not data:
+                    self._connectionLost()
+                    return
+                self._feed(data)
+        except (ConnectionError, OSError) as exc:
+            self._connectionLost(exc)
+
+    async def _write(self, data: bytes):
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+        except (ConnectionError, OSError) as exc:
+            self._connectionLost(exc)
+            raise RuntimeError(f"{self.name} socket error while sending: {exc}") from exc
+
+    async def close(self):
+        self.is_open = False
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._writer = None
+        if self._rx_event is not None:
+            self._rx_event.set()
+
+
+class IOCore:
+    """Sở hữu event loop asyncio trong 1 thread riêng. Các thread khác gọi run()/submit()"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.is_running:
+                return
+            ready = threading.Event()
+
+            def _run():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                ready.set()
+                self._loop.run_forever()
+                self._loop.close()
+
+            self._thread = threading.Thread(target=_run, name="IOCore", daemon=True)
+            self._thread.start()
+            ready.wait()
+            log.info("IOCore event loop started")
+
+    def submit(self, coro):
+        """Chạy coroutine trong loop, trả về concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Chạy coroutine và chờ kết quả (block thread gọi, không block loop)"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("IOCore.run() cannot be called from the IOCore thread")
+        return self.submit(coro).result(timeout)
+
+    def callSoon(self, func, *args):
+        self.start()
+        self._loop.call_soon_threadsafe(func, *args)
+
+    def stop(self):
+        with self._lock:
+            if not self.is_running:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=3.0)
+            self._thread = None
+            log.info("IOCore event loop stopped")
+
+
+# Instance global dùng chung cho toàn bộ ứng dụng (giống settings_manager)
+io_core = IOCore()
@@ -1,7 +1,19 @@
 """
 Laser Worker - Quản lý kết nối laser controller (TCP hoặc RS232)
+- TCP: keepalive ngắn (connection.laser.keepalive_*) + checkConnectionAlive() peek socket
+  => phát hiện link chết giữa các cycle, kết nối lại trước panel kế tiếp (ensureConnected)
+- Mọi thao tác I/O trên kết nối đi qua 1 lock: health probe không đọc chen vào lệnh đang chờ response
+- TCP gửi / nhận chờ bằng selector (timeout = deadline còn lại) thay vì spin sleep 10 ms: thức dậy ngay khi có byte
+- Reply tách theo dòng, gắn với lệnh theo tên (model.laser_protocol): send_ga / send_c2 / send_nt trả về LaserReply,
+  mã lỗi => LaserReplyError ngay, không có reply => TimeoutError
+- Trước mỗi lệnh bỏ dữ liệu nhận còn sót (reply trễ của lệnh trước đã timeout không bị nhận nhầm là reply mới);
+  hết deadline mà buffer còn 1 reply thiếu newline thì vẫn nhận reply đó
 """
+import asyncio
+import select
+import selectors
 import socket
+import threading
 import time
 from typing import Optional
 
@@ -10,6 +22,10 @@ from serial import SerialException
 
 from utils.Logging import getLogger
 from utils.schema import LaserConnectMode
+from workers.io_core import io_core, AsyncChannel, SerialChannel, TcpChannel
+from model.laser_protocol import LaserReply, LaserReplyError, commandName, parseReply
+from workers.frame_buffer import FrameBuffer
+from workers.tcp_keepalive import enableKeepalive, peekAlive
 
 
 log = getLogger()
@@ -26,6 +42,8 @@ class LaserWorker:
         timeout_ms: int = 3000,
         com_port: Optional[str] = None,
         baudrate: Optional[int] = 9600,
+        async_io: bool = False,
+        keepalive_ms: tuple[int, int, int] = (5000, 1000, 3),
     ):
         self.mode = mode if isinstance(mode, LaserConnectMode) else LaserConnectMode(mode)
         self.ip = ip
@@ -35,8 +53,18 @@ class LaserWorker:
         self.baudrate = baudrate or 9600
 
         self._socket: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None  # EVENT_READ trên _socket
         self.serial_port: Optional[serial.Serial] = None
         self.is_connected = False
+        # async_io: transport do IOCore quản lý, gửi qua channel.write(), đọc từng dòng reply qua channel.readFrame()
+        self.async_io = async_io
+        self._channel: Optional[AsyncChannel] = None
+        # Buffer nhận cấp phát sẵn (TCP / COM), giữ phần dư sau mỗi dòng reply cho lệnh kế tiếp
+        self._rx = FrameBuffer()
+        # (idle_ms, interval_ms, count) cho TCP keepalive
+        self.keepalive_ms = keepalive_ms
+        # connect / disconnect / gửi lệnh / health probe không chạy chồng nhau giữa các thread
+        self._lock = threading.RLock()
 
     # ------------------------------------------------------------------
     # Connection helpers
@@ -49,7 +77,22 @@ class LaserWorker:
         baudrate: Optional[int] = None,
     ):
         """Kết nối tới laser controller"""
-        self.disconnect()
+        with self._lock:
+            return self._connect(ip, port, com_port, baudrate)
+
+    def ensureConnected(self) -> bool:
+        """Kết nối lại nếu link đã chết, giữ nguyên kết nối còn sống (gọi đồng thời từ nhiều thread chỉ mở 1 lần)"""
+        with self._lock:
+            if self.checkConnectionAlive():
+                return True
+            self._connect(None, None, None, None)
+            return self.is_connected
+
+    def _connect(self, ip, port, com_port, baudrate):
+        self._disconnect()
+
+        if self.async_io:
+            return self._connectAsync(ip, port, com_port, baudrate)
 
         if self.mode == LaserConnectMode.TCP:
             target_ip = ip or self.ip
@@ -58,6 +101,9 @@ class LaserWorker:
             sock.settimeout(self.timeout_ms / 1000)
             sock.connect((target_ip, target_port))
             sock.setblocking(False)
+            enableKeepalive(sock, *self.keepalive_ms)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(sock, selectors.EVENT_READ)
 
             self._socket = sock
             self.ip = target_ip
@@ -96,8 +142,56 @@ class LaserWorker:
 
         return True
 
+    def _connectAsync(self, ip, port, com_port, baudrate):
+        """Mở transport laser trong IOCore (TCP qua asyncio streams, COM qua async serial adapter)"""
+        if self.mode == LaserConnectMode.TCP:
+            target_ip = ip or self.ip
+            target_port = port or self.port
+            channel = TcpChannel("Laser", target_ip, target_port, connect_timeout=self.timeout_ms / 1000,
+                                 keepalive_ms=self.keepalive_ms)
+            try:
+                io_core.run(channel.open())
+            except (OSError, asyncio.TimeoutError) as exc:
+                raise RuntimeError(f"Cannot connect laser {target_ip}:{target_port}: {exc}") from exc
+            self.ip = target_ip
+            self.port = target_port
+        else:
+            target_port = com_port or self.com_port
+            target_baud = baudrate or self.baudrate
+            if not target_port:
+                raise RuntimeError("Laser COM port is not configured")
+            channel = SerialChannel("Laser", target_port, target_baud)
+            try:
+                io_core.run(channel.open())
+            except (SerialException, OSError) as exc:
+                raise RuntimeError(f"Cannot open laser COM port {target_port}: {exc}") from exc
+            self.serial_port = channel.serial
+            self.com_port = target_port
+            self.baudrate = target_baud
+
+        self._channel = channel
+        self.is_connected = True
+        return True
+
     def disconnect(self):
         """Ngắt kết nối laser"""
+        with self._lock:
+            self._disconnect()
+
+    def _disconnect(self):
+        if self._channel is not None:
+            try:
+                io_core.run(self._channel.close())
+            except Exception as exc:
+                log.warning(f"Close laser async channel error: {exc}")
+            self._channel = None
+            self.serial_port = None
+
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        self._rx.clear()
+
         if self._socket:
             try:
                 self._socket.close()
@@ -117,34 +211,61 @@ class LaserWorker:
     # ------------------------------------------------------------------
     # Command helpers
     # ------------------------------------------------------------------
-    def send_ga(self, script: str, timeout_ms: Optional[int] = None):
+    def send_ga(self, script: str, timeout_ms: Optional[int] = None) -> LaserReply:
         """Gửi lệnh GA,<script>"""
-        try:
-            self._ensure_connection()
-            return self.sendRawCommand(f"GA,{script}", expect_keyword="GA,0", timeout_ms=timeout_ms)
-        except Exception as exc:
-            log.error(f"Error: {exc}")
-            raise
+        return self._sendChecked(f"GA,{script}", timeout_ms)
 
-    def send_c2(self, script: str, content: str, timeout_ms: Optional[int] = None):
+    def send_c2(self, script: str, content: str, timeout_ms: Optional[int] = None) -> LaserReply:
         """Gửi lệnh C2,<script>,<block>,<content>"""
+        return self._sendChecked(f"C2,{script},{content}", timeout_ms)
+
+    def send_nt(self, timeout_ms: Optional[int] = None) -> LaserReply:
+        """Gửi lệnh NT"""
+        return self._sendChecked("NT", timeout_ms)
+
+    def _sendChecked(self, command: str, timeout_ms: Optional[int]) -> LaserReply:
+        """Gửi lệnh, raise LaserReplyError nếu controller trả mã lỗi, TimeoutError nếu không có reply"""
         try:
-            self._ensure_connection()
-            command = f"C2,{script},{content}"
-            return self.sendRawCommand(command, expect_keyword="C2,0", timeout_ms=timeout_ms)
+            reply = self.sendCommand(command, timeout_ms=timeout_ms)
+            if not reply.ok:
+                raise LaserReplyError(reply)
+            return reply
         except Exception as exc:
             log.error(f"Error: {exc}")
             raise
 
-    def send_nt(self, timeout_ms: Optional[int] = None):
-        """Gửi lệnh NT"""
-        try:        
+    def sendCommand(self, command: str, timeout_ms: Optional[int] = None, strict: bool = True) -> LaserReply:
+        """
+        Gửi 1 lệnh và chờ reply của đúng lệnh đó (tách theo dòng). Hết deadline: phần chưa có newline còn trong
+        buffer được parse như 1 reply (controller không gửi \\r\\n).
+        strict=False: nhận dòng đầu tiên dù không cùng tên lệnh (lệnh tuỳ ý, reply không theo dạng <LỆNH>,<mã>)
+        """
+        with self._lock:
             self._ensure_connection()
-            return self.sendRawCommand("NT", expect_keyword="NT,0", timeout_ms=timeout_ms)
-        except Exception as exc:
-            log.error(f"Error: {exc}")
-            raise
+            payload = command if command.endswith("\r\n") else f"{command}\r\n"
+            name = commandName(command)
+            timeout_ms = timeout_ms or self.timeout_ms
 
+            log.info(f"Sending command to laser: {payload.strip()}")
+            self._discardInput()
+            self._write(payload)
+            deadline = time.monotonic() + (timeout_ms / 1000)
+            while True:
+                line = self._readLine(deadline)
+                if line is None:
+                    reply = parseReply(self._takeRemainder())
+                    if reply is not None and (not strict or reply.matches(name)):
+                        log.warning(f"Laser: reply '{reply.raw}' for {name} has no line terminator")
+                        return reply
+                    raise TimeoutError(f"No reply from laser for {name} within {timeout_ms} ms")
+                reply = parseReply(line)
+                if reply is None:
+                    continue
+                if strict and not reply.matches(name):
+                    log.warning(f"Laser: discarded reply '{reply.raw}' while waiting for {name}")
+                    continue
+                log.info(f"Laser response: {reply.raw}")
+                return reply
 
     def sendRawCommand(
         self,
@@ -152,27 +273,19 @@ class LaserWorker:
         expect_keyword: Optional[str] = None,
         timeout_ms: Optional[int] = None,
     ):
-        """Gửi lệnh ASCII bất kỳ tới laser"""
+        """Gửi lệnh ASCII bất kỳ tới laser, trả về reply dạng text ('' nếu không có reply)"""
         try:
-            self._ensure_connection()
-            payload = command if command.endswith("\r\n") else f"{command}\r\n"
-            timeout_ms = timeout_ms or self.timeout_ms
-
-            log.info(f"Sending command to laser: {payload.strip()}")
-            if self.mode == LaserConnectMode.TCP:
-                response = self.sendTCPCommand(payload, timeout_ms)
-            else:
-                response = self.sendSerialCommand(payload, timeout_ms)
-
-            if response:
-                log.info(f"Laser response: {response}")
-            else:
+            try:
+                response = self.sendCommand(command, timeout_ms=timeout_ms, strict=False).raw
+            except TimeoutError:
                 log.warning("Laser returned empty response")
-            if expect_keyword and response and expect_keyword not in response:
+                return ""
+            if expect_keyword and expect_keyword not in response:
                 raise RuntimeError(
                     f"Unexpected response for '{command.strip()}': '{response}' "
                     f"(expect '{expect_keyword}')"
-                )                                             
+                )
+            return response
         except Exception as exc:
             log.error(f"Error: {exc}")
             raise
@@ -183,35 +296,79 @@ class LaserWorker:
         if not self.is_connected:
             raise RuntimeError("Laser controller is not connected")
 
-    def sendTCPCommand(self, payload: str, timeout_ms: int) -> str:
+    def _write(self, payload: str):
+        if self._channel is not None:
+            self.writeAsync(payload)
+        elif self.mode == LaserConnectMode.TCP:
+            self.writeTCP(payload)
+        else:
+            self.writeSerial(payload)
+
+    def _readLine(self, deadline: float):
+        """1 dòng reply (gồm newline) hoặc None nếu hết deadline"""
+        if self._channel is not None:
+            return self.readLineAsync(deadline)
+        if self.mode == LaserConnectMode.TCP:
+            return self.readLineTCP(deadline)
+        return self.readLineSerial(deadline)
+
+    def _discardInput(self):
+        """Bỏ dữ liệu nhận còn sót trước khi gửi lệnh mới (async_io: channel.write(clear_rx=True) làm trong loop)"""
+        if self._channel is not None:
+            return
+        try:
+            if self.mode == LaserConnectMode.TCP and self._socket:
+                while self._rx.readinto(self._socket.recv_into, 1024):  # type: ignore[union-attr]
+                    pass
+            elif self.serial_port and self.serial_port.in_waiting:
+                self._rx.readinto(self.serial_port.readinto, self.serial_port.in_waiting)
+        except (OSError, SerialException):
+            pass  # BlockingIOError: đã đọc hết; lỗi thật của link sẽ được báo lại ở lần write / read
+        if len(self._rx):
+            log.warning(f"Laser: discarded {len(self._rx)} stale bytes before new command")
+            self._rx.clear()
+
+    def _takeRemainder(self) -> bytes:
+        """Lấy hết dữ liệu còn trong buffer nhận (reply chưa có newline), b'' nếu trống"""
+        if self._channel is not None:
+            return io_core.run(self._channel.takeRx())
+        return bytes(self._rx.take()) if len(self._rx) else b""
+
+    def _takeLine(self):
+        """Lấy 1 dòng hoàn chỉnh từ buffer nhận (dữ liệu sau newline giữ lại), None nếu chưa đủ dòng"""
+        index = self._rx.find(b"\n")
+        if index < 0:
+            return None
+        return bytes(self._rx.take(index + 1))
+
+    def writeTCP(self, payload: str):
         if not self._socket:
             raise RuntimeError("TCP socket is not available")
-        data = payload.encode("ascii")
+        data = memoryview(payload.encode("ascii"))
         total_sent = 0
-        deadline = time.time() + (self.timeout_ms / 1000)
+        deadline = time.monotonic() + (self.timeout_ms / 1000)
 
         while total_sent < len(data):
             try:
-                sent = self._socket.send(data[total_sent:]) 
+                sent = self._socket.send(data[total_sent:])
                 if sent == 0:
                     raise RuntimeError("Socket connection broken while sending data")
                 total_sent += sent
             except BlockingIOError:
-                if time.time() > deadline:
+                # Send buffer đầy: chờ socket writable tới deadline
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([], [self._socket], [], remaining)[1]:
                     self.is_connected = False
                     raise TimeoutError("Timeout while sending data to laser")
-                time.sleep(0.01)
             except OSError as exc:
                 self.is_connected = False
                 raise RuntimeError(f"Socket error while sending: {exc}") from exc
 
-        return self.readResponseTCP(timeout_ms)
-
-    def sendSerialCommand(self, payload: str, timeout_ms: int) -> str:
+    def writeSerial(self, payload: str):
         if not self.serial_port or not self.serial_port.is_open:
             self.is_connected = False
             raise RuntimeError("Serial port is not available")
-    
+
         try:
             self.serial_port.write(payload.encode("ascii"))
             self.serial_port.flush()
@@ -219,68 +376,90 @@ class LaserWorker:
             self.is_connected = False
             raise RuntimeError(f"Serial write error: {exc}") from exc
 
-        return self.readResponseSerial(timeout_ms)
+    def writeAsync(self, payload: str):
+        """Gửi qua IOCore, bỏ dữ liệu nhận còn sót của lệnh trước ngay trong loop"""
+        try:
+            io_core.run(self._channel.write(payload, clear_rx=True))
+        except RuntimeError:
+            self.is_connected = self._channel.is_open
+            raise
 
-    def readResponseTCP(self, timeout_ms: int) -> str:
-        deadline = time.time() + (timeout_ms / 1000)
-        chunks = []
-        while time.time() < deadline:
+    def readLineAsync(self, deadline: float):
+        """Chờ 1 dòng qua IOCore (không spin loop)"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            return io_core.run(self._channel.readFrame(expect=b"\n", timeout=remaining))
+        except TimeoutError:
+            return None
+        except RuntimeError:
+            self.is_connected = self._channel.is_open
+            raise
+
+    def readLineTCP(self, deadline: float):
+        """Đọc tới khi đủ 1 dòng / hết deadline; giữa các lần đọc chờ selector thay vì sleep"""
+        while True:
+            line = self._takeLine()
+            if line is not None:
+                return line
             try:
-                data = self._socket.recv(1024)  # type: ignore[arg-type]
-                if data:
-                    chunks.append(data)
-                    if data.endswith(b"\n"):
-                        break
-                else:
-                    break
+                received = self._rx.readinto(self._socket.recv_into, 1024)  # type: ignore[union-attr]
             except BlockingIOError:
-                time.sleep(0.01)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._selector.select(remaining):
+                    return None
+                continue
             except OSError as exc:
                 self.is_connected = False
                 raise RuntimeError(f"Socket error while receiving: {exc}") from exc
-
-        if not chunks:
-            return ""
-
-        return b"".join(chunks).decode("ascii", errors="ignore").strip()
-
-    def readResponseSerial(self, timeout_ms: int) -> str:
-        deadline = time.time() + (timeout_ms / 1000)
-        # idle_deadline = None
-        buffer = bytearray()
-
-        while time.time() < deadline:
+            if not received:
+                self.is_connected = False
+                raise RuntimeError("Laser closed the TCP connection")
+
+    def readLineSerial(self, deadline: float):
+        while True:
+            line = self._takeLine()
+            if line is not None:
+                return line
+            if time.monotonic() >= deadline:
+                return None
             try:
                 if self.serial_port and self.serial_port.in_waiting:
-                    data = self.serial_port.read(self.serial_port.in_waiting)
-                    if data:
-                        buffer.extend(data)
-                        # idle_deadline = time.time() + (idle_ms / 1000)
-                        # break  --> để đọc tất cả dữ liệu, nhưng nếu không có dữ liệu mới trong 100ms thì dừng
-                        # Nếu nhận dữ liệu kết thúc bằng new line (\r\n)
-                        if buffer.endswith(b"\n") or buffer.endswith(b"\r\n"):
-                            break
+                    self._rx.readinto(self.serial_port.readinto, self.serial_port.in_waiting)
                 else:
-                    # if idle_deadline and time.time() > idle_deadline:
                     time.sleep(0.01)
             except SerialException as exc:
                 self.is_connected = False
                 raise RuntimeError(f"Serial read error: {exc}") from exc
 
-        if not buffer:
-            return ""
-
-        return buffer.decode("ascii", errors="ignore").strip()
-
     def checkConnectionAlive(self) -> bool:
-        """Kiểm tra nhanh trạng thái kết nối"""
+        """
+        Kiểm tra nhanh trạng thái kết nối (không chặn). TCP: peek socket => thấy FIN / RST / keepalive hết hạn.
+        Đang có lệnh chờ response ở thread khác thì không probe, trả về trạng thái hiện tại.
+        """
+        if self._channel is not None:
+            return self._channel.is_open
         if self.mode == LaserConnectMode.TCP:
-            if not self._socket:
-                return False
+            if not self._lock.acquire(blocking=False):
+                return self.is_connected
             try:
-                self._socket.getpeername()
-                return True
-            except OSError:
-                return False
+                return self._probeTCP()
+            finally:
+                self._lock.release()
         return bool(self.serial_port and self.serial_port.is_open)
 
+    def _probeTCP(self) -> bool:
+        if not self._socket:
+            return False
+        alive, pending = peekAlive(self._socket)
+        if not alive:
+            log.warning(f"Laser TCP link to {self.ip}:{self.port} is dead (closed / reset / keepalive timeout)")
+            self.is_connected = False
+            return False
+        if pending:
+            # Response muộn của lệnh trước (đã timeout): bỏ đi để không lẫn vào response của lệnh kế tiếp
+            stale = self._socket.recv(pending)
+            log.warning(f"Laser: discarded {len(stale)} stale bytes: {stale[:64]!r}")
+        return True
+
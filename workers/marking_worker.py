@@ -1,8 +1,14 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from PySide6.QtCore import QObject, Signal, Slot
 from utils.Logging import getLogger
+from utils.cycle_trace import cycle_tracer
 
 log = getLogger()
 
+# Thời gian tối đa chờ kết quả prefetch (SFIS readData_SFIS timeout là 10s)
+PREFETCH_WAIT_S = 15.0
+
 
 class MarkingWorker(QObject):
     """Worker để xử lý marking process trong background thread"""
@@ -18,23 +24,114 @@ class MarkingWorker(QObject):
         self.sfis_presenter = sfis_presenter
         self.laser_presenter = laser_presenter
         self.settings_manager = settings_manager
-        self.delay_step = settings_manager.get("project.delay_step", 0)
+        self.delay_step = settings_manager.snapshot().delay_step
+        settings_manager.settingsChanged.connect(self.onSettingsChanged)
+        # Lookahead: lấy trước dữ liệu SFIS của panel kế tiếp (chỉ 1 request chạy nền)
+        self._prefetch_executor = None
+        self._prefetch_future = None
+        self._lookahead_refused_logged = False
+
+    @Slot(object)
+    def onSettingsChanged(self, settings):
+        """Settings đã lưu lại: làm mới giá trị cache (prefetch cũ bị loại nhờ _panelKey)"""
+        self.delay_step = settings.delay_step
+        self._lookahead_refused_logged = False
+
+    # ------------------------------------------------------------------
+    # SFIS lookahead
+    # ------------------------------------------------------------------
+    def _panelKey(self):
+        """Các setting quyết định nội dung NEEDPSN - đổi key thì dữ liệu prefetch không dùng được"""
+        settings = self.settings_manager.snapshot()
+        return settings.mo, settings.panel_num, settings.sfis_format
+
+    def _lookaheadEnabled(self):
+        """Lookahead chỉ an toàn với SFIS format 1 (NEEDPSN 1 bước)"""
+        settings = self.settings_manager.snapshot()
+        if not settings.sfis_lookahead:
+            return False
+        sfis_format = settings.sfis_format
+        if sfis_format != 1:
+            if not self._lookahead_refused_logged:
+                log.warning(f"Marking worker: SFIS lookahead refused for sfis_format={sfis_format} (only format 1 is safe)")
+                self._lookahead_refused_logged = True
+            return False
+        return True
+
+    def _fetchPanelData(self):
+        """NEEDPSN -> parse -> C2 content. Trả về (key, data, content) hoặc None"""
+        key = self._panelKey()
+        response = self.sfis_presenter.getDataFromSFIS()
+        if not response:
+            return None
+        # SFISModel dùng chung 1 object current_data -> tách bản sao cho từng panel
+        response = copy.deepcopy(response)
+        content = self.laser_presenter.CreateFormatContent(response)
+        cycle_tracer.mark("parse")
+        if not content:
+            return key, response, None
+        return key, response, content
+
+    def _startPrefetch(self):
+        """Gửi NEEDPSN cho panel kế tiếp ở background thread"""
+        if self._prefetch_future is not None or not self._lookaheadEnabled():
+            return
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SFISPrefetch")
+        log.info("Marking worker: Prefetching SFIS data for next panel")
+        self._prefetch_future = self._prefetch_executor.submit(self._prefetchPanelData)
+
+    def _prefetchPanelData(self):
+        # Stage SFIS của panel kế tiếp không được tính vào cycle đang chạy
+        with cycle_tracer.detached():
+            return self._fetchPanelData()
+
+    def _takePrefetched(self):
+        """Lấy kết quả prefetch (chờ nếu chưa xong). None nếu không có / lỗi / đã cũ"""
+        future, self._prefetch_future = self._prefetch_future, None
+        if future is None:
+            return None
+        try:
+            result = future.result(timeout=PREFETCH_WAIT_S)
+        except FutureTimeoutError:
+            log.warning("Marking worker: SFIS prefetch timed out, fetching again")
+            return None
+        except Exception as e:
+            log.warning(f"Marking worker: SFIS prefetch failed ({e}), fetching again")
+            return None
+        if not result:
+            log.warning("Marking worker: SFIS prefetch returned no data, fetching again")
+            return None
+        key, response, content = result
+        if key != self._panelKey():
+            log.warning("Marking worker: Settings changed since prefetch, discarding prefetched data")
+            return None
+        return response, content
+
     @Slot()
     def startMarking(self):
         """Start marking process"""
         try:
             self.is_running = True
+            settings = self.settings_manager.snapshot()
             
             # Emit MARKING status
             self.statusChanged.emit("MARKING")
             self.progressUpdate.emit("Starting marking process...")
             log.info("Marking worker: Starting marking process")
             
-            # Step 1: Get data from SFIS
-            self.progressUpdate.emit("Step 1: Getting data from SFIS...")
-            log.info("Marking worker: Getting data from SFIS")
-            
-            response = self.sfis_presenter.getDataFromSFIS()
+            # Step 1: Get data from SFIS (dùng dữ liệu prefetch nếu có)
+            prefetched = self._takePrefetched()
+            if prefetched:
+                response, content = prefetched
+                self.progressUpdate.emit("Step 1: Using prefetched SFIS data")
+                log.info("Marking worker: Using prefetched SFIS data")
+            else:
+                self.progressUpdate.emit("Step 1: Getting data from SFIS...")
+                log.info("Marking worker: Getting data from SFIS")
+                fetched = self._fetchPanelData()
+                response, content = fetched[1:] if fetched else (None, None)
+
             if not response:
                 error_msg = "Cannot receive data from SFIS"
                 log.error(f"Marking worker: {error_msg}")
@@ -47,10 +144,6 @@ class MarkingWorker(QObject):
             log.info("Marking worker: Data received from SFIS")
             
             # Step 2: Format content
-            self.progressUpdate.emit("Creating format content...")
-            log.info("Marking worker: Creating format content")
-            
-            content = self.laser_presenter.CreateFormatContent(response)
             if not content:
                 error_msg = "Cannot create format content for laser"
                 log.error(f"Marking worker: {error_msg}")
@@ -61,12 +154,17 @@ class MarkingWorker(QObject):
             
             self.progressUpdate.emit("Format content created ")
             log.info("Marking worker: Format content created")
+
+            # Không gửi END: NEEDPSN panel kế tiếp có thể chạy song song với GA/C2/NT
+            post_result_sfc = settings.post_result_sfc
+            if not post_result_sfc:
+                self._startPrefetch()
             
             # Step 3: Start laser marking
             self.progressUpdate.emit("Starting laser marking...")
             log.info("Marking worker: Starting laser marking")
             
-            laser_script = self.settings_manager.get("project.script", None)
+            laser_script = settings.script
             success = self.laser_presenter.startLaserMarkingProcess(
                 script=laser_script, 
                 content=content
@@ -84,25 +182,34 @@ class MarkingWorker(QObject):
             log.info("Marking worker: Laser marking completed")
             
             # Step 4: Send complete to SFIS
-            post_result_sfc = self.settings_manager.get("general.post_result_sfc", True)
             if post_result_sfc:
-                self.progressUpdate.emit("Step 4: Sending complete to SFIS...")
-                log.info("Marking worker: Sending complete to SFIS")
-                
                 mo = response.mo
                 panel_no = response.panel_no
                 
-                success = self.sfis_presenter.sendComplete(mo, panel_no)
-                if not success:
+                if settings.sfis_outbox:
+                    # Outbox: END ghi xuống đĩa rồi báo PLC OK ngay, thread SFISOutbox gửi lên SFIS sau
+                    self.progressUpdate.emit("Step 4: Queueing complete for SFIS...")
+                    log.info("Marking worker: Queueing complete for SFIS")
+                    success = self.sfis_presenter.queueComplete(mo, panel_no)
+                    error_msg = "Cannot queue complete for SFIS"
+                else:
+                    self.progressUpdate.emit("Step 4: Sending complete to SFIS...")
+                    log.info("Marking worker: Sending complete to SFIS")
+                    success = self.sfis_presenter.sendComplete(mo, panel_no)
                     error_msg = "Cannot send complete to SFIS"
+                if not success:
                     log.error(f"Marking worker: {error_msg}")
                     self.error.emit(error_msg)
                     self.statusChanged.emit("ERROR")
                     self.finished.emit(False)
                     return
                 
+                # end_ack: SFIS xác nhận END, hoặc END đã nằm an toàn trong outbox
+                cycle_tracer.mark("end_ack")
                 self.progressUpdate.emit("Step 4: Complete sent to SFIS ✓")
                 log.info("Marking worker: Complete sent to SFIS")
+                # NEEDPSN panel N+1 chờ END panel N tới SFIS (SFISPresenter.waitCompleteDelivered)
+                self._startPrefetch()
             
             # Success
             self.progressUpdate.emit("Marking process completed successfully!")
@@ -123,5 +230,9 @@ class MarkingWorker(QObject):
     def stop(self):
         """Stop worker"""
         self.is_running = False
+        self._prefetch_future = None
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+            self._prefetch_executor = None
         log.info("Marking worker: Stopped")
 
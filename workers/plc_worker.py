@@ -7,6 +7,9 @@ from serial import SerialException
 
 from PySide6.QtCore import QObject, Signal, Slot, QTimer
 from utils.Logging import getLogger
+from utils.setting import settings_manager
+from workers.io_core import io_core, SerialChannel
+from workers.frame_buffer import FrameBuffer
 
 
 log = getLogger()
@@ -28,6 +31,12 @@ class PLCWorker(QObject):
         self.timeout = 1.0
         self._runningPLC = False
 
+        # advanced.async_io: COM port do IOCore quản lý, nhận dữ liệu qua callback (không polling)
+        self.use_async_io = settings_manager.get("advanced.async_io", False)
+        self._channel: SerialChannel | None = None
+        # Buffer nhận cấp phát sẵn, dùng lại cho mọi frame của port
+        self._rx = FrameBuffer()
+
         # QTimer sẽ được tạo trong thread của PLCWorker (sau khi moveToThread)
         # để tránh lỗi "QObject::startTimer: Timers cannot be started from another thread"
         self._poll_timer: QTimer | None = None
@@ -43,9 +52,21 @@ class PLCWorker(QObject):
             if baudrate:
                 self.baudrate = baudrate        
 
+            self._closeChannel()
             if self.serial_port and self.serial_port.is_open:
                 self.serial_port.close()
 
+            if self.use_async_io:
+                self._channel = SerialChannel("PLC", self.port_name, self.baudrate)
+                if self._runningPLC:
+                    self._channel.on_data = self._onChannelData
+                io_core.run(self._channel.open())
+                self.serial_port = self._channel.serial
+                self.is_connected = True
+                log.info(f"PLC connected (async io): {self.port_name} baudrate: {self.baudrate}bps")
+                self.connectionStatusChanged.emit(True)
+                return True
+
             self.serial_port = serial.Serial(
                 port=self.port_name,
                 baudrate=self.baudrate,
@@ -64,7 +85,8 @@ class PLCWorker(QObject):
             log.info(f"PLC connected: {self.port_name} baudrate: {self.baudrate}bps")
             self.connectionStatusChanged.emit(True)
             return True
-        except SerialException as exc:
+        except (SerialException, OSError) as exc:
+            self._channel = None
             log.error(f"[PLC] Serial error: {exc}")
             self.is_connected = False
             self.connectionStatusChanged.emit(False)
@@ -74,6 +96,7 @@ class PLCWorker(QObject):
     @Slot()
     def disconnect(self):
         try:
+            self._closeChannel()
             if self.serial_port and self.serial_port.is_open:
                 self.serial_port.close()
             self.serial_port = None
@@ -86,6 +109,14 @@ class PLCWorker(QObject):
             self.error_occurred.emit(str(exc))
             return False
 
+    def _closeChannel(self):
+        if self._channel is not None:
+            try:
+                io_core.run(self._channel.close())
+            except Exception as exc:
+                log.warning(f"[PLC] Close async channel error: {exc}")
+            self._channel = None
+
     # ------------------------------------------------------------------
     # Command helpers
     # ------------------------------------------------------------------
@@ -104,8 +135,12 @@ class PLCWorker(QObject):
                 return False
             payload = data if data.endswith("\r\n") else f"{data}\r\n"
             log.info(f"[PLC] Sent: {payload.strip()}")
-            bytes_written = self.serial_port.write(payload.encode('ascii'))
-            self.serial_port.flush()
+            if self._channel is not None:
+                io_core.run(self._channel.write(payload))
+                bytes_written = len(payload)
+            else:
+                bytes_written = self.serial_port.write(payload.encode('ascii'))
+                self.serial_port.flush()
             log.info(f"[PLC] Data sent successfully: {bytes_written} bytes")
             return True
         except Exception as exc:
@@ -122,6 +157,12 @@ class PLCWorker(QObject):
                 return
             self._runningPLC = True
 
+            if self._channel is not None:
+                # IOCore gọi callback ngay khi có dữ liệu, không cần QTimer
+                self._channel.on_data = self._onChannelData
+                log.info("PLC receiver started (IOCore callback)")
+                return True
+
             # Lazy-init QTimer trong đúng thread (thread hiện tại của PLCWorker)
             if self._poll_timer is None:
                 self._poll_timer = QTimer(self)
@@ -140,9 +181,16 @@ class PLCWorker(QObject):
     def stopReceiver(self):
         log.info("PLC receiver loop stop requested")
         self._runningPLC = False
+        if self._channel is not None:
+            self._channel.on_data = None
         if self._poll_timer is not None:
             self._poll_timer.stop()
 
+    def _onChannelData(self, data: bytes):
+        """Callback từ IOCore thread: signal được queue về receiver (PLCPresenter)"""
+        if self._runningPLC:
+            self.data_received.emit(data.decode("ascii", errors="ignore"))
+
     def _run(self):
         """Được gọi định kỳ trong QThread của worker để đọc dữ liệu PLC."""
         if not self._runningPLC:
@@ -177,22 +225,33 @@ class PLCWorker(QObject):
             max_no_data_count = 10 
             
             log.info("Waiting for data...")
-            
-            while time.time() - start_time < timeout_sec:
-                if self.serial_port.in_waiting > 0:
-                    # Có dữ liệu, đọc tất cả
-                    chunk = self.serial_port.read(self.serial_port.in_waiting)
-                    data_bytes += chunk
-                    no_data_count = 0  # Reset counter
-                    log.debug(f"Received {len(chunk)} bytes, total: {len(data_bytes)}")
-                else:
-                    # Không có dữ liệu
-                    no_data_count += 1
-                    if len(data_bytes) > 0 and no_data_count >= max_no_data_count:
-                        # Đã có dữ liệu và không còn dữ liệu mới trong 100ms → dừng
-                        log.info(f"No more data after {max_no_data_count * 10}ms, stopping read")
-                        break
-                    time.sleep(0.01)  # Chờ 10ms
+
+            if self._channel is not None:
+                # Không có terminator: frame kết thúc sau 100ms không có byte mới (giống vòng polling)
+                try:
+                    data_bytes = io_core.run(
+                        self._channel.readFrame((), timeout_sec, idle=max_no_data_count * 0.01)
+                    )
+                except TimeoutError:
+                    data_bytes = b''
+            else:
+                buffer = self._rx
+                buffer.clear()
+                while time.time() - start_time < timeout_sec:
+                    if self.serial_port.in_waiting > 0:
+                        # Có dữ liệu, đọc tất cả
+                        received = buffer.readinto(self.serial_port.readinto, self.serial_port.in_waiting)
+                        no_data_count = 0  # Reset counter
+                        log.debug(f"Received {received} bytes, total: {len(buffer)}")
+                    else:
+                        # Không có dữ liệu
+                        no_data_count += 1
+                        if len(buffer) > 0 and no_data_count >= max_no_data_count:
+                            # Đã có dữ liệu và không còn dữ liệu mới trong 100ms → dừng
+                            log.info(f"No more data after {max_no_data_count * 10}ms, stopping read")
+                            break
+                        time.sleep(0.01)  # Chờ 10ms
+                data_bytes = buffer.take()
             
             # Kiểm tra dữ liệu
             if not data_bytes:
@@ -202,7 +261,7 @@ class PLCWorker(QObject):
                 return None
             
             # Chuyển bytes sang text string (ASCII)
-            data_str = data_bytes.decode('ascii', errors='ignore')
+            data_str = str(data_bytes, 'ascii', errors='ignore')
             log.info(f"[PLC] Data received: {data_str}")
             self.data_received.emit(data_str)
             return data_str
@@ -231,5 +290,7 @@ class PLCWorker(QObject):
     # ------------------------------------------------------------------
     def checkConnectionAlive(self) -> bool:
         """Kiểm tra kết nối serial còn mở không."""
+        if self._channel is not None:
+            return self._channel.is_open
         return bool(self.serial_port and self.serial_port.is_open)
 
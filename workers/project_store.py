@@ -0,0 +1,281 @@
+"""
+Project Store - Lưu model.json bằng journal append-only + compact nền
+- Mỗi thao tác sửa / thêm / xóa chỉ append 1 dòng JSON vào model.json.journal (O(1), fsync)
+- Đọc: model.json + replay journal (upsert theo Project_Name giữ nguyên vị trí, delete bỏ entry)
+- Compact ở thread nền: ghi model.json.tmp rồi os.replace, sau đó cắt phần journal đã gộp
+  => tắt máy / crash giữa chừng không làm hỏng model.json; replay journal lại nhiều lần vẫn cho cùng kết quả
+- Dòng đầu journal ghi nhận dạng (sha256 + size) của model.json mà journal được ghi lên. model.json bị thay từ bên
+  ngoài (copy đè, seed lại từ default_model.json) => journal cũ không replay mà được đổi tên thành .stale-<thời gian>
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.Logging import getLogger
+
+log = getLogger()
+
+COMPACT_EVERY = 100  # số bản ghi journal trước khi gộp vào model.json
+
+
+class ProjectStore:
+    """Store model.json dùng chung theo đường dẫn (xem getProjectStore). Entry trùng Project_Name: giữ entry đầu"""
+
+    def __init__(self, path, compact_every=COMPACT_EVERY):
+        self.path = os.path.abspath(path)
+        self.journal_path = f"{self.path}.journal"
+        self.compact_every = compact_every
+        self.version = 0  # tăng mỗi lần dữ liệu trong store thay đổi
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()  # compact nền và compact() gọi trực tiếp không chạy song song
+        self._entries = None  # Project_Name -> entry, None khi chưa đọc
+        self._journal = None  # file handle append
+        self._journal_records = 0
+        self._disk_state = None  # stat (model.json, journal) sau lần đọc / ghi gần nhất của store
+        self._base_id = None  # dạng của model.json đang làm nền cho journal (header journal)
+        self._compact_thread = None
+
+    # ------------------------------------------------------------------
+    # Đọc
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _diskState(self):
+        return self._stat(self.path), self._stat(self.journal_path)
+
+    @staticmethod
+    def _fileId(data: bytes) -> dict:
+        return {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+
+    def _header(self) -> str:
+        return json.dumps({"op": "base", **self._base_id}) + "\n"
+
+    def changedOnDisk(self) -> bool:
+        """True nếu model.json / journal bị thay đổi từ bên ngoài (hoặc store chưa đọc)"""
+        with self._lock:
+            return self._entries is None or self._diskState() != self._disk_state
+
+    def read(self) -> list:
+        """Đọc model.json + replay journal, trả về list entry. Lỗi file / JSON được raise cho worker xử lý"""
+        with self._lock:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            data = json.loads(raw.decode("utf-8"))
+            if not isinstance(data, list):
+                raise ValueError("Invalid data format - expected list")
+            entries = {}
+            duplicates = 0
+            for entry in data:
+                name = entry.get("Project_Name", "")
+                if name in entries:
+                    duplicates += 1
+                    continue
+                entries[name] = entry
+            if duplicates:
+                log.warning(f"Project store: {duplicates} duplicate Project_Name entries ignored")
+            self._base_id = self._fileId(raw)
+            self._journal_records = self._replay(entries)
+            self._entries = entries
+            self._disk_state = self._diskState()
+            self.version += 1
+            if self._journal_records >= self.compact_every:
+                self.compactAsync()
+            return list(entries.values())
+
+    def _replay(self, entries) -> int:
+        """Áp dụng journal lên entries, trả về số bản ghi hợp lệ"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        records = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Dòng cuối bị cắt do crash giữa lúc ghi: bỏ qua
+                    log.warning(f"Project store: skipping corrupt journal line {line_no}")
+                    continue
+                if record.get("op") == "base":
+                    if {"sha256": record.get("sha256"), "size": record.get("size")} != self._base_id:
+                        self._archiveJournal()
+                        return 0
+                    continue
+                records.append(record)
+        # Journal không có header (ghi bởi bản cũ): không kiểm tra được nền, replay như trước
+        for record in records:
+            self._apply(entries, record)
+            count += 1
+        return count
+
+    def _archiveJournal(self):
+        """model.json không còn là file journal được ghi lên: cất journal sang bên, không replay"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        stale_path = f"{self.journal_path}.stale-{time.strftime('%Y%m%d-%H%M%S')}"
+        os.replace(self.journal_path, stale_path)
+        log.warning(f"Project store: {self.path} was replaced outside the app, "
+                    f"journal not replayed (moved to {stale_path})")
+
+    @staticmethod
+    def _apply(entries, record):
+        if record.get("op") == "upsert":
+            entry = record["entry"]
+            entries[entry.get("Project_Name", "")] = entry
+        elif record.get("op") == "delete":
+            entries.pop(record.get("name"), None)
+
+    # ------------------------------------------------------------------
+    # Ghi từng bản ghi
+    # ------------------------------------------------------------------
+    def _ensureLoaded(self):
+        if self._entries is None or self.changedOnDisk():
+            self.read()
+
+    def get(self, project_name):
+        with self._lock:
+            self._ensureLoaded()
+            return self._entries.get(project_name)
+
+    def __contains__(self, project_name):
+        return self.get(project_name) is not None
+
+    def upsert(self, entry):
+        """Thêm mới hoặc thay entry theo Project_Name"""
+        with self._lock:
+            self._ensureLoaded()
+            self._append({"op": "upsert", "entry": entry})
+            self._entries[entry.get("Project_Name", "")] = entry
+
+    def delete(self, project_name) -> bool:
+        """Xóa project. False nếu không tồn tại"""
+        with self._lock:
+            self._ensureLoaded()
+            if project_name not in self._entries:
+                return False
+            self._append({"op": "delete", "name": project_name})
+            del self._entries[project_name]
+            return True
+
+    def _append(self, record):
+        if self._journal is None:
+            new_journal = not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            if new_journal:
+                self._journal.write(self._header())
+            elif self._endsTorn():
+                self._journal.write("\n")  # dòng dở dang do crash: không để bản ghi mới dính vào
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_records += 1
+        self._disk_state = self._diskState()
+        self.version += 1
+        if self._journal_records >= self.compact_every:
+            self.compactAsync()
+
+    def _endsTorn(self) -> bool:
+        with open(self.journal_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    # ------------------------------------------------------------------
+    # Compact
+    # ------------------------------------------------------------------
+    def compactAsync(self):
+        """Gộp journal vào model.json ở thread nền (bỏ qua nếu đang compact)"""
+        with self._lock:
+            if self._compact_thread is not None and self._compact_thread.is_alive():
+                return
+            self._compact_thread = threading.Thread(target=self._compactSafe, name="ProjectStoreCompact", daemon=True)
+            self._compact_thread.start()
+
+    def _compactSafe(self):
+        try:
+            self.compact()
+        except Exception as e:
+            log.error(f"Project store: compaction failed: {e}")
+
+    def compact(self):
+        """Ghi toàn bộ entry ra model.json (tmp + os.replace) rồi bỏ phần journal đã gộp"""
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            if self._entries is None or not self._journal_records:
+                return
+            snapshot = list(self._entries.values())
+            if self._journal is not None:
+                self._journal.flush()
+            merged_bytes = self._stat(self.journal_path)[1] if os.path.exists(self.journal_path) else 0
+            merged_records = self._journal_records
+
+        # Serialize + ghi file ngoài lock: thao tác sửa / thêm / xóa vẫn append journal bình thường
+        data = json.dumps(snapshot, indent=2, ensure_ascii=False).encode("utf-8")
+        self._writeAtomic(self.path, data)
+
+        with self._lock:
+            # Giữ lại bản ghi append trong lúc compact (chưa có trong snapshot)
+            with open(self.journal_path, "rb") as f:
+                f.seek(merged_bytes)
+                tail = f.read()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            # Nền mới của journal là model.json vừa ghi
+            self._base_id = self._fileId(data)
+            if tail:
+                self._writeAtomic(self.journal_path, self._header().encode("utf-8") + tail)
+            else:
+                os.remove(self.journal_path)
+            self._journal_records -= merged_records
+            self._disk_state = self._diskState()
+        log.info(f"Project store: compacted {merged_records} journal records into {self.path}")
+
+    @staticmethod
+    def _writeAtomic(path, data: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """Chờ compact đang chạy rồi đóng journal"""
+        thread = self._compact_thread
+        if thread is not None:
+            thread.join(timeout=5.0)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def getProjectStore(path) -> ProjectStore:
+    """Store dùng chung cho mọi ProjectWorker cùng đường dẫn model.json"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ProjectStore(key)
+        return store
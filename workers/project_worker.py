@@ -1,10 +1,12 @@
 """
 Model Worker - QThread worker để load dữ liệu model từ appdata
+- Sửa / thêm / xóa project đi qua ProjectStore (journal append + compact nền), không ghi lại cả model.json
 """
 import json
 import os
 from PySide6.QtCore import QObject, Signal, QThread
 from utils.Logging import getLogger
+from workers.project_store import getProjectStore
 
 log = getLogger()
 
@@ -17,19 +19,21 @@ class ProjectWorker(QObject):
     error = Signal(str)  # Lỗi khi load dữ liệu
     progress = Signal(str)  # Tiến trình load
     loadRequested = Signal()  # Signal để trigger load
-    projectUpdated = Signal(str)  # Project đã được update thành công
+    projectUpdated = Signal(dict)  # Project đã được update thành công (entry mới)
     projectDeleted = Signal(str)  # Project đã được xóa thành công
+    projectAdded = Signal(dict)  # Project mới đã được thêm thành công (entry mới)
     
     def __init__(self, model_json_path):
         super().__init__()
         self.model_json_path = model_json_path
+        self.store = getProjectStore(model_json_path)
         self.is_running = False
         
         # Connect internal signal
         self.loadRequested.connect(self.loadModelData)
     
     def loadModelData(self):
-        """Load dữ liệu model từ file JSON"""
+        """Load dữ liệu model từ file JSON (+ journal)"""
         try:
             self.is_running = True
             self.progress.emit("Loading model data...")
@@ -39,12 +43,7 @@ class ProjectWorker(QObject):
                 self.error.emit(f"File not found: {self.model_json_path}")
                 return
             
-            with open(self.model_json_path, "r", encoding="utf-8") as f:
-                model_data = json.load(f)
-            
-            if not isinstance(model_data, list):
-                self.error.emit("Invalid data format - expected list")
-                return
+            model_data = self.store.read()
             
             self.progress.emit(f"Loaded {len(model_data)} model entries")
             log.info(f"Successfully loaded {len(model_data)} model entries")
@@ -68,49 +67,30 @@ class ProjectWorker(QObject):
     def stop(self):
         """Dừng worker"""
         self.is_running = False
+        self.store.close()
     
     def updateProject(self, project_data):
-        """Update project data in JSON file"""
+        """Update project data (1 bản ghi journal)"""
         try:
             self.progress.emit("Updating project data...")
-            log.info(f"Updating project: {project_data.get('Project_Name', '')}")
+            project_name = project_data.get("Project_Name", "")
+            log.info(f"Updating project: {project_name}")
             
             if not os.path.exists(self.model_json_path):
                 self.error.emit(f"File not found: {self.model_json_path}")
                 return
             
-            # Load existing data
-            with open(self.model_json_path, "r", encoding="utf-8") as f:
-                model_data = json.load(f)
-            
-            if not isinstance(model_data, list):
-                self.error.emit("Invalid data format - expected list")
-                return
-            
-            # Find and update the project
-            project_name = project_data.get("Project_Name", "")
-            updated = False
-            for i, item in enumerate(model_data):
-                if item.get("Project_Name") == project_name:
-                    model_data[i] = project_data
-                    updated = True
-                    break
-            
-            if not updated:
+            if project_name not in self.store:
                 self.error.emit(f"Project not found: {project_name}")
                 return
             
-            # Save updated data
-            with open(self.model_json_path, "w", encoding="utf-8") as f:
-                json.dump(model_data, f, indent=2, ensure_ascii=False)
+            self.store.upsert(project_data)
             
             self.progress.emit(f"Project updated: {project_name}")
             log.info(f"Successfully updated project: {project_name}")
             
-            # Emit success signal
-            self.projectUpdated.emit(project_name)
-            # Reload data
-            self.dataLoaded.emit(model_data)
+            # Emit success signal (presenter cập nhật catalogue tại chỗ, không load lại cả danh sách)
+            self.projectUpdated.emit(project_data)
             
         except Exception as e:
             error_msg = f"Error updating project: {str(e)}"
@@ -118,7 +98,7 @@ class ProjectWorker(QObject):
             self.error.emit(error_msg)
     
     def deleteProject(self, project_name):
-        """Delete project from JSON file"""
+        """Delete project (1 bản ghi journal)"""
         try:
             self.progress.emit("Deleting project data...")
             log.info(f"Deleting project: {project_name}")
@@ -127,35 +107,47 @@ class ProjectWorker(QObject):
                 self.error.emit(f"File not found: {self.model_json_path}")
                 return
             
-            # Load existing data
-            with open(self.model_json_path, "r", encoding="utf-8") as f:
-                model_data = json.load(f)
-            
-            if not isinstance(model_data, list):
-                self.error.emit("Invalid data format - expected list")
-                return
-            
-            # Find and delete the project
-            initial_count = len(model_data)
-            model_data = [item for item in model_data if item.get("Project_Name") != project_name]
-            
-            if len(model_data) == initial_count:
+            if not self.store.delete(project_name):
                 self.error.emit(f"Project not found: {project_name}")
                 return
             
-            # Save updated data
-            with open(self.model_json_path, "w", encoding="utf-8") as f:
-                json.dump(model_data, f, indent=2, ensure_ascii=False)
-            
             self.progress.emit(f"Project deleted: {project_name}")
             log.info(f"Successfully deleted project: {project_name}")
             
             # Emit success signal
             self.projectDeleted.emit(project_name)
-            # Reload data
-            self.dataLoaded.emit(model_data)
             
         except Exception as e:
             error_msg = f"Error deleting project: {str(e)}"
             log.error(error_msg)
             self.error.emit(error_msg)
+
+    def addProject(self, project_data):
+        """Thêm project mới (1 bản ghi journal). Trả về True nếu thành công"""
+        try:
+            self.progress.emit("Adding project data...")
+            project_name = project_data.get("Project_Name", "")
+            log.info(f"Adding project: {project_name}")
+            
+            if not os.path.exists(self.model_json_path):
+                self.error.emit(f"File not found: {self.model_json_path}")
+                return False
+            
+            if project_name in self.store:
+                self.error.emit(f"Project already exists: {project_name}")
+                return False
+            
+            self.store.upsert(project_data)
+            
+            self.progress.emit(f"Project added: {project_name}")
+            log.info(f"Successfully added project: {project_name}")
+            
+            # Emit success signal
+            self.projectAdded.emit(project_data)
+            return True
+            
+        except Exception as e:
+            error_msg = f"Error adding project: {str(e)}"
+            log.error(error_msg)
+            self.error.emit(error_msg)
+            return False
@@ -0,0 +1,236 @@
+"""
+Reconnect Scheduler - Dịch vụ tự động kết nối lại dùng chung cho SFIS / PLC / Laser
+- Mỗi presenter đăng ký 1 channel: is_alive() (kiểm tra nhanh, GUI thread), reconnect() (blocking, chạy trong thread pool),
+  on_change(connected) (GUI thread, khi trạng thái link thay đổi)
+- 1 QTimer chung thay cho reconnect_timer riêng của từng presenter
+- Thử lại theo exponential backoff có jitter (connection.reconnect.base_ms -> max_ms), thiết bị rút ra lâu không bị mở port liên tục
+- hint(name): link vừa rớt / đổi port => thử lại ngay với backoff ban đầu
+- Metrics: số lần thử / thất bại / rớt link / kết nối lại và tổng thời gian mất kết nối (dumpSummary khi thoát)
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from utils.Logging import getLogger
+from utils.setting import settings_manager
+
+log = getLogger()
+
+TICK_MS = 500
+
+
+class _Channel:
+    def __init__(self, name, is_alive, reconnect, on_change):
+        self.name = name
+        self.is_alive = is_alive
+        self.reconnect = reconnect
+        self.on_change = on_change
+        self.enabled = False
+        self.connected = False
+        self.in_flight = False
+        self.backoff_s = 0.0
+        self.next_attempt_at = 0.0
+        self.down_since = None
+        # Metrics
+        self.attempts = 0
+        self.failures = 0
+        self.disconnects = 0
+        self.reconnects = 0
+        self.downtime_s = 0.0
+
+    def markUp(self, now):
+        if self.down_since is not None:
+            self.downtime_s += now - self.down_since
+            self.down_since = None
+        self.connected = True
+
+    def markDown(self, now):
+        if self.down_since is None:
+            self.down_since = now
+        self.connected = False
+
+
+class ReconnectScheduler(QObject):
+    _attemptDone = Signal(str, bool, float)  # thread pool -> GUI thread (name, connected, elapsed_ms)
+
+    def __init__(self):
+        super().__init__()
+        self.base_s = settings_manager.get("connection.reconnect.base_ms", 1000) / 1000.0
+        self.max_s = settings_manager.get("connection.reconnect.max_ms", 60000) / 1000.0
+        self.jitter = min(1.0, max(0.0, settings_manager.get("connection.reconnect.jitter", 0.5)))
+        self._channels = {}
+        self._timer = None  # tạo khi register lần đầu (cần QApplication)
+        self._executor = None
+        self._attemptDone.connect(self._onAttemptDone)
+
+    # ------------------------------------------------------------------
+    # Đăng ký / bật / tắt
+    # ------------------------------------------------------------------
+    def register(self, name, is_alive, reconnect, on_change):
+        """Đăng ký channel (chưa bật). Đăng ký lại cùng tên thì thay callback, giữ metrics"""
+        channel = self._channels.get(name)
+        if channel is None:
+            self._channels[name] = _Channel(name, is_alive, reconnect, on_change)
+        else:
+            channel.is_alive, channel.reconnect, channel.on_change = is_alive, reconnect, on_change
+        if self._timer is None:
+            self._timer = QTimer(self)
+            self._timer.setInterval(TICK_MS)
+            self._timer.timeout.connect(self._tick)
+
+    def enable(self, name, connect_now=True):
+        """Bật tự động kết nối lại. connect_now=False: lần thử đầu chờ base_ms (VD vừa probe lúc khởi động)"""
+        channel = self._channels[name]
+        now = time.monotonic()
+        channel.enabled = True
+        channel.backoff_s = self.base_s
+        if self._safeAlive(channel):
+            channel.markUp(now)
+        else:
+            channel.markDown(now)
+            channel.next_attempt_at = now if connect_now else now + self._delay(channel.backoff_s)
+        if not self._timer.isActive():
+            self._timer.start()
+        self._tick()
+
+    def disable(self, name):
+        channel = self._channels.get(name)
+        if channel is not None:
+            channel.enabled = False
+        if self._timer is not None and not any(c.enabled for c in self._channels.values()):
+            self._timer.stop()
+
+    def hint(self, name):
+        """Gợi ý link vừa thay đổi (rớt kết nối, đổi port): kiểm tra + thử lại ngay, backoff về ban đầu"""
+        channel = self._channels.get(name)
+        if channel is None or not channel.enabled:
+            return
+        channel.backoff_s = self.base_s
+        channel.next_attempt_at = time.monotonic()
+        self._tick()
+
+    def stop(self, wait=True):
+        """Dừng toàn bộ (khi thoát): chờ các lần thử đang chạy kết thúc theo timeout của chúng"""
+        for channel in self._channels.values():
+            channel.enabled = False
+        if self._timer is not None:
+            self._timer.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    # ------------------------------------------------------------------
+    # Lập lịch
+    # ------------------------------------------------------------------
+    def _delay(self, backoff_s):
+        """Backoff có jitter: [backoff * (1 - jitter), backoff] để các thiết bị không thử lại cùng lúc"""
+        return backoff_s * (1.0 - self.jitter * random.random())
+
+    @staticmethod
+    def _safeAlive(channel):
+        try:
+            return bool(channel.is_alive())
+        except Exception as exc:
+            log.warning(f"Reconnect {channel.name}: alive check failed: {exc}")
+            return False
+
+    @Slot()
+    def _tick(self):
+        now = time.monotonic()
+        for channel in self._channels.values():
+            if not channel.enabled or channel.in_flight:
+                continue
+            if channel.connected:
+                if self._safeAlive(channel):
+                    continue
+                # Link rớt: báo presenter rồi thử lại ngay
+                channel.markDown(now)
+                channel.disconnects += 1
+                channel.backoff_s = self.base_s
+                channel.next_attempt_at = now
+                log.warning(f"Reconnect {channel.name}: link lost, reconnecting")
+                self._notify(channel, False)
+            elif self._safeAlive(channel):
+                # Đã kết nối bằng đường khác (VD nút Connect): không mở lại port
+                channel.markUp(now)
+                channel.backoff_s = self.base_s
+                self._notify(channel, True)
+                continue
+            if now >= channel.next_attempt_at:
+                self._startAttempt(channel)
+
+    def _startAttempt(self, channel):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="Reconnect")
+        channel.in_flight = True
+        channel.attempts += 1
+        self._executor.submit(self._runAttempt, channel.name, channel.reconnect)
+
+    def _runAttempt(self, name, reconnect):
+        start = time.perf_counter()
+        try:
+            ok = bool(reconnect())
+        except Exception:
+            ok = False  # lỗi mở port là bình thường khi thiết bị vắng, không log mỗi lần
+        self._attemptDone.emit(name, ok, (time.perf_counter() - start) * 1000.0)
+
+    @Slot(str, bool, float)
+    def _onAttemptDone(self, name, ok, elapsed_ms):
+        channel = self._channels.get(name)
+        if channel is None:
+            return
+        channel.in_flight = False
+        now = time.monotonic()
+        if ok:
+            downtime = now - channel.down_since if channel.down_since is not None else 0.0
+            channel.markUp(now)
+            channel.reconnects += 1
+            channel.backoff_s = self.base_s
+            log.info(f"Reconnect {name}: connected after {channel.attempts} attempts total "
+                     f"(down {downtime:.1f}s, attempt {elapsed_ms:.0f} ms)")
+            if channel.enabled:
+                self._notify(channel, True)
+            return
+        channel.failures += 1
+        delay = self._delay(channel.backoff_s)
+        channel.next_attempt_at = now + delay
+        channel.backoff_s = min(self.max_s, channel.backoff_s * 2)
+        log.debug(f"Reconnect {name}: attempt failed ({elapsed_ms:.0f} ms), next in {delay:.1f}s")
+
+    @staticmethod
+    def _notify(channel, connected):
+        try:
+            channel.on_change(connected)
+        except Exception as exc:
+            log.error(f"Reconnect {channel.name}: state callback error: {exc}")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        result = {}
+        for name, channel in self._channels.items():
+            current_down = now - channel.down_since if channel.down_since is not None else 0.0
+            result[name] = {
+                "connected": channel.connected,
+                "attempts": channel.attempts,
+                "failures": channel.failures,
+                "disconnects": channel.disconnects,
+                "reconnects": channel.reconnects,
+                "downtime_s": round(channel.downtime_s + current_down, 1),
+                "next_retry_s": round(max(0.0, channel.next_attempt_at - now), 1) if not channel.connected else 0.0,
+            }
+        return result
+
+    def dumpSummary(self):
+        for name, m in self.metrics().items():
+            log.info(f"Reconnect summary {name}: connected={m['connected']}, attempts={m['attempts']}, "
+                     f"failures={m['failures']}, disconnects={m['disconnects']}, reconnects={m['reconnects']}, "
+                     f"downtime={m['downtime_s']}s")
+
+
+# Instance global dùng chung cho SFISPresenter / PLCPresenter / LaserPresenter
+reconnect_scheduler = ReconnectScheduler()
@@ -0,0 +1,201 @@
+"""
+SFIS Outbox - Store-and-forward cho message END (test complete) gửi lên SFIS
+- enqueue(): ghi message vào SQLite (<path_app>/RegilaserLog/sfis_outbox.db, WAL + synchronous=FULL) và commit
+  trước khi trạm báo PLC OK => SFIS chậm / mất kết nối không làm hỏng cycle của panel đã mark đúng
+- Thread nền (SFISOutbox) gửi lần lượt từ message cũ nhất: chỉ gửi message kế tiếp khi message trước đã được
+  SFIS xác nhận (FIFO tuyệt đối), gửi lỗi thì thử lại chính message đó sau backoff RETRY_BASE_S -> RETRY_MAX_S
+- Giao nhận at-least-once: SFIS trả lời trễ hơn timeout đọc => message có thể được gửi lại 1 lần nữa
+- Message chưa gửi được vẫn nằm trong file khi tắt ứng dụng / mất điện, lần chạy sau gửi tiếp
+- hint(): link SFIS vừa kết nối lại => thử lại ngay; waitDrained(): chờ gửi hết (giữ thứ tự END N trước NEEDPSN N+1)
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from utils.Logging import getLogger
+from utils.setting import settings_manager
+
+log = getLogger()
+
+RETRY_BASE_S = 1.0
+RETRY_MAX_S = 30.0
+STOP_TIMEOUT_S = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    mo TEXT,
+    panel_no TEXT,
+    message TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+)
+"""
+
+
+class SfisOutbox:
+    """
+    Hàng đợi bền vững cho message gửi SFIS. deliver(message) -> bool gửi 1 message và chờ SFIS xác nhận,
+    được gọi tuần tự từ thread của outbox
+    """
+
+    def __init__(self, deliver, db_path=None):
+        self._deliver = deliver
+        self.db_path = db_path or self.defaultPath()
+        self._cond = threading.Condition()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(_SCHEMA)
+        self._pending = self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+        self._next_attempt_at = 0.0
+        self._backoff_s = RETRY_BASE_S
+        self._stopping = False
+        self._closed = False
+        self._thread = None
+        self.delivered = 0
+        self.failures = 0
+        self.last_error = None
+        if self._pending:
+            log.warning(f"SFIS outbox: {self._pending} message(s) left from previous run, delivering")
+
+    @staticmethod
+    def defaultPath():
+        base_path = settings_manager.get("advanced.path_app", "") or "logs"
+        outbox_dir = os.path.join(base_path, "RegilaserLog")
+        os.makedirs(outbox_dir, exist_ok=True)
+        return os.path.join(outbox_dir, "sfis_outbox.db")
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def enqueue(self, message, mo=None, panel_no=None):
+        """Ghi message xuống đĩa (đã fsync khi trả về True) rồi đánh thức thread gửi"""
+        with self._cond:
+            if self._stopping:
+                log.error("SFIS outbox: stopped, cannot enqueue")
+                return False
+            try:
+                self._db.execute(
+                    "INSERT INTO outbox (created_at, mo, panel_no, message) VALUES (?, ?, ?, ?)",
+                    (time.time(), mo, panel_no, message),
+                )
+            except sqlite3.Error as e:
+                log.error(f"SFIS outbox: cannot store message {message!r}: {e}")
+                return False
+            self._pending += 1
+            self._ensureThread()
+            self._cond.notify_all()
+        return True
+
+    def hint(self):
+        """Thử gửi lại ngay, bỏ qua backoff đang chờ (VD link SFIS vừa kết nối lại)"""
+        with self._cond:
+            self._next_attempt_at = 0.0
+            self._backoff_s = RETRY_BASE_S
+            if self._pending:
+                self._ensureThread()
+            self._cond.notify_all()
+
+    def pending(self):
+        with self._cond:
+            return self._pending
+
+    def waitDrained(self, timeout_s):
+        """Chờ tới khi mọi message đã được SFIS xác nhận. False nếu hết timeout_s mà vẫn còn message"""
+        with self._cond:
+            if self._pending:
+                self._ensureThread()
+            return self._cond.wait_for(lambda: not self._pending or self._stopping, timeout_s) and not self._pending
+
+    def stop(self):
+        """Dừng thread gửi (message chưa gửi vẫn giữ trong file) và đóng database"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(STOP_TIMEOUT_S)
+            if thread.is_alive():
+                log.warning("SFIS outbox: sender still busy on SFIS, closing without waiting")
+        with self._cond:
+            if self._pending:
+                log.warning(f"SFIS outbox: {self._pending} message(s) not delivered, kept in {self.db_path}")
+            self._db.close()
+            self._closed = True
+
+    # ------------------------------------------------------------------
+    # Thread gửi
+    # ------------------------------------------------------------------
+    def _ensureThread(self):
+        """Gọi khi đang giữ lock"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._sendLoop, name="SFISOutbox", daemon=True)
+            self._thread.start()
+
+    def _sendLoop(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    remaining = self._next_attempt_at - time.monotonic()
+                    if self._pending and remaining <= 0:
+                        break
+                    self._cond.wait(remaining if self._pending else None)
+                if self._stopping:
+                    return
+                row = self._db.execute("SELECT id, message, attempts FROM outbox ORDER BY id LIMIT 1").fetchone()
+                if row is None:
+                    self._pending = 0
+                    self._cond.notify_all()
+                    continue
+            row_id, message, attempts = row
+            try:
+                ok, error = bool(self._deliver(message)), "no acknowledge from SFIS"
+            except Exception as e:
+                ok, error = False, str(e)
+            with self._cond:
+                # Đã đóng database khi đang chờ SFIS: message còn trong file, lần chạy sau gửi lại
+                if self._closed or (self._stopping and not ok):
+                    return
+                if ok:
+                    self._db.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+                    self._pending -= 1
+                    self.delivered += 1
+                    self._backoff_s = RETRY_BASE_S
+                    self._next_attempt_at = 0.0
+                    if attempts:
+                        log.info(f"SFIS outbox: {message!r} delivered after {attempts + 1} attempts")
+                else:
+                    self._db.execute("UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                                     (error, row_id))
+                    self.failures += 1
+                    self.last_error = error
+                    self._next_attempt_at = time.monotonic() + self._backoff_s
+                    log.warning(f"SFIS outbox: delivery of {message!r} failed ({error}), "
+                                f"{self._pending} pending, retry in {self._backoff_s:.0f}s")
+                    self._backoff_s = min(RETRY_MAX_S, self._backoff_s * 2)
+                self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Thống kê
+    # ------------------------------------------------------------------
+    def metrics(self) -> dict:
+        with self._cond:
+            oldest = None
+            if self._pending and not self._closed:
+                row = self._db.execute("SELECT MIN(created_at) FROM outbox").fetchone()
+                oldest = round(time.time() - row[0], 1) if row and row[0] is not None else None
+            return {
+                "pending": self._pending,
+                "oldest_s": oldest,
+                "delivered": self.delivered,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+    def dumpSummary(self):
+        m = self.metrics()
+        log.info(f"SFIS outbox summary: pending={m['pending']}, delivered={m['delivered']}, "
+                 f"failures={m['failures']}, last_error={m['last_error']}")
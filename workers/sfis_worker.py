@@ -1,11 +1,23 @@
 import serial
+import threading
 import time
 from PySide6.QtCore import QObject, Signal, QThread, Slot
 from utils.Logging import getLogger
+from utils.setting import settings_manager
+from workers.io_core import io_core, SerialChannel
+from workers.frame_buffer import FrameBuffer
 # from presenter.base_presenter import BasePresenter
 # Khởi tạo logger
 log = getLogger()
 
+# Frame SFIS kết thúc bằng CRLF, hoặc bằng keyword khi SFIS không gửi CRLF
+FRAME_TERMINATOR = b"\r\n"
+FRAME_KEYWORDS = (b"ENDBOMVERPASS", b"PASS")
+# Fallback cho frame không có terminator: dừng sau khoảng lặng này (ms)
+IDLE_GAP_MS = 100
+# Thời gian chờ SFIS trả lời OP Number của ACTIVATE
+ACTIVATE_REPLY_TIMEOUT_MS = 2000
+
 
 class SFISWorker(QObject):
     logMessage = Signal(str, str)  # (message, level) = (message, INFO/WARNING/ERROR)
@@ -13,6 +25,7 @@ class SFISWorker(QObject):
     error_occurred = Signal(str)  # Lỗi xảy ra
     connectionStatusChanged = Signal(bool)  # Trạng thái kết nối
     signal_sent = Signal(bool, str)  # (success, message) - Tín hiệu đã gửi
+    activated = Signal(bool)  # ACTIVATE (UNDO + OP) đã gửi xong
     
     def __init__(self):
         super().__init__()
@@ -26,6 +39,14 @@ class SFISWorker(QObject):
         self.parity = serial.PARITY_NONE
         self.stopbits = serial.STOPBITS_ONE
         self.timeout = 5.0
+
+        # advanced.async_io: COM port do IOCore quản lý (đọc frame không cần thread chờ port)
+        self.use_async_io = settings_manager.get("advanced.async_io", False)
+        self._channel = None
+        # Buffer nhận cấp phát sẵn, dùng lại cho mọi frame của port
+        self._rx = FrameBuffer()
+        # Mỗi giao dịch trên port (gửi + đọc reply) giữ lock này: thread marking / SFISOutbox / ACTIVATE dùng chung
+        self.io_lock = threading.RLock()
         
         log.info("SFISWorker initialized successfully")
     
@@ -39,10 +60,23 @@ class SFISWorker(QObject):
                 self.port_name = port_name
             if baudrate:
                 self.baudrate = baudrate
+            self._closeChannel()
             # Close existing connection if any
             if self.serial_port and self.serial_port.is_open:
                 log.info("Closing existing connection...")
                 self.serial_port.close()
+
+            if self.use_async_io:
+                self._channel = SerialChannel(
+                    "SFIS", self.port_name, self.baudrate,
+                    bytesize=self.bytesize, parity=self.parity, stopbits=self.stopbits,
+                )
+                io_core.run(self._channel.open())
+                self.serial_port = self._channel.serial
+                self.is_connected = True
+                log.info(f"SFIS Connected (async io) to {self.port_name} baudrate: {self.baudrate}bps")
+                self.connectionStatusChanged.emit(True)
+                return True
             
             # Mở kết nối mới với PySerial
             self.serial_port = serial.Serial(
@@ -67,6 +101,7 @@ class SFISWorker(QObject):
             
         except serial.SerialException as e:
             self.is_connected = False
+            self._channel = None
             error_msg = f"SFIS Serial port error: {str(e)}"
             log.error(f"{error_msg}")
             self.connectionStatusChanged.emit(False)
@@ -75,6 +110,7 @@ class SFISWorker(QObject):
             
         except Exception as e:
             self.is_connected = False
+            self._channel = None
             error_msg = f"Connection error: {str(e)}"
             log.error(f"{error_msg}")
             log.debug("Exception details:", exc_info=True)
@@ -85,6 +121,7 @@ class SFISWorker(QObject):
     @Slot()
     def disconnect(self):
         try:            
+            self._closeChannel()
             if self.serial_port and self.serial_port.is_open:
                 self.serial_port.close()
             self.is_connected = False
@@ -97,6 +134,14 @@ class SFISWorker(QObject):
             self.error_occurred.emit(error_msg)
             return False
 
+    def _closeChannel(self):
+        if self._channel is not None:
+            try:
+                io_core.run(self._channel.close())
+            except Exception as e:
+                log.warning(f"[SFIS] Close async channel error: {e}")
+            self._channel = None
+
     def _ensure_connection(self) -> bool:
         if not self.is_connected or not self.serial_port:
             error_msg = "Not connected to SFIS"
@@ -112,8 +157,14 @@ class SFISWorker(QObject):
                 return False
             payload = data if data.endswith("\r\n") else f"{data}\r\n"
             log.info(f"[SFIS] Sent: {payload.strip()}")
-            bytes_written = self.serial_port.write(payload.encode('ascii'))
-            self.serial_port.flush()  
+            if self._channel is not None:
+                io_core.run(self._channel.write(payload.encode('ascii'), clear_rx=True))
+                bytes_written = len(payload)
+            else:
+                # Xóa dữ liệu cũ TRƯỚC khi gửi: response đến nhanh sẽ không bị mất khi bắt đầu đọc
+                self.serial_port.reset_input_buffer()
+                bytes_written = self.serial_port.write(payload.encode('ascii'))
+                self.serial_port.flush()
             log.info(f"[SFIS] Data sent successfully: {bytes_written} bytes")            
             return True
             
@@ -135,6 +186,22 @@ class SFISWorker(QObject):
             self.error_occurred.emit(error_msg)
             return False
     
+    @Slot(str)
+    def activate(self, message_op):
+        """UNDO + OP Number trong thread của worker: thread gọi (GUI) không phải chờ io_lock"""
+        # UNDO + OP là 1 giao dịch: không cho END của outbox chen vào giữa
+        with self.io_lock:
+            success = self.sendData_SFIS("UNDO\r\n")
+            if success:
+                time.sleep(0.2)
+                success = self.sendData_SFIS(message_op)
+            # Đọc luôn ENDPASS của OP: reply trễ không dính vào reply NEEDPSN của panel đầu tiên
+            if success and not self.readData_SFIS(timeout_ms=ACTIVATE_REPLY_TIMEOUT_MS):
+                log.warning("[SFIS] No reply to ACTIVATE OP number")
+        if not success:
+            log.error("[SFIS] Failed to send ACTIVATE (UNDO + OP)")
+        self.activated.emit(success)
+
     @Slot(str)
     def send_Signal(self, start_message):
         log.info(f"[SFIS] Sending START signal: {start_message.strip()}")
@@ -156,36 +223,53 @@ class SFISWorker(QObject):
             self.signal_sent.emit(False, error_msg)
     
     @Slot(int)
-    def readData_SFIS(self, timeout_ms=10000):
+    def readData_SFIS(self, timeout_ms=10000, idle_ms=IDLE_GAP_MS):
+        """
+        Đọc 1 frame từ SFIS bằng blocking read (không polling).
+        Trả về ngay khi frame hoàn chỉnh (kết thúc bằng \\r\\n hoặc keyword PASS/ENDBOMVERPASS).
+        Frame không có terminator: dừng sau idle_ms không có byte mới (giống hành vi cũ).
+        Chế độ async_io: IOCore gom frame, thread này chỉ chờ kết quả.
+        """
+        data_bytes = b''
+        original_timeout = None
         try:
             if not self._ensure_connection():
                 return False            
-            # Đợi và đọc tất cả dữ liệu
-            self.serial_port.reset_input_buffer()
-            start_time = time.time()
-            timeout_sec = timeout_ms / 1000.0
-            data_bytes = b''
-            no_data_count = 0
-            max_no_data_count = 10  # Dừng sau 10 lần không có dữ liệu (100ms)
-            
             log.info("Waiting for data...")
-     
-            while time.time() - start_time < timeout_sec:
-                if self.serial_port.in_waiting > 0:
-                    # Có dữ liệu, đọc tất cả
-                    chunk = self.serial_port.read(self.serial_port.in_waiting)
-                    data_bytes += chunk
-                    no_data_count = 0  # Reset counter
-                    log.debug(f"Received {len(chunk)} bytes, total: {len(data_bytes)}")
-                else:
-                    # Không có dữ liệu
-                    no_data_count += 1
-                    if len(data_bytes) > 0 and no_data_count >= max_no_data_count:
-                        # Đã có dữ liệu và không còn dữ liệu mới trong 100ms → dừng
-                        log.info(f"No more data after {max_no_data_count * 10}ms, stopping read")
+
+            if self._channel is not None:
+                try:
+                    data_bytes = io_core.run(self._channel.readFrame(
+                        self._isFrameComplete, timeout_ms / 1000.0, idle=idle_ms / 1000.0
+                    ))
+                except TimeoutError:
+                    data_bytes = b''
+            else:
+                original_timeout = self.serial_port.timeout
+                deadline = time.monotonic() + timeout_ms / 1000.0
+                idle_sec = idle_ms / 1000.0
+                buffer = self._rx
+                buffer.clear()
+
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
                         break
-                    time.sleep(0.01)  # Chờ 10ms
-            
+                    # Chưa có dữ liệu: chờ tới deadline; đã có dữ liệu: chỉ chờ idle gap
+                    self.serial_port.timeout = min(remaining, idle_sec) if buffer else remaining
+                    received = buffer.readinto(self.serial_port.readinto, max(1, self.serial_port.in_waiting))
+                    if not received:
+                        if buffer:
+                            log.info(f"No terminator, no more data after {idle_ms}ms, stopping read")
+                            break
+                        continue
+                    log.debug(f"Received {received} bytes, total: {len(buffer)}")
+                    if self._isFrameComplete(buffer):
+                        break
+
+                # memoryview trỏ vào buffer, decode trực tiếp không copy qua bytes
+                data_bytes = buffer.take()
+
             # Kiểm tra dữ liệu
             if not data_bytes:
                 error_msg = "Timeout: No data received"
@@ -193,7 +277,7 @@ class SFISWorker(QObject):
                 self.error_occurred.emit(error_msg)
                 return None
             
-            data_str = data_bytes.decode('ascii', errors='ignore')
+            data_str = str(data_bytes, 'ascii', errors='ignore')
             # self.data_received.emit(data_str)
             log.info(f"  Data received successfully")
             log.info(f"  Total bytes: {len(data_bytes)}")
@@ -219,6 +303,17 @@ class SFISWorker(QObject):
             log.debug("Exception details:", exc_info=True)
             self.error_occurred.emit(error_msg)
             return None
+
+        finally:
+            if original_timeout is not None and self.serial_port and self.serial_port.is_open:
+                self.serial_port.timeout = original_timeout
+
+    @staticmethod
+    def _isFrameComplete(buffer) -> bool:
+        """Frame SFIS hoàn chỉnh khi kết thúc bằng \\r\\n hoặc keyword PASS/ENDBOMVERPASS."""
+        if buffer.endswith(FRAME_TERMINATOR):
+            return True
+        return any(buffer.endswith(keyword) for keyword in FRAME_KEYWORDS)
     
     def readDataLength_SFIS (self, expected_length=None, timeout_ms=5000):
         try:
@@ -238,33 +333,46 @@ class SFISWorker(QObject):
             timeout_sec = timeout_ms / 1000.0
             data_bytes = b''
             
-            if expected_length:
+            if expected_length and self._channel is not None:
+                log.info(f"Waiting for {expected_length} bytes...")
+                try:
+                    data_bytes = io_core.run(self._channel.readFrame(
+                        lambda buffer: len(buffer) >= expected_length, timeout_sec
+                    ))
+                except TimeoutError:
+                    error_msg = f"Timeout: Received less than {expected_length} bytes"
+                    log.error(f"{error_msg}")
+                    self.error_occurred.emit(error_msg)
+                    return None
+            elif expected_length:
                 # Đọc số byte cố định
                 log.info(f"Waiting for {expected_length} bytes...")
-                
-                while len(data_bytes) < expected_length:
+                buffer = self._rx
+                buffer.clear()
+
+                while len(buffer) < expected_length:
                     # Kiểm tra timeout
                     if time.time() - start_time > timeout_sec:
-                        error_msg = f"Timeout: Received {len(data_bytes)}/{expected_length} bytes"
+                        error_msg = f"Timeout: Received {len(buffer)}/{expected_length} bytes"
                         log.error(f"{error_msg}")
                         self.error_occurred.emit(error_msg)
                         return None
                     
                     # Đọc dữ liệu nếu có
                     if self.serial_port.in_waiting > 0:
-                        remaining = expected_length - len(data_bytes)
-                        chunk = self.serial_port.read(remaining)
-                        data_bytes += chunk
-                        log.debug(f"Received {len(chunk)} bytes, total: {len(data_bytes)}/{expected_length}")
+                        remaining = expected_length - len(buffer)
+                        received = buffer.readinto(self.serial_port.readinto, remaining)
+                        log.debug(f"Received {received} bytes, total: {len(buffer)}/{expected_length}")
                     else:
-                        time.sleep(0.01)             
+                        time.sleep(0.01)
+                data_bytes = buffer.take()
             # Check data
             if not data_bytes:
                 log.warning("No data received")
                 return None
             
             # Chuyển bytes sang text string (ASCII decoding)
-            data_str = data_bytes.decode('ascii', errors='ignore').strip()
+            data_str = str(data_bytes, 'ascii', errors='ignore').strip()
             # log.info(f"  Bytes received: {len(data_bytes)}")
             log.info(f"  Data received from SFIS: {data_str}")            
             # Emit signal
@@ -297,6 +405,8 @@ class SFISWorker(QObject):
             if self.serial_port and self.serial_port.is_open:
                 self.serial_port.reset_input_buffer()
                 self.serial_port.reset_output_buffer()
+                if self._channel is not None:
+                    io_core.callSoon(self._channel.clearRx)
                 log.info("Buffer cleared")
                 return True
             else:
@@ -311,6 +421,8 @@ class SFISWorker(QObject):
 
     def checkConnectionAlive(self) -> bool:
         """Kiểm tra kết nối serial SFIS còn mở không."""
+        if self._channel is not None:
+            return self._channel.is_open
         return bool(self.serial_port and self.serial_port.is_open)
     
     # def is_port_available(self, port_name):
@@ -0,0 +1,155 @@
+"""
+Station Supervisor - Multi-station: 1 process headless cho mỗi trạm laser (SFIS / PLC / laser riêng), chạy song song
+- Mỗi trạm là 1 process con `main.py --headless --station <name>` => timeout serial / driver COM treo của 1 trạm
+  không chặn trạm khác (không chung GIL, event loop, cycle_tracer, reconnect_scheduler, log)
+- Process con chết bất thường => khởi động lại sau backoff (connection.reconnect.base_ms -> max_ms), process chạy ổn
+  định quá STABLE_S thì backoff về ban đầu
+- stop(): yêu cầu mọi trạm thoát sạch qua lệnh "stop" trên status port của trạm (không cần console chung,
+  chạy được với bản build windowed), không gửi được lệnh thì terminate(); quá STOP_TIMEOUT_S thì kill
+- statusSnapshot(): pid / alive / số lần restart / status port của từng trạm (status chi tiết: status port của trạm)
+"""
+import os
+import subprocess
+import sys
+import time
+
+from PySide6.QtCore import QObject, QTimer
+
+from utils.Logging import getLogger
+from utils.setting import settings_manager
+from utils.stations import STATION_FLAG, stationEntries, stationOverlay
+from workers.status_server import requestStop
+
+log = getLogger()
+
+TICK_MS = 500
+STABLE_S = 60.0
+STOP_TIMEOUT_S = 10.0
+
+
+class _StationProcess:
+    def __init__(self, name, status_port):
+        self.name = name
+        self.status_port = status_port
+        self.proc = None
+        self.started_at = 0.0
+        self.next_start_at = 0.0
+        self.backoff_s = 0.0
+        self.restarts = 0
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+
+class StationSupervisor(QObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.base_s = settings_manager.get("connection.reconnect.base_ms", 1000) / 1000.0
+        self.max_s = settings_manager.get("connection.reconnect.max_ms", 60000) / 1000.0
+        self._stations = []
+        for index, entry in enumerate(stationEntries()):
+            overlay = stationOverlay(index, entry)
+            self._stations.append(_StationProcess(entry["name"], overlay["advanced"]["status_port"]))
+        self._timer = None
+
+    @property
+    def stationNames(self):
+        return [station.name for station in self._stations]
+
+    @staticmethod
+    def command(name):
+        """Lệnh chạy process của 1 trạm (bản build: chính file exe, chạy từ source: python main.py)"""
+        if getattr(sys, "frozen", False):
+            return [sys.executable, "--headless", STATION_FLAG, name]
+        main_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+        return [sys.executable, main_script, "--headless", STATION_FLAG, name]
+
+    # ------------------------------------------------------------------
+    # Start / stop
+    # ------------------------------------------------------------------
+    def start(self):
+        for station in self._stations:
+            station.backoff_s = self.base_s
+            self._spawn(station)
+        if self._timer is None:
+            self._timer = QTimer(self)
+            self._timer.setInterval(TICK_MS)
+            self._timer.timeout.connect(self._tick)
+        self._timer.start()
+        log.info(f"StationSupervisor: started {len(self._stations)} station(s): {', '.join(self.stationNames)}")
+
+    def _spawn(self, station):
+        kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+        try:
+            station.proc = subprocess.Popen(self.command(station.name), **kwargs)
+        except OSError as e:
+            station.proc = None
+            log.error(f"StationSupervisor: cannot start station {station.name}: {e}")
+            self._scheduleRestart(station)
+            return
+        station.started_at = time.monotonic()
+        log.info(f"StationSupervisor: station {station.name} started (pid {station.proc.pid}, "
+                 f"status port {station.status_port})")
+
+    def _scheduleRestart(self, station):
+        station.next_start_at = time.monotonic() + station.backoff_s
+        log.warning(f"StationSupervisor: restarting station {station.name} in {station.backoff_s:.1f}s")
+        station.backoff_s = min(self.max_s, station.backoff_s * 2)
+
+    def _tick(self):
+        now = time.monotonic()
+        for station in self._stations:
+            if station.alive:
+                if now - station.started_at > STABLE_S:
+                    station.backoff_s = self.base_s
+                continue
+            if station.proc is not None:
+                log.error(f"StationSupervisor: station {station.name} exited with code {station.proc.returncode}")
+                station.proc = None
+                self._scheduleRestart(station)
+            elif now >= station.next_start_at:
+                station.restarts += 1
+                self._spawn(station)
+
+    def stop(self):
+        """Yêu cầu mọi trạm thoát (cleanup như đóng ứng dụng), chờ tối đa STOP_TIMEOUT_S rồi kill"""
+        if self._timer is not None:
+            self._timer.stop()
+        running = [station for station in self._stations if station.alive]
+        for station in running:
+            if requestStop(station.status_port):
+                continue
+            # Trạm chưa mở status port (đang khởi động) / treo: SIGTERM trên Linux, Windows không có cách thoát sạch
+            log.warning(f"StationSupervisor: station {station.name} did not accept stop request, terminating")
+            try:
+                station.proc.terminate()
+            except OSError as e:
+                log.warning(f"StationSupervisor: cannot terminate station {station.name}: {e}")
+        deadline = time.monotonic() + STOP_TIMEOUT_S
+        for station in running:
+            try:
+                station.proc.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                log.error(f"StationSupervisor: station {station.name} did not exit, killing")
+                station.proc.kill()
+                station.proc.wait()
+        log.info("StationSupervisor: all stations stopped")
+
+    # ------------------------------------------------------------------
+    # Trạng thái
+    # ------------------------------------------------------------------
+    def statusSnapshot(self):
+        now = time.monotonic()
+        return {
+            "stations": {
+                station.name: {
+                    "alive": station.alive,
+                    "pid": station.proc.pid if station.alive else None,
+                    "restarts": station.restarts,
+                    "status_port": station.status_port,
+                    "uptime_s": round(now - station.started_at, 1) if station.alive else 0.0,
+                }
+                for station in self._stations
+            }
+        }
@@ -0,0 +1,101 @@
+"""
+Status Server - Trạng thái trạm qua socket local (chế độ headless, không có GUI để xem)
+- TCP 127.0.0.1:advanced.status_port, chạy trong event loop của IOCore (không thêm thread)
+- Mỗi client nhận 1 dòng JSON (StationPresenter.statusSnapshot) rồi đóng kết nối, VD: ncat 127.0.0.1 50110
+- on_stop: client gửi thêm dòng "stop" (trong COMMAND_TIMEOUT_S) => trạm thoát sạch như Ctrl+C.
+  Kênh dừng của StationSupervisor: không cần console chung như CTRL_BREAK_EVENT (bản build windowed)
+"""
+import asyncio
+import json
+import socket
+from typing import Callable, Optional
+
+from utils.Logging import getLogger
+from workers.io_core import io_core
+
+log = getLogger()
+
+DEFAULT_STATUS_PORT = 50110
+COMMAND_TIMEOUT_S = 1.0
+STOP_COMMAND = "stop"
+
+
+class StatusServer:
+    """TCP server localhost trả về snapshot() dạng JSON line"""
+
+    def __init__(self, snapshot: Callable[[], dict], host: str = "127.0.0.1", port: int = DEFAULT_STATUS_PORT,
+                 on_stop: Optional[Callable[[], None]] = None):
+        self.snapshot = snapshot
+        self.on_stop = on_stop  # gọi từ thread IOCore
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def start(self) -> bool:
+        """Mở socket listen (port=0 => port ngẫu nhiên, đọc lại self.port). False nếu không bind được"""
+        try:
+            self._server = io_core.run(asyncio.start_server(self._onClient, self.host, self.port), timeout=3.0)
+        except OSError as e:
+            log.error(f"StatusServer: cannot listen on {self.host}:{self.port}: {e}")
+            return False
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info(f"StatusServer: listening on {self.host}:{self.port}")
+        return True
+
+    def _statusLine(self) -> bytes:
+        try:
+            status = self.snapshot()
+        except Exception as e:
+            status = {"error": str(e)}
+        return (json.dumps(status, ensure_ascii=False) + "\n").encode("utf-8")
+
+    async def _onClient(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            writer.write(self._statusLine())
+            await writer.drain()
+            if self.on_stop is None:
+                return
+            try:
+                command = await asyncio.wait_for(reader.readline(), COMMAND_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                return
+            if command.decode("ascii", errors="ignore").strip().lower() == STOP_COMMAND:
+                log.info("StatusServer: stop requested by client")
+                writer.write(b'{"stopping": true}\n')
+                await writer.drain()
+                self.on_stop()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    def stop(self):
+        if self._server is None:
+            return
+        server, self._server = self._server, None
+        if not io_core.is_running:
+            return
+
+        async def _close():
+            server.close()
+            await server.wait_closed()
+
+        try:
+            io_core.run(_close(), timeout=3.0)
+        except Exception as e:
+            log.warning(f"StatusServer: error while closing: {e}")
+        log.info("StatusServer: stopped")
+
+
+def requestStop(port: int, host: str = "127.0.0.1", timeout: float = 2.0) -> bool:
+    """Yêu cầu process có StatusServer(on_stop=...) ở port thoát. True nếu process đã nhận lệnh"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            stream = sock.makefile("rwb")
+            stream.readline()  # dòng status
+            stream.write(f"{STOP_COMMAND}\n".encode("ascii"))
+            stream.flush()
+            return b"stopping" in stream.readline()
+    except OSError as e:
+        log.warning(f"StatusServer: stop request to {host}:{port} failed: {e}")
+        return False
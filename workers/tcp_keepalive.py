@@ -0,0 +1,51 @@
+"""
+TCP keepalive + kiểm tra half-open cho socket tới thiết bị (laser controller)
+- enableKeepalive(): bật SO_KEEPALIVE với idle / interval / số lần probe ngắn
+  (mặc định của OS là 2 giờ => link chết im lặng không bao giờ bị phát hiện giữa các cycle)
+- peekAlive(): kiểm tra link không chặn bằng recv(MSG_PEEK) trên socket non-blocking,
+  thấy FIN / RST / lỗi keepalive mà getpeername() không thấy
+"""
+import socket
+import sys
+
+from utils.Logging import getLogger
+
+log = getLogger()
+
+
+def enableKeepalive(sock: socket.socket, idle_ms: int, interval_ms: int, count: int) -> bool:
+    """Bật keepalive: probe đầu sau idle_ms không có dữ liệu, lặp mỗi interval_ms, count lần không trả lời => lỗi socket"""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "TCP_KEEPIDLE") and hasattr(socket, "TCP_KEEPINTVL"):
+            # Linux, Windows 10 1709+ (đơn vị giây)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, max(1, idle_ms // 1000))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, interval_ms // 1000))
+        elif sys.platform == "win32":
+            # Windows cũ: đơn vị ms, số lần probe cố định của OS
+            sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle_ms, interval_ms))
+        elif hasattr(socket, "TCP_KEEPALIVE"):
+            # macOS: chỉ chỉnh được idle
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, max(1, idle_ms // 1000))
+        if hasattr(socket, "TCP_KEEPCNT"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, max(1, count))
+        return True
+    except OSError as exc:
+        log.warning(f"Cannot enable TCP keepalive: {exc}")
+        return False
+
+
+def peekAlive(sock: socket.socket) -> tuple[bool, int]:
+    """
+    Kiểm tra socket non-blocking đang rảnh: (alive, số byte đang chờ đọc).
+    recv trả về b'' = peer đã đóng (FIN), OSError = RST / keepalive hết hạn, BlockingIOError = còn sống, không có dữ liệu
+    """
+    try:
+        data = sock.recv(1024, socket.MSG_PEEK)
+    except BlockingIOError:
+        return True, 0
+    except OSError:
+        return False, 0
+    if not data:
+        return False, 0
+    return True, len(data)